@@ -26,13 +26,13 @@ THE SOFTWARE.
 
 from __future__ import division
 
-from panda3d.core import CS_yup_right, CS_zup_right, invert, Vec3, Mat4, Vec4
-from panda3d.core import SamplerState
+from panda3d.core import Vec4, SamplerState
 from direct.stdpy.file import open
 
 from rpcore.globals import Globals
 from rpcore.rpobject import RPObject
 from rpcore.loader import RPLoader
+from rpcore.native import SceneDataBuilder
 
 from rpcore.util.shader_input_blocks import GroupedInputBlock
 
@@ -47,6 +47,7 @@ class CommonResources(RPObject):
         self._pipeline = pipeline
         self._showbase = Globals.base
         self._ptas = {}
+        self._scene_data = SceneDataBuilder()
         self._load_fonts()
         self._load_textures()
         self._setup_inputs()
@@ -109,6 +110,7 @@ class CommonResources(RPObject):
                 handle.write(content)
         except IOError as msg:
             self.error("Failed to write common resources shader configuration!", msg)
+        self._pipeline.shader_deps.invalidate("/$$rptemp/$$main_scene_data.inc.glsl")
 
     def _load_textures(self):
         """ Loads commonly used textures and makes them available via the
@@ -167,45 +169,27 @@ class CommonResources(RPObject):
         """ Updates the commonly used resources, mostly the shader inputs """
         update = self._input_ubo.update_input
 
-        # Get the current transform matrix of the camera
+        # Get the current transform matrix of the camera, and let the builder
+        # compute all derived matrices. It only does so if the camera or the
+        # lens changed.
         view_mat = Globals.render.get_transform(self._showbase.cam).get_mat()
-
-        # Compute the view matrix, but with a z-up coordinate system
-        zup_conversion = Mat4.convert_mat(CS_zup_right, CS_yup_right)
-        update("view_mat_z_up", view_mat * zup_conversion)
-
-        # Compute the view matrix without the camera rotation
-        view_mat_billboard = Mat4(view_mat)
-        view_mat_billboard.set_row(0, Vec3(1, 0, 0))
-        view_mat_billboard.set_row(1, Vec3(0, 1, 0))
-        view_mat_billboard.set_row(2, Vec3(0, 0, 1))
-        update("view_mat_billboard", view_mat_billboard)
+        proj_mat = self._showbase.camLens.get_projection_mat()
+        scene_data = self._scene_data
+        if scene_data.update(view_mat, proj_mat):
+            update("view_mat_z_up", scene_data.get_view_mat_z_up())
+            update("view_mat_billboard", scene_data.get_view_mat_billboard())
+            update("proj_mat", scene_data.get_proj_mat_z_up())
+            update("inv_proj_mat", scene_data.get_inv_proj_mat_z_up())
+            update("view_proj_mat_no_jitter", scene_data.get_view_proj_mat_no_jitter())
+            update("last_view_proj_mat_no_jitter",
+                   scene_data.get_last_view_proj_mat_no_jitter())
+            update("last_inv_view_proj_mat_no_jitter",
+                   scene_data.get_last_inv_view_proj_mat_no_jitter())
+            update("vs_frustum_directions", scene_data.get_vs_frustum_directions())
+            update("ws_frustum_directions", scene_data.get_ws_frustum_directions())
 
         update("camera_pos", self._showbase.camera.get_pos(Globals.render))
 
-        # Compute last view projection mat
-        curr_vp = self._input_ubo.get_input("view_proj_mat_no_jitter")
-        update("last_view_proj_mat_no_jitter", curr_vp)
-        curr_vp = Mat4(curr_vp)
-        curr_vp.invert_in_place()
-        curr_inv_vp = curr_vp
-        update("last_inv_view_proj_mat_no_jitter", curr_inv_vp)
-
-        proj_mat = Mat4(self._showbase.camLens.get_projection_mat())
-
-        # Set the projection matrix as an input, but convert it to the correct
-        # coordinate system before.
-        proj_mat_zup = Mat4.convert_mat(CS_yup_right, CS_zup_right) * proj_mat
-        update("proj_mat", proj_mat_zup)
-
-        # Set the inverse projection matrix
-        update("inv_proj_mat", invert(proj_mat_zup))
-
-        # Remove jitter and set the new view projection mat
-        proj_mat.set_cell(1, 0, 0.0)
-        proj_mat.set_cell(1, 1, 0.0)
-        update("view_proj_mat_no_jitter", view_mat * proj_mat)
-
         # Store the frame delta
         update("frame_delta", Globals.clock.get_dt())
         update("smooth_frame_delta", 1.0 / max(1e-5, Globals.clock.get_average_frame_rate()))
@@ -217,23 +201,6 @@ class CommonResources(RPObject):
         update("current_film_offset", self._showbase.camLens.get_film_offset())
         update("frame_index", Globals.clock.get_frame_count())
 
-        # Compute frustum corners in the order BL, BR, TL, TR
-        ws_frustum_directions = Mat4()
-        vs_frustum_directions = Mat4()
-        inv_proj_mat = Globals.base.camLens.get_projection_mat_inv()
-        view_mat_inv = Mat4(view_mat)
-        view_mat_inv.invert_in_place()
-
-        for i, point in enumerate(((-1, -1), (1, -1), (-1, 1), (1, 1))):
-            result = inv_proj_mat.xform(Vec4(point[0], point[1], 1.0, 1.0))
-            vs_dir = (zup_conversion.xform(result)).xyz.normalized()
-            vs_frustum_directions.set_row(i, Vec4(vs_dir, 1))
-            ws_dir = view_mat_inv.xform(Vec4(result.xyz, 0))
-            ws_frustum_directions.set_row(i, ws_dir)
-
-        update("vs_frustum_directions", vs_frustum_directions)
-        update("ws_frustum_directions", ws_frustum_directions)
-
         update("screen_size", Globals.resolution)
         update("native_screen_size", Globals.native_resolution)
         update("lc_tile_count", self._pipeline.light_mgr.num_tiles)
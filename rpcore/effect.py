@@ -24,11 +24,13 @@ THE SOFTWARE.
 
 """
 
-from rplibs.six import iteritems, iterkeys
+import hashlib
+
+from rplibs.six import iteritems, iterkeys, itervalues
 from rplibs.yaml import load_yaml_file
 
-from panda3d.core import Filename
-from direct.stdpy.file import open
+from panda3d.core import Filename, VirtualFileSystem
+from direct.stdpy.file import open, isfile, listdir
 
 from rpcore.rpobject import RPObject
 from rpcore.loader import RPLoader
@@ -60,6 +62,10 @@ class Effect(RPObject):
     # the cache where compiled are effects stored.
     _GLOBAL_CACHE = {}
 
+    # Hash of all shader templates, computed once and reset whenever the cache
+    # gets cleared, so the templates are not re-read for every effect.
+    _TEMPLATE_HASH = None
+
     # Global counter to store the amount of generated effects, used to create
     # a unique id used for writing temporary files.
     _EFFECT_ID = 0
@@ -78,8 +84,78 @@ class Effect(RPObject):
         if not effect.do_load(filename):
             RPObject.global_error("Effect", "Could not load effect!")
             return None
+        cls._GLOBAL_CACHE[effect_hash] = effect
         return effect
 
+    @classmethod
+    def clear_cache(cls):
+        """ Clears the in-memory effect cache. This has to be called when the
+        shaders get reloaded, since cached effects hold compiled shader objects.
+        The generated shaders of the loaded effects stay cached on disk, and get
+        reused as long as the effect file and the templates did not change.
+        All other generated effect shaders get removed from the disk cache. """
+        used_sources = set()
+        for effect in itervalues(cls._GLOBAL_CACHE):
+            used_sources.update(effect.get_shader_sources())
+        cls._prune_generated_shaders(used_sources)
+        cls._GLOBAL_CACHE = {}
+        cls._TEMPLATE_HASH = None
+
+    @classmethod
+    def _prune_generated_shaders(cls, used_sources):
+        """ Deletes all generated effect shaders from the disk cache which are
+        not in used_sources, so the cache does not grow each time an effect or
+        its options change """
+        vfs = VirtualFileSystem.get_global_ptr()
+        for entry in listdir("/$$rpcache"):
+            shader_path = "/$$rpcache/" + entry
+            if entry.startswith("$$effect-") and shader_path not in used_sources:
+                vfs.delete_file(shader_path)
+
+    @classmethod
+    def is_cached(cls, filename, options):
+        """ Returns whether an effect with the given filename and options is
+        currently loaded """
+        return cls._generate_hash(filename, options) in cls._GLOBAL_CACHE
+
+    @classmethod
+    def remove_from_cache(cls, predicate):
+        """ Removes all loaded effects for which predicate returns True from the
+        cache, so they get reloaded the next time they are used. Returns the
+        amount of removed effects. """
+        removed = [k for k, effect in iteritems(cls._GLOBAL_CACHE) if predicate(effect)]
+        for effect_hash in removed:
+            del cls._GLOBAL_CACHE[effect_hash]
+        return len(removed)
+
+    @classmethod
+    def get_loaded_effects(cls):
+        """ Returns a list of all currently loaded effects """
+        return list(itervalues(cls._GLOBAL_CACHE))
+
+    @classmethod
+    def invalidate_templates(cls):
+        """ Discards the hash of the shader templates, this has to be called
+        when a template changed, so effects generate their shaders again """
+        cls._TEMPLATE_HASH = None
+
+    @classmethod
+    def _get_template_hash(cls):
+        """ Returns a hash over the content of all shader templates """
+        if cls._TEMPLATE_HASH is None:
+            hasher = hashlib.md5()
+            for template_src in cls.get_template_sources():
+                with open(template_src, "rb") as handle:
+                    hasher.update(handle.read())
+            cls._TEMPLATE_HASH = hasher.hexdigest()
+        return cls._TEMPLATE_HASH
+
+    @classmethod
+    def get_template_sources(cls):
+        """ Returns the paths of all shader templates used to generate effects """
+        return ["/$$rp/shader/templates/vertex.vert.glsl"] + [
+            "/$$rp/shader/templates/{}.frag.glsl".format(pass_id) for pass_id in cls._PASSES]
+
     @classmethod
     def _generate_hash(cls, filename, options):
         """ Generates an unique hash for the effect. The effect hash is based
@@ -96,7 +172,7 @@ class Effect(RPObject):
         # will cause a cache miss)
         filename = Filename(filename)
         filename.make_absolute()
-        file_hash = str(hash(filename.to_os_generic()))
+        file_hash = hashlib.md5(filename.to_os_generic().encode("utf-8")).hexdigest()[:16]
 
         # Hash the options, that is, sort the keys to make sure the values
         # are always in the same order, and then convert the flags to strings using
@@ -133,10 +209,13 @@ class Effect(RPObject):
         self.filename = filename
         self.effect_name = self._convert_filename_to_name(filename)
         self.effect_hash = self._generate_hash(filename, self._options)
+        self.content_hash = self._generate_content_hash(filename)
 
-        # Load the YAML file
-        parsed_yaml = load_yaml_file(filename) or {}
-        self._parse_content(parsed_yaml)
+        # Only parse the YAML file and generate the shaders in case there are
+        # no generated shaders for the current content in the cache
+        if not self._find_cached_shaders():
+            parsed_yaml = load_yaml_file(filename) or {}
+            self._parse_content(parsed_yaml)
 
         # Construct a shader object for each pass
         for pass_id in self._PASSES:
@@ -145,6 +224,10 @@ class Effect(RPObject):
             self._shader_objs[pass_id] = RPLoader.load_shader(vertex_src, fragment_src)
         return True
 
+    def get_shader_sources(self):
+        """ Returns the paths of all generated shaders of this effect """
+        return list(self._generated_shader_paths.values())
+
     def get_shader_obj(self, pass_id):
         """ Returns a handle to the compiled shader object for a given render
         pass. """
@@ -153,6 +236,38 @@ class Effect(RPObject):
             return False
         return self._shader_objs[pass_id]
 
+    def _generate_content_hash(self, filename):
+        """ Generates a hash over the content of the effect file, the shader
+        templates and the effect options. In contrast to the effect hash, this
+        is stable across runs, and changes as soon as any of the sources
+        changes, so it can be used to cache the generated shaders on disk. """
+        hasher = hashlib.md5()
+        hasher.update(self._get_template_hash().encode("utf-8"))
+        hasher.update(self.effect_hash.encode("utf-8"))
+        with open(filename, "rb") as handle:
+            hasher.update(handle.read())
+        return hasher.hexdigest()
+
+    def _get_generated_shader_path(self, pass_id, stage):
+        """ Returns the path where the generated shader for a given pass and
+        stage gets stored """
+        cache_key = self.effect_name + "@" + stage + "-" + pass_id + "@" + self.content_hash
+        return "/$$rpcache/$$effect-" + cache_key + ".glsl"
+
+    def _find_cached_shaders(self):
+        """ Checks whether all shaders of the effect were already generated
+        for the current content hash, and if so, uses them """
+        paths = {}
+        for pass_id in self._PASSES:
+            for stage in ("vertex", "fragment"):
+                shader_path = self._get_generated_shader_path(pass_id, stage)
+                if not isfile(shader_path):
+                    return False
+                paths[stage + "-" + pass_id] = shader_path
+        self.debug("Using cached shaders for", self.effect_name)
+        self._generated_shader_paths = paths
+        return True
+
     def _convert_filename_to_name(self, filename):
         """ Constructs an effect name from a filename, this is used for writing
         out temporary files """
@@ -216,10 +331,11 @@ class Effect(RPObject):
                 continue
             injects[key] = injects.get(key, []) + [i for i in val.split("\n")]
 
-        cache_key = self.effect_name + "@" + stage + "-" + pass_id + "@" + self.effect_hash
-        return self._process_shader_template(template_src, cache_key, injects)
+        shader_path = self._get_generated_shader_path(pass_id, stage)
+        return self._process_shader_template(template_src, shader_path, injects)
 
-    def _process_shader_template(self, template_src, cache_key, injections):  # noqa # pylint: disable=too-many-branches
+    def _process_shader_template(  # pylint: disable=too-many-branches
+            self, template_src, shader_path, injections):
         """ Generates a compiled shader object from a given shader
         source location and code injection definitions. """
         with open(template_src, "r") as handle:
@@ -230,7 +346,7 @@ class Effect(RPObject):
 
         addline("/* Compiled Shader Template")
         addline(" * generated from: '" + template_src + "'")
-        addline(" * cache key: '" + cache_key + "'")
+        addline(" * content hash: '" + self.content_hash + "'")
         addline(" *")
         addline(" * !!! Autogenerated, do not edit! Your changes will be lost. !!!")
         addline(" */\n\n")
@@ -299,9 +415,8 @@ class Effect(RPObject):
 
         # Write the constructed shader and load it back
         shader_content = "\n".join(parsed_lines)
-        temp_path = "/$$rptemp/$$effect-" + cache_key + ".glsl"
 
-        with open(temp_path, "w") as handle:
+        with open(shader_path, "w") as handle:
             handle.write(shader_content)
 
-        return temp_path
+        return shader_path
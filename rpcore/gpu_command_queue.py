@@ -26,6 +26,7 @@ THE SOFTWARE.
 
 from panda3d.core import PTAInt
 
+from rpcore.globals import Globals
 from rpcore.image import Image
 from rpcore.rpobject import RPObject
 from rpcore.loader import RPLoader
@@ -42,7 +43,11 @@ class GPUCommandQueue(RPObject):
     def __init__(self, pipeline):
         RPObject.__init__(self)
         self._pipeline = pipeline
-        self._commands_per_frame = 1024
+        self._commands_per_frame = pipeline.settings["lighting.commands_per_frame"]
+        self._max_commands_per_frame = max(
+            self._commands_per_frame, pipeline.settings["lighting.max_commands_per_frame"])
+        self._target_frame_time = pipeline.settings["lighting.command_budget_frame_time"] / 1000.0
+        self._command_budget = self._commands_per_frame
         self._command_list = GPUCommandList()
         self._pta_num_commands = PTAInt.empty_array(1)
         self._create_data_storage()
@@ -73,13 +78,43 @@ class GPUCommandQueue(RPObject):
         command queue was updated """
         return self._pta_num_commands[0]
 
+    @property
+    def command_budget(self):
+        """ Returns the amount of commands which may get processed per frame
+        at the moment. This is at least the configured commands_per_frame, and
+        gets increased while a large backlog of commands is processed and the
+        frame time allows it. """
+        return self._command_budget
+
     def process_queue(self):
         """ Processes the n first commands of the queue """
+        if self._command_list.num_commands == 0:
+            # Avoid modifying the ram image, since that would trigger a
+            # re-upload of the command buffer although there is nothing to do
+            self._pta_num_commands[0] = 0
+            return
+
+        self._update_command_budget()
         pointer = self._data_texture.modify_ram_image()
         num_commands_exec = self._command_list.write_commands_to(
-            pointer, self._commands_per_frame)
+            pointer, self._command_budget)
         self._pta_num_commands[0] = num_commands_exec
 
+    def _update_command_budget(self):
+        """ Adapts the amount of commands processed per frame. While the queue
+        holds more commands than can be processed in one frame, and the last
+        frame was faster than the target frame time, the budget is doubled, up
+        to max_commands_per_frame. As soon as the frame time exceeds the target,
+        or the backlog is processed, it falls back to commands_per_frame. """
+        if self._max_commands_per_frame == self._commands_per_frame:
+            return
+        num_queued = self._command_list.num_commands
+        if num_queued > self._command_budget and Globals.clock.get_dt() < self._target_frame_time:
+            self._command_budget = min(2 * self._command_budget, self._max_commands_per_frame)
+        elif num_queued <= self._commands_per_frame or \
+                Globals.clock.get_dt() > self._target_frame_time:
+            self._command_budget = self._commands_per_frame
+
     def reload_shaders(self):
         """ Reloads the command shader """
         shader = RPLoader.load_shader(
@@ -103,7 +138,7 @@ class GPUCommandQueue(RPObject):
 
     def _create_data_storage(self):
         """ Creates the buffer used to transfer commands """
-        command_buffer_size = self._commands_per_frame * 32
+        command_buffer_size = self._max_commands_per_frame * 32
         self.debug("Allocating command buffer of size", command_buffer_size)
         self._data_texture = Image.create_buffer("CommandQueue", command_buffer_size, "R32")
 
@@ -72,6 +72,7 @@ class Debugger(RPObject):
         if self.advanced_info:
             Globals.base.doMethodLater(
                 0.5, lambda task: self.collect_scene_data(), "RPDebugger_collectSceneData_initial")
+            self.init_plugin_costs()
         
         Globals.base.doMethodLater(0.1, self.update_stats, "RPDebugger_updateStats")
 
@@ -127,12 +128,41 @@ class Debugger(RPObject):
         self.overlay_node = Globals.base.aspect2d.attach_new_node("Overlay")
         self.debug_lines = []
 
-        num_lines = 6 if self.advanced_info else 1
+        num_lines = 7 if self.advanced_info else 1
         for i in range(num_lines):
             self.debug_lines.append(TextNode(
                 pos=Vec2(0, -i * 0.046), parent=self.overlay_node, align="right", color=Vec3(0.7, 1, 1)))
         self.debug_lines[0].color = Vec4(1, 1, 0, 1)
 
+    def init_plugin_costs(self):
+        """ Enables the timing of plugin hooks and stage updates, which is
+        used to display the per-plugin cost """
+        self.plugin_costs = {}
+        self.plugin_costs_frame = Globals.clock.get_frame_count()
+        self.pipeline.plugin_mgr.hook_timing_enabled = True
+        self.pipeline.stage_mgr.update_timing_enabled = True
+
+    def update_plugin_costs(self):
+        """ Collects the hook and stage update timings since the last call,
+        and blends them into the rolling per-plugin cost in milliseconds """
+        frame = Globals.clock.get_frame_count()
+        num_frames = frame - self.plugin_costs_frame
+        if num_frames <= 0:
+            return
+        self.plugin_costs_frame = frame
+
+        plugin_mgr, stage_mgr = self.pipeline.plugin_mgr, self.pipeline.stage_mgr
+        frame_costs = {}
+        for timings in (plugin_mgr.hook_timings, stage_mgr.update_timings):
+            for plugin_id, durations in timings.items():
+                frame_costs[plugin_id] = frame_costs.get(plugin_id, 0.0) + sum(durations.values())
+        plugin_mgr.reset_hook_timings()
+        stage_mgr.reset_update_timings()
+
+        for plugin_id in set(frame_costs) | set(self.plugin_costs):
+            cost = frame_costs.get(plugin_id, 0.0) * 1000.0 / num_frames
+            self.plugin_costs[plugin_id] = 0.8 * self.plugin_costs.get(plugin_id, cost) + 0.2 * cost
+
     def create_hints(self):
         """ Creates the hints like keybindings and when reloading shaders """
         self.hint_reloading = Sprite(
@@ -326,5 +356,12 @@ class Debugger(RPObject):
             self.pipeline.settings["pipeline.resolution_scale"] * 100.0,
             self.pipeline.light_mgr.num_tiles.x,
             self.pipeline.light_mgr.num_tiles.y,)
+
+        self.update_plugin_costs()
+        costs = sorted(self.plugin_costs.items(), key=lambda item: -item[1])
+        text = "Plugin CPU:  {:5.2f} ms total".format(sum(cost for _, cost in costs))
+        for plugin_id, cost in costs[:6]:
+            text += "  |  {} {:4.2f} ms".format(plugin_id, cost)
+        self.debug_lines[6].text = text
         if task:
             return task.again
@@ -144,6 +144,17 @@ class LightManager(RPObject):
         self.internal_mgr = InternalLightManager()
         self.internal_mgr.set_shadow_update_distance(
             self.pipeline.settings["shadows.max_update_distance"])
+        self.internal_mgr.set_max_light_updates(
+            self.pipeline.settings["lighting.max_light_updates"])
+
+        # Atlas compaction and the cached ranking are only implemented by the
+        # python light manager
+        if hasattr(self.internal_mgr, "set_max_compaction_moves"):
+            self.internal_mgr.set_max_compaction_moves(
+                self.pipeline.settings["shadows.max_compaction_moves"])
+        if hasattr(self.internal_mgr, "set_shadow_rerank_distance"):
+            self.internal_mgr.set_shadow_rerank_distance(
+                self.pipeline.settings["shadows.rerank_distance"])
 
         # Storage for the Lights
         per_light_vec4s = 4
@@ -27,14 +27,17 @@ THE SOFTWARE.
 from __future__ import print_function
 
 import time
+import hashlib
+from threading import Thread, Event
 
-from panda3d.core import PNMImage, VirtualFileSystem, VirtualFileMountRamdisk
-from panda3d.core import Shader
+from rplibs.six.moves import queue  # pylint: disable=import-error
+
+from panda3d.core import Texture, TexturePool, VirtualFileSystem, Filename, Shader
 
 from rpcore.globals import Globals
 from rpcore.rpobject import RPObject
 
-__all__ = ("RPLoader",)
+__all__ = ("RPLoader", "LoadingFuture")
 
 
 class timed_loading_operation(object):  # noqa # pylint: disable=invalid-name,too-few-public-methods
@@ -45,16 +48,24 @@ class timed_loading_operation(object):  # noqa # pylint: disable=invalid-name,to
 
     WARNING_COUNT = 0
 
+    # StartupProfiler which records each loading operation as phase, set by
+    # the pipeline while it is starting up
+    PROFILER = None
+
     def __init__(self, resource):
         self.resource = resource
         if isinstance(self.resource, (list, tuple)):
             self.resource = ', '.join(self.resource)
 
     def __enter__(self):
-        self.start_time = time.clock()
+        if timed_loading_operation.PROFILER is not None:
+            timed_loading_operation.PROFILER.begin("Load " + self.resource)
+        self.start_time = time.time()
 
     def __exit__(self, *args):
-        duration = (time.clock() - self.start_time) * 1000.0
+        duration = (time.time() - self.start_time) * 1000.0
+        if timed_loading_operation.PROFILER is not None:
+            timed_loading_operation.PROFILER.end()
         if duration > 80.0 and timed_loading_operation.WARNING_COUNT < 5:
             RPObject.global_warn(
                 "RPLoader", "Loading '" + self.resource + "' took", round(duration, 2), "ms")
@@ -64,11 +75,80 @@ class timed_loading_operation(object):  # noqa # pylint: disable=invalid-name,to
                     "RPLoader", "Skipping further loading warnings (max warning count reached)")
 
 
+class LoadingFuture(object):
+
+    """ Handle to the result of an asynchronous loading operation started by
+    the RPLoader. The done callbacks always run on the main thread, either
+    while the pipeline updates or when waiting for the pending loads. """
+
+    def __init__(self, resource):
+        self.resource = resource
+        self._finished = Event()
+        self._processed = False
+        self._result = None
+        self._error = None
+        self._callbacks = []
+
+    def done(self):
+        """ Returns whether the loading operation finished """
+        return self._finished.is_set()
+
+    def wait(self):
+        """ Blocks until the loading operation finished """
+        self._finished.wait()
+
+    def result(self):
+        """ Waits for the loading operation to finish and returns the loaded
+        resource. Raises the error of the loading operation if it failed. """
+        self.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def add_done_callback(self, callback):
+        """ Adds a callback which gets called with the loaded resource once the
+        loading operation finished. If it already finished, the callback gets
+        called immediately. """
+        if self._processed:
+            self._run_callback(callback)
+        else:
+            self._callbacks.append(callback)
+
+    def _set_result(self, result, error):
+        """ Stores the result of the loading operation, called by the worker """
+        self._result, self._error = result, error
+        self._finished.set()
+
+    def _process(self):
+        """ Calls all done callbacks, called on the main thread """
+        self._processed = True
+        for callback in self._callbacks:
+            self._run_callback(callback)
+        self._callbacks = []
+
+    def _run_callback(self, callback):
+        """ Calls a done callback, or reports the error of the operation """
+        if self._error is not None:
+            RPObject.global_error(
+                "RPLoader", "Failed to load '" + self.resource + "':", self._error)
+            return
+        callback(self._result)
+
+
 class RPLoader(RPObject):
 
     """ Generic loader class used by the pipeline. All loading of assets happens
     here, which enables us to keep track of used resources """
 
+    # Amount of worker threads used for the asynchronous loading operations
+    NUM_LOADING_THREADS = 4
+
+    _load_queue = None
+    _pending_futures = []
+
+    # ShaderCache used to create the shaders, set by the pipeline
+    SHADER_CACHE = None
+
     @classmethod
     def load_texture(cls, filename):
         """ Loads a 2D-texture from disk """
@@ -87,6 +167,80 @@ class RPLoader(RPObject):
         with timed_loading_operation(filename):
             return Globals.base.loader.load_3d_texture(filename)
 
+    @classmethod
+    def load_texture_async(cls, filename):
+        """ Loads a 2D-texture from disk on a worker thread, and returns a
+        LoadingFuture which receives the texture """
+        return cls._submit(filename, TexturePool.load_texture, filename)
+
+    @classmethod
+    def load_cube_map_async(cls, filename, read_mipmaps=False):
+        """ Loads a cube map from disk on a worker thread, and returns a
+        LoadingFuture which receives the texture """
+        return cls._submit(filename, TexturePool.load_cube_map, filename, read_mipmaps)
+
+    @classmethod
+    def load_3d_texture_async(cls, filename):
+        """ Loads a 3D-texture from disk on a worker thread, and returns a
+        LoadingFuture which receives the texture """
+        return cls._submit(filename, TexturePool.load_3d_texture, filename)
+
+    @classmethod
+    def _submit(cls, resource, load_method, *args):
+        """ Queues a loading operation for the worker threads, starting them
+        if necessary """
+        if cls._load_queue is None:
+            cls._load_queue = queue.Queue()
+            for i in range(cls.NUM_LOADING_THREADS):
+                thread = Thread(target=cls._loading_thread, name="RPLoader-" + str(i))
+                thread.daemon = True
+                thread.start()
+        future = LoadingFuture(resource)
+        cls._pending_futures.append(future)
+        cls._load_queue.put((future, load_method, args))
+        return future
+
+    @classmethod
+    def _loading_thread(cls):
+        """ Main method of the worker threads, processing the queued loading
+        operations """
+        while True:
+            future, load_method, args = cls._load_queue.get()
+            result, error = None, None
+            try:
+                result = load_method(*args)
+                if not result:
+                    error = IOError("Could not load " + future.resource)
+            except Exception as msg:  # pylint: disable=broad-except
+                error = msg
+            future._set_result(result, error)  # pylint: disable=protected-access
+
+    @classmethod
+    def process_finished_loads(cls):
+        """ Calls the done callbacks of all finished asynchronous loading
+        operations. This gets called by the pipeline each frame. """
+        if not cls._pending_futures:
+            return
+        pending = []
+        for future in cls._pending_futures:
+            if future.done():
+                future._process()  # pylint: disable=protected-access
+            else:
+                pending.append(future)
+        cls._pending_futures = pending
+
+    @classmethod
+    def wait_for_pending_loads(cls):
+        """ Waits until all asynchronous loading operations finished, and calls
+        their done callbacks. Callbacks might start new loading operations,
+        which are waited for as well. """
+        while cls._pending_futures:
+            with timed_loading_operation(
+                    "{} asynchronous operations".format(len(cls._pending_futures))):
+                for future in cls._pending_futures:
+                    future.wait()
+            cls.process_finished_loads()
+
     @classmethod
     def load_font(cls, filename):
         """ Loads a font from disk """
@@ -97,6 +251,8 @@ class RPLoader(RPObject):
     def load_shader(cls, *args):
         """ Loads a shader from disk """
         with timed_loading_operation(args):
+            if cls.SHADER_CACHE is not None:
+                return cls.SHADER_CACHE.load(*args)
             if len(args) == 1:
                 return Shader.load_compute(Shader.SL_GLSL, args[0])
             return Shader.load(Shader.SL_GLSL, *args)
@@ -111,38 +267,64 @@ class RPLoader(RPObject):
     def load_sliced_3d_texture(cls, fname, tile_size_x, tile_size_y=None, num_tiles=None):
         """ Loads a texture from the given filename and dimensions. If only
         one dimensions is specified, the other dimensions are assumed to be
-        equal. This internally loads the texture into ram, splits it into smaller
-        sub-images, and then calls the load_3d_texture from the Panda loader """
-
-        tempfile_name = "/$$slice_loader_temp-" + str(time.time()) + "/"
+        equal. This internally loads the texture into ram and copies the
+        slices into the ram image of a new 3D texture. The result is cached
+        as txo file, so subsequent loads only have to read that file. """
         tile_size_y = tile_size_x if tile_size_y is None else tile_size_y
         num_tiles = tile_size_x if num_tiles is None else num_tiles
 
-        # Load sliced image from disk
-        tex_handle = cls.load_texture(fname)
-        source = PNMImage()
-        tex_handle.store(source)
-        width = source.get_x_size()
-
-        # Find slice properties
-        num_cols = width // tile_size_x
-        temp_img = PNMImage(
-            tile_size_x, tile_size_y, source.get_num_channels(), source.get_maxval())
+        cache_file = cls._get_sliced_3d_cache_file(fname, tile_size_x, tile_size_y, num_tiles)
+        if cache_file and VirtualFileSystem.get_global_ptr().exists(cache_file):
+            return cls.load_3d_texture(cache_file)
 
-        # Construct a ramdisk to write the files to
-        vfs = VirtualFileSystem.get_global_ptr()
-        ramdisk = VirtualFileMountRamdisk()
-        vfs.mount(ramdisk, tempfile_name, 0)
+        with timed_loading_operation(fname):
+            texture_handle = cls._slice_3d_texture(
+                cls.load_texture(fname), tile_size_x, tile_size_y, num_tiles)
+            texture_handle.set_name(fname)
+            if cache_file and not texture_handle.write(cache_file):
+                cls.global_warn("RPLoader", "Failed to write texture cache", cache_file)
+        return texture_handle
 
-        # Extract all slices and write them to the virtual disk
+    @staticmethod
+    def _get_sliced_3d_cache_file(fname, *dimensions):
+        """ Returns the path of the txo file caching the 3D texture of the given
+        sliced texture, keyed by its path, timestamp and the slice dimensions.
+        Returns None if the source file could not be found. """
+        vfile = VirtualFileSystem.get_global_ptr().get_file(Filename(fname), True)
+        if not vfile:
+            return None
+        key = "{}-{}-{}".format(
+            vfile.get_filename().get_fullpath(), vfile.get_timestamp(), dimensions)
+        return "/$$rpcache/$$sliced3d-" + hashlib.md5(key.encode("utf-8")).hexdigest() + ".txo"
+
+    @staticmethod
+    def _slice_3d_texture(source, tile_size_x, tile_size_y, num_tiles):
+        """ Constructs a 3D texture from a 2D texture containing the slices as
+        tiles, ordered from left to right and top to bottom. """
+        width, height = source.get_x_size(), source.get_y_size()
+        num_cols = width // tile_size_x
+        pixel_size = source.get_num_components() * source.get_component_width()
+        src_data = memoryview(source.get_uncompressed_ram_image())
+        dest_data = bytearray(tile_size_x * tile_size_y * num_tiles * pixel_size)
+
+        # The ram image stores the rows bottom to top, so the tiles in the
+        # top row of the image are located at the end of the ram image
+        row_size = tile_size_x * pixel_size
+        src_stride = width * pixel_size
+        dest_offset = 0
         for z_slice in range(num_tiles):
             slice_x = (z_slice % num_cols) * tile_size_x
-            slice_y = (z_slice // num_cols) * tile_size_y
-            temp_img.copy_sub_image(source, 0, 0, slice_x, slice_y, tile_size_x, tile_size_y)
-            temp_img.write(tempfile_name + str(z_slice) + ".png")
-
-        # Load the de-sliced texture from the ramdisk
-        texture_handle = cls.load_3d_texture(tempfile_name + "/#.png")
-        vfs.unmount(ramdisk)
-
+            slice_y = height - (z_slice // num_cols + 1) * tile_size_y
+            src_offset = slice_y * src_stride + slice_x * pixel_size
+            for _ in range(tile_size_y):
+                dest_data[dest_offset:dest_offset + row_size] = \
+                    src_data[src_offset:src_offset + row_size]
+                src_offset += src_stride
+                dest_offset += row_size
+
+        texture_handle = Texture()
+        texture_handle.setup_3d_texture(
+            tile_size_x, tile_size_y, num_tiles, source.get_component_type(),
+            source.get_format())
+        texture_handle.set_ram_image(bytes(dest_data))
         return texture_handle
@@ -27,6 +27,8 @@ THE SOFTWARE.
 import os
 import atexit
 
+from rplibs.yaml import set_yaml_cache_dir
+
 from panda3d.core import Filename, VirtualFileSystem, get_model_path
 from panda3d.core import VirtualFileMountRamdisk
 from direct.stdpy.file import join, isdir, isfile
@@ -50,6 +52,7 @@ class MountManager(RPObject):
         self._lock_file = "instance.pid"
         self._model_paths = []
         self._write_path = None
+        self._cache_path = join(self._base_path, "cache")
         self._mounted = False
         self._do_cleanup = True
         self._config_dir = None
@@ -81,6 +84,26 @@ class MountManager(RPObject):
             self._write_path = Filename.from_os_specific(pth).get_fullpath()
             self._lock_file = join(self._write_path, "instance.pid")
 
+    @property
+    def cache_path(self):
+        """ Returns the directory where persistent cache files are stored. By
+        default this is the cache/ directory in the pipeline root directory. """
+        return self._cache_path
+
+    @cache_path.setter
+    def cache_path(self, pth):
+        """ Sets the directory where the pipeline stores files which should
+        persist between runs, like generated effect shaders. Unlike the write
+        path, this directory does not get cleaned up, so it speeds up the
+        following starts. Generated effect shaders which are no longer used
+        get removed whenever the shaders are reloaded. To clear the cache
+        manually, delete the directory while the pipeline is not running.
+        Set the path to None to keep the cache in memory only. """
+        if pth is None:
+            self._cache_path = None
+        else:
+            self._cache_path = Filename.from_os_specific(pth).get_fullpath()
+
     @property
     def base_path(self):
         """ Returns the base path of the pipeline. This returns the path previously
@@ -266,6 +289,10 @@ class MountManager(RPObject):
             + shader_auto_config
             + ...
 
+        /$$rpcache/ (Persistent cache, either ramdisk or user specified)
+            + $$effect-*.glsl
+            + ...
+
         /$$rpshader/ (Link to /$$rp/rpcore/shader)
 
          """
@@ -307,10 +334,34 @@ class MountManager(RPObject):
             self.debug("Mounting", self._write_path, "as /$$rptemp")
             vfs.mount(convert_path(self._write_path), '/$$rptemp', 0)
 
+        self._mount_cache_path()
+
         get_model_path().prepend_directory("/$$rp")
         get_model_path().prepend_directory("/$$rp/shader")
         get_model_path().prepend_directory("/$$rptemp")
 
+    def _mount_cache_path(self):
+        """ Mounts the persistent cache directory as /$$rpcache. If no cache
+        path was specified, or it could not be created, a ramdisk is used
+        instead, so the cache only lives as long as the application. """
+        vfs = VirtualFileSystem.get_global_ptr()
+        if self._cache_path is not None and not isdir(self._cache_path):
+            try:
+                os.makedirs(Filename(self._cache_path).to_os_specific())
+            except (IOError, OSError) as msg:
+                self.warn("Failed to create cache path, using a ramdisk instead:", msg)
+                self._cache_path = None
+
+        if self._cache_path is None:
+            self.debug("Mounting ramdisk as /$$rpcache")
+            vfs.mount(VirtualFileMountRamdisk(), "/$$rpcache", 0)
+        else:
+            self.debug("Mounting", self._cache_path, "as /$$rpcache")
+            vfs.mount(Filename(self._cache_path), "/$$rpcache", 0)
+
+        # Only cache parsed yaml files on disk in the cache mounted here
+        set_yaml_cache_dir("/$$rpcache")
+
     def unmount(self):
         """ Unmounts the VFS """
         raise NotImplementedError("TODO")
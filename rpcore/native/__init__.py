@@ -61,6 +61,7 @@ classes_to_import = [
     "PSSMCameraRig",
     "IESDataset",
     "TagStateManager",
+    "SceneDataBuilder",
 ]
 
 # Classes which should get imported and renamed
@@ -85,11 +86,18 @@ else:
 
 # Import all classes
 for v in classes_to_import + list(classes_to_import_and_rename.keys()):
+    v_name = classes_to_import_and_rename[v] if v in classes_to_import_and_rename else v
     if hasattr(_native_module, v):
-        v_name = classes_to_import_and_rename[v] if v in classes_to_import_and_rename else v
         globals()[v_name] = getattr(_native_module, v)
     else:
-        print("ERROR: could not import class", v, "from", _native_module.__name__)
+        # Native modules built from an older source might miss newer classes,
+        # fall back to the python implementation for those
+        from rpcore import pynative  # pylint: disable=wrong-import-position
+        if _native_module is not pynative and hasattr(pynative, v):
+            RPObject.global_warn("CORE", "Using python implementation of", v)
+            globals()[v_name] = getattr(pynative, v)
+        else:
+            print("ERROR: could not import class", v, "from", _native_module.__name__)
 
 # Don't export all variables, only the required ones
 __all__ = classes_to_import + list(classes_to_import_and_rename.values()) + ["NATIVE_CXX_LOADED"]
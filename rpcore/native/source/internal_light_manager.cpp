@@ -40,6 +40,7 @@ NotifyCategoryDef(lightmgr, "");
  */
 InternalLightManager::InternalLightManager() {
     _shadow_update_distance = 100.0f;
+    _max_light_updates = 0;
     _cmd_list = NULL;
     _shadow_manager = NULL;
 }
@@ -302,16 +303,25 @@ void InternalLightManager::gpu_update_source(ShadowSource* source) {
  * @brief Internal method to update all lights
  * @details This is called by the main update method, and iterates over the list
  *   of lights. If a light is marked as dirty, it will recieve an update of its
- *   data and its shadow sources.
+ *   data and its shadow sources. At most InternalLightManager::set_max_light_updates
+ *   lights are processed per call.
  */
 void InternalLightManager::update_lights() {
+    size_t num_updates = 0;
     for (auto iter = _lights.begin(); iter != _lights.end(); ++iter) {
         RPLight* light = *iter;
         if (light && light->get_needs_update()) {
+
+            // Lights which exceed the per-frame budget stay dirty, and get
+            // processed in one of the next frames.
+            if (_max_light_updates > 0 && num_updates >= _max_light_updates) {
+                break;
+            }
             if (light->get_casts_shadows()) {
                 light->update_shadow_sources();
             }
             gpu_update_light(light);
+            ++num_updates;
         }
     }
 }
@@ -337,7 +347,7 @@ bool InternalLightManager::compare_shadow_sources(const ShadowSource* a, const S
 
     // Compare sources based on their distance to the camera
     float dist_a = (_camera_pos - a->get_bounds().get_center()).length_squared();
-    float dist_b = (_camera_pos - a->get_bounds().get_center()).length_squared();
+    float dist_b = (_camera_pos - b->get_bounds().get_center()).length_squared();
 
     // XXX: Should also compare based on source size, so that huge sources recieve
     // more updates
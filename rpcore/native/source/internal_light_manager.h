@@ -59,6 +59,7 @@ class InternalLightManager {
         void update();
         inline void set_camera_pos(const LPoint3f& pos);
         inline void set_shadow_update_distance(float dist);
+        inline void set_max_light_updates(size_t max_updates);
 
         inline int get_max_light_index() const;
         MAKE_PROPERTY(max_light_index, get_max_light_index);
@@ -96,6 +97,7 @@ class InternalLightManager {
 
         LPoint3f _camera_pos;
         float _shadow_update_distance;
+        size_t _max_light_updates;
 
 };
 
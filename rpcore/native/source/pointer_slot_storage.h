@@ -133,7 +133,7 @@ public:
         }
 
         // Try to find consecutive slots otherwise
-        for (size_t i = 0; i < SIZE; ++i) {
+        for (size_t i = 0; i + num_consecutive <= SIZE; ++i) {
             bool any_taken = false;
             for (size_t k = 0; !any_taken && k < num_consecutive; ++k) {
                 any_taken = _data[i + k] != NULL;
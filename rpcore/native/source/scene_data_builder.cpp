@@ -0,0 +1,121 @@
+/**
+ *
+ * RenderPipeline
+ *
+ * Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+ *
+ * Permission is hereby granted, free of charge, to any person obtaining a copy
+ * of this software and associated documentation files (the "Software"), to deal
+ * in the Software without restriction, including without limitation the rights
+ * to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ * copies of the Software, and to permit persons to whom the Software is
+ * furnished to do so, subject to the following conditions:
+ *
+ * The above copyright notice and this permission notice shall be included in
+ * all copies or substantial portions of the Software.
+ *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ * AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ * LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ * OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+ * THE SOFTWARE.
+ *
+ */
+
+#include "scene_data_builder.h"
+
+
+/**
+ * @brief Constructs a new SceneDataBuilder
+ * @details This constructs a new builder. All matrices are initialized to
+ *   the identity matrix, until update() gets called the first time.
+ */
+SceneDataBuilder::SceneDataBuilder() :
+    _has_input(false),
+    _history_pending(false),
+    _view_mat(LMatrix4f::ident_mat()),
+    _proj_mat(LMatrix4f::ident_mat()),
+    _view_mat_z_up(LMatrix4f::ident_mat()),
+    _view_mat_billboard(LMatrix4f::ident_mat()),
+    _proj_mat_z_up(LMatrix4f::ident_mat()),
+    _inv_proj_mat_z_up(LMatrix4f::ident_mat()),
+    _view_proj_mat_no_jitter(LMatrix4f::ident_mat()),
+    _last_view_proj_mat_no_jitter(LMatrix4f::ident_mat()),
+    _last_inv_view_proj_mat_no_jitter(LMatrix4f::ident_mat()),
+    _ws_frustum_directions(LMatrix4f::ident_mat()),
+    _vs_frustum_directions(LMatrix4f::ident_mat()) {
+}
+
+/**
+ * @brief Updates all matrices
+ * @details This computes all derived matrices from the given view and
+ *   projection matrix of the main camera. If both matrices did not change
+ *   since the last call, nothing is recomputed. Only the matrices of the
+ *   previous frame get updated once, since they now equal the current ones.
+ *
+ * @param view_mat Transform from world space to camera space
+ * @param proj_mat Projection matrix of the camera lens
+ *
+ * @return true if any of the matrices changed, false otherwise
+ */
+bool SceneDataBuilder::update(const LMatrix4f& view_mat, const LMatrix4f& proj_mat) {
+    if (_has_input && view_mat == _view_mat && proj_mat == _proj_mat) {
+        if (!_history_pending) {
+            return false;
+        }
+        store_history();
+        _history_pending = false;
+        return true;
+    }
+
+    store_history();
+    _history_pending = true;
+    _has_input = true;
+    _view_mat = view_mat;
+    _proj_mat = proj_mat;
+
+    const LMatrix4f& zup_conversion = LMatrix4f::convert_mat(CS_zup_right, CS_yup_right);
+    const LMatrix4f& yup_conversion = LMatrix4f::convert_mat(CS_yup_right, CS_zup_right);
+
+    _view_mat_z_up = view_mat * zup_conversion;
+
+    // View matrix without the camera rotation
+    _view_mat_billboard = view_mat;
+    _view_mat_billboard.set_row(0, LVecBase3f(1, 0, 0));
+    _view_mat_billboard.set_row(1, LVecBase3f(0, 1, 0));
+    _view_mat_billboard.set_row(2, LVecBase3f(0, 0, 1));
+
+    _proj_mat_z_up = yup_conversion * proj_mat;
+    _inv_proj_mat_z_up.invert_from(_proj_mat_z_up);
+
+    // Remove the jitter from the projection matrix
+    LMatrix4f proj_mat_no_jitter = proj_mat;
+    proj_mat_no_jitter.set_cell(1, 0, 0.0);
+    proj_mat_no_jitter.set_cell(1, 1, 0.0);
+    _view_proj_mat_no_jitter = view_mat * proj_mat_no_jitter;
+
+    // Compute the frustum corner directions in the order BL, BR, TL, TR
+    LMatrix4f inv_proj_mat = invert(proj_mat);
+    LMatrix4f inv_view_mat = invert(view_mat);
+    static const float corners[4][2] = { {-1, -1}, {1, -1}, {-1, 1}, {1, 1} };
+    for (int i = 0; i < 4; ++i) {
+        LVecBase4f result = inv_proj_mat.xform(LVecBase4f(corners[i][0], corners[i][1], 1, 1));
+        LVecBase3f vs_dir = zup_conversion.xform(result).get_xyz().normalized();
+        _vs_frustum_directions.set_row(i, LVecBase4f(vs_dir, 1));
+        _ws_frustum_directions.set_row(i, inv_view_mat.xform(LVecBase4f(result.get_xyz(), 0)));
+    }
+    return true;
+}
+
+/**
+ * @brief Stores the current view projection matrix as previous one
+ * @details This is called before the matrices get recomputed, and stores
+ *   the current view projection matrix (and its inverse) as the one of the
+ *   previous frame.
+ */
+void SceneDataBuilder::store_history() {
+    _last_view_proj_mat_no_jitter = _view_proj_mat_no_jitter;
+    _last_inv_view_proj_mat_no_jitter.invert_from(_view_proj_mat_no_jitter);
+}
@@ -0,0 +1,83 @@
+/**
+ *
+ * RenderPipeline
+ *
+ * Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+ *
+ * Permission is hereby granted, free of charge, to any person obtaining a copy
+ * of this software and associated documentation files (the "Software"), to deal
+ * in the Software without restriction, including without limitation the rights
+ * to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+ * copies of the Software, and to permit persons to whom the Software is
+ * furnished to do so, subject to the following conditions:
+ *
+ * The above copyright notice and this permission notice shall be included in
+ * all copies or substantial portions of the Software.
+ *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+ * AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ * LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+ * OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+ * THE SOFTWARE.
+ *
+ */
+
+#ifndef RP_SCENE_DATA_BUILDER_H
+#define RP_SCENE_DATA_BUILDER_H
+
+#include "pandabase.h"
+#include "luse.h"
+#include "coordinateSystem.h"
+
+/**
+ * @brief Computes the camera dependent matrices of the main scene data.
+ * @details This class computes all matrices and vectors which are derived
+ *   from the main camera and passed to the shaders as MainSceneData, like
+ *   the view projection matrix, the inverse projection matrix and the frustum
+ *   directions, in a single call.
+ *
+ *   The matrices are only recomputed when the view or projection matrix
+ *   changed. The matrices of the previous frame are tracked as well, so when
+ *   the camera stays still, update() does no work at all after one frame.
+ */
+class SceneDataBuilder {
+
+    PUBLISHED:
+        SceneDataBuilder();
+
+        bool update(const LMatrix4f& view_mat, const LMatrix4f& proj_mat);
+
+        inline const LMatrix4f& get_view_mat_z_up() const;
+        inline const LMatrix4f& get_view_mat_billboard() const;
+        inline const LMatrix4f& get_proj_mat_z_up() const;
+        inline const LMatrix4f& get_inv_proj_mat_z_up() const;
+        inline const LMatrix4f& get_view_proj_mat_no_jitter() const;
+        inline const LMatrix4f& get_last_view_proj_mat_no_jitter() const;
+        inline const LMatrix4f& get_last_inv_view_proj_mat_no_jitter() const;
+        inline const LMatrix4f& get_ws_frustum_directions() const;
+        inline const LMatrix4f& get_vs_frustum_directions() const;
+
+    protected:
+        void store_history();
+
+        bool _has_input;
+        bool _history_pending;
+        LMatrix4f _view_mat;
+        LMatrix4f _proj_mat;
+
+        LMatrix4f _view_mat_z_up;
+        LMatrix4f _view_mat_billboard;
+        LMatrix4f _proj_mat_z_up;
+        LMatrix4f _inv_proj_mat_z_up;
+        LMatrix4f _view_proj_mat_no_jitter;
+        LMatrix4f _last_view_proj_mat_no_jitter;
+        LMatrix4f _last_inv_view_proj_mat_no_jitter;
+        LMatrix4f _ws_frustum_directions;
+        LMatrix4f _vs_frustum_directions;
+};
+
+#include "scene_data_builder.I"
+
+#endif // RP_SCENE_DATA_BUILDER_H
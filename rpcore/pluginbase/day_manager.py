@@ -31,7 +31,7 @@ from direct.stdpy.file import open
 
 from rpcore.rpobject import RPObject
 from rpcore.util.shader_input_blocks import GroupedInputBlock
-from rpcore.pluginbase.day_setting_types import ColorType
+from rpcore.util.smooth_connected_curve import SmoothConnectedCurve
 
 
 class DayTimeManager(RPObject):
@@ -45,6 +45,7 @@ class DayTimeManager(RPObject):
         self._input_ubo = GroupedInputBlock("TimeOfDay")
         self._time = 0.5
         self._setting_handles = {}
+        self._last_update = None
 
     @property
     def time(self):
@@ -86,14 +87,15 @@ class DayTimeManager(RPObject):
         shader_code = self._input_ubo.generate_shader_code()
         with open("/$$rptemp/$$daytime_config.inc.glsl", "w") as handle:
             handle.write(shader_code)
+        self._pipeline.shader_deps.invalidate("/$$rptemp/$$daytime_config.inc.glsl")
 
     def update(self):
-        """ Internal update method which updates all day time settings """
+        """ Internal update method which updates all day time settings. The
+        values are read from the baked tables of the settings, and only updated
+        if either the time or any of the curves changed. """
+        update_key = (self._time, SmoothConnectedCurve.num_builds)
+        if update_key == self._last_update:
+            return
+        self._last_update = update_key
         for setting_id, handle in iteritems(self._setting_handles):
-            # XXX: Find a better interface for this. Without this fix, colors
-            # are in the range 0 .. 255 in the shader.
-            if isinstance(handle, ColorType):
-                value = handle.get_value_at(self._time)
-            else:
-                value = handle.get_scaled_value_at(self._time)
-            self._input_ubo.update_input(setting_id, value)
+            self._input_ubo.update_input(setting_id, handle.get_baked_value_at(self._time))
@@ -50,11 +50,16 @@ def make_daysetting_from_data(data):
 class BaseType(RPObject):
     """ Base setting type for all setting types """
 
+    # Amount of samples of the baked value table, see get_baked_value_at
+    BAKED_SAMPLES = 1024
+
     def __init__(self, data):
         self.type = data.pop("type")
         self.label = data.pop("label").strip()
         self.description = data.pop("description").strip()
         self.curves = []
+        self._baked_values = None
+        self._baked_versions = None
 
         RPObject.__init__(self, "dsetting:{}".format(self.label))
 
@@ -62,7 +67,7 @@ class BaseType(RPObject):
         """ Returns the unscaled value at the given day time offset """
         if len(self.curves) == 1:
             return self.curves[0].get_value(offset)
-        return tuple(curve.get_value(offset) for curve in self.curves)
+        return tuple(SmoothConnectedCurve.get_values(self.curves, offset))
 
     def get_scaled_value_at(self, offset):
         """ Returns the scaled value at a given day time offset """
@@ -72,6 +77,39 @@ class BaseType(RPObject):
         """ Returns the scaled value from a given normalized value """
         raise NotImplementedError()
 
+    def get_shader_value_at(self, offset):
+        """ Returns the value which gets passed to the shaders at a given
+        day time offset """
+        return self.get_scaled_value_at(offset)
+
+    def get_baked_value_at(self, offset):
+        """ Returns the same value as get_shader_value_at, but linearly
+        interpolated from a table of precomputed values. The table is baked
+        again as soon as any of the curves changed. Like the curves, the
+        offset gets clamped to the range 0 .. 1. """
+        versions = tuple(curve.version for curve in self.curves)
+        if versions != self._baked_versions:
+            self._bake_values()
+            self._baked_versions = versions
+
+        position = max(0.0, min(1.0, offset)) * self.BAKED_SAMPLES
+        index = min(int(position), self.BAKED_SAMPLES - 1)
+        weight = position - index
+        values = tuple(table[index] + (table[index + 1] - table[index]) * weight
+                       for table in self._baked_values)
+        return values[0] if len(values) == 1 else values
+
+    def _bake_values(self):
+        """ Internal method to bake the table used by get_baked_value_at. The
+        table stores one list per component, and contains an additional sample
+        at the end to be able to interpolate up to an offset of 1.0 """
+        samples = [self.get_shader_value_at(i / self.BAKED_SAMPLES)
+                   for i in range(self.BAKED_SAMPLES + 1)]
+        if len(self.curves) == 1:
+            self._baked_values = (samples,)
+        else:
+            self._baked_values = tuple(list(component) for component in zip(*samples))
+
     def set_control_points(self, control_points):
         """ Sets the control points on the curves. """
         for curve_index, points in enumerate(control_points):
@@ -155,5 +193,10 @@ class ColorType(BaseType):
     def get_scaled_value(self, value):
         return tuple(i * 255.0 for i in value)
 
+    def get_shader_value_at(self, offset):
+        # XXX: Find a better interface for this. Without this fix, colors
+        # are in the range 0 .. 255 in the shader.
+        return self.get_value_at(offset)
+
     def get_linear_value(self, scaled_value):
         return tuple(i / 255.0 for i in scaled_value)
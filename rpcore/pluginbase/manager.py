@@ -30,8 +30,10 @@ import collections
 from rplibs.six import iteritems, itervalues
 from rplibs.yaml import load_yaml_file
 
+from panda3d.core import PStatClient, PStatCollector
 from direct.stdpy.file import listdir, isdir, join, open
 
+from rpcore.globals import Globals
 from rpcore.rpobject import RPObject
 from rpcore.native import NATIVE_CXX_LOADED
 from rpcore.pluginbase.setting_types import make_setting_from_data
@@ -57,6 +59,20 @@ class PluginManager(RPObject):
         # Used by the plugin configurator and to only load the required data
         self.requires_daytime_settings = True
 
+        # StartupProfiler to record plugin loading and hooks with, set by the
+        # pipeline while it is starting up
+        self.profiler = None
+
+        # Bound hook methods of all enabled plugins, stored per hook name as a
+        # list of (plugin_id, method, pstat_collector) tuples. Built lazily and
+        # cleared whenever the set of enabled plugins changes.
+        self._hook_handlers = {}
+
+        # When enabled, the runtime of each hook gets accumulated per plugin
+        # into hook_timings, which maps plugin_id -> hook_name -> seconds
+        self.hook_timing_enabled = False
+        self.hook_timings = {}
+
     def load(self):
         """ Loads all plugins and their settings, and also constructs instances
         of the main plugin classes for all enabled plugins """
@@ -69,11 +85,16 @@ class PluginManager(RPObject):
 
         self.debug("Creating plugin instances ..")
         for plugin_id in self.settings:
-            handle = self._load_plugin(plugin_id)
+            if self.profiler:
+                with self.profiler.phase("Load plugin " + plugin_id):
+                    handle = self._load_plugin(plugin_id)
+            else:
+                handle = self._load_plugin(plugin_id)
             if handle:
                 self.instances[plugin_id] = handle
             else:
                 self.disable_plugin(plugin_id)
+        self._hook_handlers = {}
 
     def disable_plugin(self, plugin_id):
         """ Disables a plugin, given its plugin_id. This will remove it from
@@ -81,6 +102,7 @@ class PluginManager(RPObject):
         self.warn("Disabling", plugin_id)
         if plugin_id in self.enabled_plugins:
             self.enabled_plugins.remove(plugin_id)
+        self._hook_handlers = {}
         for instance in list(self.instances.values()):
             if plugin_id in instance.required_plugins:
                 self.disable_plugin(instance.plugin_id)
@@ -94,6 +116,8 @@ class PluginManager(RPObject):
         self.settings = {}
         self.day_settings = {}
         self.enabled_plugins = set()
+        self._hook_handlers = {}
+        self.hook_timings = {}
 
     def update(self):
         """ Main update method """
@@ -161,14 +185,52 @@ class PluginManager(RPObject):
                     continue
                 self.day_settings[plugin_id][setting_id].set_control_points(control_points)
 
+    def _get_hook_handlers(self, hook_name):
+        """ Returns the list of (plugin_id, method, pstat_collector) tuples of
+        all enabled plugins which implement the given hook, building it if
+        necessary """
+        handlers = self._hook_handlers.get(hook_name)
+        if handlers is None:
+            hook_method = "on_" + hook_name
+            handlers = []
+            for plugin_id in self.enabled_plugins:
+                method = getattr(self.instances[plugin_id], hook_method, None)
+                if method is not None:
+                    collector = PStatCollector("RP_Plugins:{}:{}".format(plugin_id, hook_method))
+                    handlers.append((plugin_id, method, collector))
+            self._hook_handlers[hook_name] = handlers
+        return handlers
+
     def trigger_hook(self, hook_name):
         """ Triggers a given hook on all plugins, effectively calling all
         bound callbacks """
-        hook_method = "on_{}".format(hook_name)
-        for plugin_id in self.enabled_plugins:
-            plugin_handle = self.instances[plugin_id]
-            if hasattr(plugin_handle, hook_method):
-                getattr(plugin_handle, hook_method)()
+        handlers = self._get_hook_handlers(hook_name)
+        if self.profiler:
+            for plugin_id, method, _ in handlers:
+                with self.profiler.phase("{}.on_{}".format(plugin_id, hook_name)):
+                    method()
+            return
+
+        timed = self.hook_timing_enabled
+        if not timed and not PStatClient.is_connected():
+            for _, method, _ in handlers:
+                method()
+            return
+
+        get_time = Globals.clock.get_real_time
+        for plugin_id, method, collector in handlers:
+            collector.start()
+            start = get_time()
+            method()
+            duration = get_time() - start
+            collector.stop()
+            if timed:
+                timings = self.hook_timings.setdefault(plugin_id, {})
+                timings[hook_name] = timings.get(hook_name, 0.0) + duration
+
+    def reset_hook_timings(self):
+        """ Clears the accumulated hook timings """
+        self.hook_timings = {}
 
     def is_plugin_enabled(self, plugin_id):
         """ Returns whether a plugin is currently enabled and loaded """
@@ -251,6 +313,7 @@ class PluginManager(RPObject):
             self.enabled_plugins.add(plugin_id)
         else:
             self.enabled_plugins.remove(plugin_id)
+        self._hook_handlers = {}
 
     def reset_plugin_settings(self, plugin_id):
         """ Resets all settings of a given plugin """
@@ -277,6 +340,11 @@ class PluginManager(RPObject):
                 getattr(*update_method)()
 
         if setting.shader_runtime:
+            # Only reload the shaders which actually read a changed define
+            defines = self._pipeline.stage_mgr.defines
+            old_defines = dict(defines)
             self.init_defines()
-            self._pipeline.stage_mgr.write_autoconfig()
-            self.instances[plugin_id].reload_shaders()
+            changed = set(k for k in defines if old_defines.get(k) != defines[k])
+            if changed:
+                self._pipeline.stage_mgr.write_autoconfig()
+                self._pipeline.reload_shaders_using_defines(changed)
@@ -36,3 +36,4 @@ from rpcore.pynative.rp_point_light import RPPointLight
 from rpcore.pynative.shadow_manager import ShadowManager
 from rpcore.pynative.tag_state_manager import TagStateManager
 from rpcore.pynative.pssm_camera_rig import PSSMCameraRig
+from rpcore.pynative.scene_data_builder import SceneDataBuilder
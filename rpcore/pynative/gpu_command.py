@@ -27,7 +27,11 @@ THE SOFTWARE.
 from __future__ import print_function
 from rplibs.six.moves import range  # pylint: disable=import-error
 
-import struct
+from array import array
+
+GPU_COMMAND_ENTRIES = 32
+
+_EMPTY_DATA = array("f", [0.0] * GPU_COMMAND_ENTRIES)
 
 
 class GPUCommand(object):
@@ -44,14 +48,14 @@ class GPUCommand(object):
     def __init__(self, command_type):
         self._command_type = command_type
         self._current_index = 0
-        self._data = [0.0] * 32
+        self._data = array("f", _EMPTY_DATA)
         self.push_int(command_type)
 
     def push_int(self, value):
         self.push_float(float(value))
 
     def push_float(self, value):
-        if self._current_index >= 32:
+        if self._current_index >= GPU_COMMAND_ENTRIES:
             print("GPUCommand: out of bounds!")
             return
         self._data[self._current_index] = float(value)
@@ -76,9 +80,12 @@ class GPUCommand(object):
         return False
 
     def write_to(self, dest, command_index):
-        data = struct.pack("f" * 32, *self._data)
-        offset = command_index * 32 * 4
-        dest.set_subdata(offset, 32 * 4, data)
+        offset = command_index * GPU_COMMAND_ENTRIES * 4
+        dest.set_subdata(offset, GPU_COMMAND_ENTRIES * 4, self._data.tobytes())
+
+    def write_to_buffer(self, buffer, command_index):
+        offset = command_index * GPU_COMMAND_ENTRIES
+        buffer[offset:offset + GPU_COMMAND_ENTRIES] = self._data
 
     def write(self, out=None):  # pylint: disable=unused-argument
         print("GPUCommand(type=", self._command_type, "size=", self._current_index, ")")
@@ -24,6 +24,13 @@ THE SOFTWARE.
 
 """
 
+from rplibs.six.moves import range  # pylint: disable=import-error
+
+from array import array
+from collections import deque
+
+from rpcore.pynative.gpu_command import GPU_COMMAND_ENTRIES
+
 
 class GPUCommandList(object):
 
@@ -31,7 +38,8 @@ class GPUCommandList(object):
     This is just the python implementation, which does not contain documentation! """
 
     def __init__(self):
-        self._commands = []
+        self._commands = deque()
+        self._buffer = array("f")
 
     def add_command(self, cmd):
         self._commands.append(cmd)
@@ -41,10 +49,22 @@ class GPUCommandList(object):
         return len(self._commands)
 
     def write_commands_to(self, dest, limit=32):
-        num_commands_written = 0
+        num_commands = min(limit, len(self._commands))
+        if num_commands == 0:
+            return 0
+
+        if len(self._buffer) < limit * GPU_COMMAND_ENTRIES:
+            self._buffer = array("f", [0.0]) * (limit * GPU_COMMAND_ENTRIES)
+
+        for i in range(num_commands):
+            self._commands.popleft().write_to_buffer(self._buffer, i)
 
-        while num_commands_written < limit and self._commands:
-            self._commands.pop(0).write_to(dest, num_commands_written)
-            num_commands_written += 1
+        self._copy_buffer_to(dest, num_commands * GPU_COMMAND_ENTRIES * 4)
+        return num_commands
 
-        return num_commands_written
+    def _copy_buffer_to(self, dest, num_bytes):
+        source = memoryview(self._buffer).cast("B")[:num_bytes]
+        try:
+            memoryview(dest).cast("B")[:num_bytes] = source
+        except TypeError:
+            dest.set_subdata(0, num_bytes, source.tobytes())
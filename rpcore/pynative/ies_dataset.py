@@ -27,13 +27,22 @@ THE SOFTWARE.
 from rplibs.six.moves import range  # pylint: disable=import-error
 
 import math
-from panda3d.core import PNMImage
+from array import array
+from bisect import bisect_right
+import sys
+
+from panda3d.core import PNMImage, StringStream
 
 
 class IESDataset(object):
 
     """ Please refer to the native C++ implementation for docstrings and comments.
-    This is just the python implementation, which does not contain documentation! """
+    This is just the python implementation, which does not contain documentation!
+
+    Unlike the C++ implementation, the texture is not generated per pixel.
+    The candela values are interpolated vertically once per horizontal angle,
+    and each row of the texture then only blends two of those columns. The
+    result is written as one 16 bit PGM image instead of setting each texel. """
 
     def __init__(self):
         self._vertical_angles = None
@@ -53,45 +62,92 @@ class IESDataset(object):
         resolution_vertical = dest_tex.get_y_size()
         resolution_horizontal = dest_tex.get_x_size()
 
-        dest = PNMImage(resolution_vertical, resolution_horizontal, 1, 65535)
-
-        for vert in range(resolution_vertical):
-            for horiz in range(resolution_horizontal):
-                vert_angle = vert / (resolution_vertical - 1.0)
-                vert_angle = math.cos(vert_angle * math.pi) * 90.0 + 90.0
-                horiz_angle = horiz / (resolution_horizontal - 1.0) * 360.0
-                candela = self.get_candela_value(vert_angle, horiz_angle)
-                dest.set_xel(vert, horiz, candela)
-
+        vert_angles = [math.cos(vert / (resolution_vertical - 1.0) * math.pi) * 90.0 + 90.0
+                       for vert in range(resolution_vertical)]
+        columns = [[min(65535.0, max(0.0, value * 65535.0)) for value in
+                    self.get_vertical_candela_values(horizontal_angle_idx, vert_angles)]
+                   for horizontal_angle_idx in range(len(self._horizontal_angles))]
+
+        data = array("H")
+        row_cache = {}
+        for horiz in range(resolution_horizontal):
+            horiz_angle = horiz / (resolution_horizontal - 1.0) * 360.0
+            key = self.get_horizontal_interpolation(horiz_angle)
+            if key not in row_cache:
+                row_cache[key] = self.interpolate_row(columns, *key)
+            data.extend(row_cache[key])
+
+        # PGM stores 16 bit values as big endian
+        if sys.byteorder == "little":
+            data.byteswap()
+
+        header = "P5\n{} {}\n65535\n".format(resolution_vertical, resolution_horizontal)
+        dest = PNMImage()
+        dest.read(StringStream(header.encode("ascii") + data.tobytes()), "dataset.pgm")
         dest_tex.load(dest, layer_index, 0)
 
-    def get_candela_value(self, vertical_angle, horizontal_angle):  # noqa # pylint: disable=unused-argument
-        # NOTICE: Since python is slower, we always only assume a dataset without
-        # horizontal angles. This still produces convincing results, but does
-        # generate much faster.
-        return self.get_vertical_candela_value(0, vertical_angle)
+    def interpolate_row(self, columns, horizontal_angle_idx, lerp):
+        if horizontal_angle_idx < 0:
+            return array("H", [0]) * len(columns[0])
+        curr = columns[horizontal_angle_idx]
+        if lerp >= 1.0 or horizontal_angle_idx == 0:
+            return array("H", [int(c + 0.5) for c in curr])
+        prev = columns[horizontal_angle_idx - 1]
+        inv_lerp = 1.0 - lerp
+        return array("H", [int(c * lerp + p * inv_lerp + 0.5) for c, p in zip(curr, prev)])
+
+    def get_horizontal_interpolation(self, horizontal_angle):
+        if len(self._horizontal_angles) == 1:
+            return 0, 1.0
+
+        max_angle = self._horizontal_angles[len(self._horizontal_angles) - 1]
+        if max_angle <= 0.0:
+            return 0, 1.0
+        horizontal_angle = math.fmod(horizontal_angle, 2.0 * max_angle)
+        if horizontal_angle > max_angle:
+            horizontal_angle = 2.0 * max_angle - horizontal_angle
+
+        for horizontal_index in range(1, len(self._horizontal_angles)):
+            curr_angle = self._horizontal_angles[horizontal_index]
+            if curr_angle >= horizontal_angle:
+                prev_angle = self._horizontal_angles[horizontal_index - 1]
+                lerp = (horizontal_angle - prev_angle) / (curr_angle - prev_angle)
+                return horizontal_index, lerp
+        return -1, 0.0
+
+    def get_candela_value(self, vertical_angle, horizontal_angle):
+        horizontal_index, lerp = self.get_horizontal_interpolation(horizontal_angle)
+        if horizontal_index < 0:
+            return 0.0
+        curr_value = self.get_vertical_candela_value(horizontal_index, vertical_angle)
+        if lerp >= 1.0 or horizontal_index == 0:
+            return curr_value
+        prev_value = self.get_vertical_candela_value(horizontal_index - 1, vertical_angle)
+        return curr_value * lerp + prev_value * (1.0 - lerp)
 
     def get_candela_value_from_index(self, vertical_angle_idx, horizontal_angle_idx):
         index = vertical_angle_idx + horizontal_angle_idx * len(self._vertical_angles)
         return self._candela_values[index]
 
+    def get_vertical_candela_values(self, horizontal_angle_idx, vertical_angles):
+        return [self.get_vertical_candela_value(horizontal_angle_idx, vertical_angle)
+                for vertical_angle in vertical_angles]
+
     def get_vertical_candela_value(self, horizontal_angle_idx, vertical_angle):
+        angles = self._vertical_angles
         if vertical_angle < 0.0:
             return 0.0
 
-        if vertical_angle > self._vertical_angles[len(self._vertical_angles) - 1]:
+        if vertical_angle > angles[len(angles) - 1]:
+            return 0.0
+
+        vertical_index = max(1, bisect_right(angles, vertical_angle))
+        if vertical_index >= len(angles):
             return 0.0
 
-        for vertical_index in range(1, len(self._vertical_angles)):
-            curr_angle = self._vertical_angles[vertical_index]
-
-            if curr_angle > vertical_angle:
-                prev_angle = self._vertical_angles[vertical_index - 1]
-                prev_value = self.get_candela_value_from_index(
-                    vertical_index - 1, horizontal_angle_idx)
-                curr_value = self.get_candela_value_from_index(
-                    vertical_index, horizontal_angle_idx)
-                lerp = (vertical_angle - prev_angle) / (curr_angle - prev_angle)
-                assert lerp >= 0.0 and lerp <= 1.0
-                return curr_value * lerp + prev_value * (1.0 - lerp)
-        return 0.0
+        curr_angle = angles[vertical_index]
+        prev_angle = angles[vertical_index - 1]
+        prev_value = self.get_candela_value_from_index(vertical_index - 1, horizontal_angle_idx)
+        curr_value = self.get_candela_value_from_index(vertical_index, horizontal_angle_idx)
+        lerp = (vertical_angle - prev_angle) / (curr_angle - prev_angle)
+        return curr_value * lerp + prev_value * (1.0 - lerp)
@@ -26,7 +26,9 @@ THE SOFTWARE.
 from __future__ import print_function
 from rplibs.six.moves import range  # pylint: disable=import-error
 
-from panda3d.core import Vec3
+from collections import OrderedDict
+
+from panda3d.core import Vec3, LVecBase4i
 
 from rpcore.pynative.pointer_slot_storage import PointerSlotStorage
 from rpcore.pynative.gpu_command import GPUCommand
@@ -47,6 +49,16 @@ class InternalLightManager(object):
         self._shadow_manager = None
         self._camera_pos = Vec3(0)
         self._shadow_update_distance = 100.0
+        self._max_light_updates = 0
+        self._max_compaction_moves = 1
+        self._dirty_lights = OrderedDict()
+        self._rerank_distance = 1.0
+        self._ranking_dirty = True
+        self._ranked_camera_pos = Vec3(0)
+        self._ranked_sources = []
+        self._ranked_positions = {}
+        self._source_tiles = {}
+        self._region_sources = {}
 
     def get_max_light_index(self):
         return self._lights.get_max_index()
@@ -63,6 +75,11 @@ class InternalLightManager(object):
 
     num_shadow_sources = property(get_num_shadow_sources)
 
+    def get_num_dirty_lights(self):
+        return len(self._dirty_lights)
+
+    num_dirty_lights = property(get_num_dirty_lights)
+
     def set_shadow_manager(self, shadow_manager):
         self._shadow_manager = shadow_manager
 
@@ -80,6 +97,15 @@ class InternalLightManager(object):
     def set_shadow_update_distance(self, dist):
         self._shadow_update_distance = dist
 
+    def set_shadow_rerank_distance(self, dist):
+        self._rerank_distance = dist
+
+    def set_max_light_updates(self, max_updates):
+        self._max_light_updates = max_updates
+
+    def mark_light_dirty(self, light):
+        self._dirty_lights[light] = True
+
     def add_light(self, light):
         if light.has_slot():
             print("ERROR: Cannot add light since it already has a slot!")
@@ -91,6 +117,7 @@ class InternalLightManager(object):
             return
 
         light.assign_slot(slot)
+        light.set_light_manager(self)
         self._lights.reserve_slot(slot, light)
 
         if light.get_casts_shadows():
@@ -115,6 +142,8 @@ class InternalLightManager(object):
             self._shadow_sources.reserve_slot(slot, source)
             source.set_slot(slot)
 
+        self._ranking_dirty = True
+
     def remove_light(self, light):
         assert light is not None
         if not light.has_slot():
@@ -122,8 +151,10 @@ class InternalLightManager(object):
             return
 
         self._lights.free_slot(light.get_slot())
+        self._dirty_lights.pop(light, None)
         self.gpu_remove_light(light)
         light.remove_slot()
+        light.set_light_manager(None)
 
         if light.get_casts_shadows():
 
@@ -131,10 +162,11 @@ class InternalLightManager(object):
                 source = light.get_shadow_source(i)
                 if source.has_slot():
                     self._shadow_sources.free_slot(source.get_slot())
-                if source.has_region():
-                    self._shadow_manager.get_atlas().free_region(source.get_region())
-                    source.clear_region()
+                self._free_source_region(source)
+                self._source_tiles.pop(source, None)
+                self._ranked_positions.pop(source, None)
 
+            self._ranking_dirty = True
             self.gpu_remove_consecutive_sources(
                 light.get_shadow_source(0), light.get_num_shadow_sources())
 
@@ -165,57 +197,151 @@ class InternalLightManager(object):
         self._cmd_list.add_command(cmd_update)
 
     def update_lights(self):
-        for light in self._lights.begin():
-            if light.get_needs_update():
-                if light.casts_shadows:
-                    light.update_shadow_sources()
+        num_updates = len(self._dirty_lights)
+        if self._max_light_updates > 0:
+            num_updates = min(num_updates, self._max_light_updates)
+
+        for _ in range(num_updates):
+            light, _ = self._dirty_lights.popitem(last=False)
+            if light.get_casts_shadows():
+                light.update_shadow_sources()
+                if not self._ranking_dirty and self._shadow_sources_moved(light):
+                    self._ranking_dirty = True
             self.gpu_update_light(light)
 
+    def _shadow_sources_moved(self, light):
+        max_movement = self._rerank_distance ** 2
+        for i in range(light.get_num_shadow_sources()):
+            source = light.get_shadow_source(i)
+            ranked_pos = self._ranked_positions.get(source)
+            if ranked_pos is None:
+                return True
+            if (source.get_bounds().get_center() - ranked_pos).length_squared() > max_movement:
+                return True
+        return False
+
+    def _assign_source_region(self, source, region):
+        source.set_region(region, self._shadow_manager.get_atlas().region_to_uv(region))
+        self._region_sources[(region.x, region.y)] = source
+
+    def _free_source_region(self, source):
+        if source.has_region():
+            region = source.get_region()
+            self._region_sources.pop((region.x, region.y), None)
+            self._shadow_manager.get_atlas().free_region(region)
+            source.clear_region()
+
+    def get_source_tiles(self, source, distance_to_camera):
+        tiles = self._shadow_manager.get_atlas().get_required_tiles(source.get_resolution())
+        lod_distance = 0.25 * self._shadow_update_distance
+        while distance_to_camera > lod_distance and tiles > 1:
+            tiles //= 2
+            lod_distance *= 2.0
+        return tiles
+
+    def rank_shadow_sources(self):
+        ranked = []
+        self._ranked_positions.clear()
+        for source in self._shadow_sources.begin():
+            bounds = source.get_bounds()
+            self._ranked_positions[source] = Vec3(bounds.get_center())
+            center_dist = (self._camera_pos - bounds.get_center()).length()
+            distance_to_camera = center_dist - bounds.get_radius()
+            if distance_to_camera < self._shadow_update_distance:
+                ranked.append((distance_to_camera, source))
+                tiles = self.get_source_tiles(source, distance_to_camera)
+                if self._source_tiles.get(source, tiles) != tiles:
+                    source.set_needs_update(True)
+                self._source_tiles[source] = tiles
+            else:
+                self._free_source_region(source)
+
+        ranked.sort(key=lambda entry: entry[0])
+        self._ranked_sources = [source for _, source in ranked]
+        self._ranked_camera_pos = Vec3(self._camera_pos)
+        self._ranking_dirty = False
+
     def update_shadow_sources(self):
+        camera_movement = (self._camera_pos - self._ranked_camera_pos).length_squared()
+        if self._ranking_dirty or camera_movement > self._rerank_distance ** 2:
+            self.rank_shadow_sources()
+
+        update_slots = self._shadow_manager.get_num_update_slots_left()
         sources_to_update = []
 
-        for source in self._shadow_sources.begin():
-            # if source and source.get_needs_update():
-                # sources_to_update.append(source)
-            if source:
-                bounds = source.get_bounds()
-                distance_to_camera = (self._camera_pos - bounds.get_center()) - bounds.get_radius()
-                if distance_to_camera < self._shadow_update_distance:
-                    sources_to_update.append(source)
-                else:
-                    if source.has_region():
-                        self._shadow_manager.get_atlas().free_region(source.get_region())
-                        source.clear_region()
-
-        def get_source_score(source):
-            dist = (source.get_bounds().get_center() - self._camera_pos).length()
-            return -dist + (10**10 if source.has_region() else 0)
-
-        sorted_sources = list(sorted(sources_to_update, key=get_source_score))
+        for source in self._ranked_sources:
+            if len(sources_to_update) >= update_slots:
+                break
+            if not source.has_region():
+                sources_to_update.append(source)
+
+        for source in self._ranked_sources:
+            if len(sources_to_update) >= update_slots:
+                break
+            if source.has_region() and source.get_needs_update():
+                sources_to_update.append(source)
 
         atlas = self._shadow_manager.get_atlas()
-        update_slots = min(
-            len(sorted_sources),
-            self._shadow_manager.get_num_update_slots_left())
 
-        for i in range(update_slots):
-            if sorted_sources[i].has_region():
-                atlas.free_region(sorted_sources[i].get_region())
+        # Keep sources in their old region as long as the size did not change,
+        # only free the regions which have to move
+        for source in sources_to_update:
+            if source.has_region() and source.get_region().z != self._source_tiles[source]:
+                self._free_source_region(source)
 
-        for i in range(update_slots):
-            source = sorted_sources[i]
+        for source in sources_to_update:
+            if not source.has_region():
+                region_size = self._source_tiles[source]
+                new_region = atlas.find_and_reserve_region(region_size, region_size)
+                if new_region.x < 0:
+                    continue
+                self._assign_source_region(source, new_region)
 
             if not self._shadow_manager.add_update(source):
                 print("ERROR: Shadow manager ensured update slot, but slot is taken!")
                 break
 
-            region_size = atlas.get_required_tiles(source.get_resolution())
-            new_region = atlas.find_and_reserve_region(region_size, region_size)
-            new_uv_region = atlas.region_to_uv(new_region)
-            source.set_region(new_region, new_uv_region)
             source.set_needs_update(False)
             self.gpu_update_source(source)
 
+        self.compact_shadow_atlas(sources_to_update)
+
+    def set_max_compaction_moves(self, max_moves):
+        self._max_compaction_moves = max_moves
+
+    def compact_shadow_atlas(self, updated_sources):
+        atlas = self._shadow_manager.get_atlas()
+        num_moves = min(self._max_compaction_moves,
+                        self._shadow_manager.get_num_update_slots_left())
+        if num_moves <= 0:
+            return
+
+        # Sources which got rendered this frame may not move, and each source
+        # moves at most once per frame
+        updated_sources = set(updated_sources)
+        movable = set(position for position, source in self._region_sources.items()
+                      if source not in updated_sources)
+
+        for _ in range(num_moves):
+            move = atlas.find_compaction_move(movable)
+            if move is None:
+                break
+
+            old_region, new_x, new_y = move
+            source = self._region_sources[(old_region.x, old_region.y)]
+            movable.discard((old_region.x, old_region.y))
+
+            self._free_source_region(source)
+            if not atlas.reserve_region(new_x, new_y, old_region.z, old_region.w):
+                atlas.reserve_region(old_region.x, old_region.y, old_region.z, old_region.w)
+                self._assign_source_region(source, old_region)
+                break
+
+            self._assign_source_region(
+                source, LVecBase4i(new_x, new_y, old_region.z, old_region.w))
+            self._shadow_manager.add_update(source)
+            self.gpu_update_source(source)
+
     def update(self):
         self.update_lights()
         self.update_shadow_sources()
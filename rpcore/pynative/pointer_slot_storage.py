@@ -30,13 +30,28 @@ from rplibs.six.moves import range  # pylint: disable=import-error
 class PointerSlotStorage(object):
 
     """ Please refer to the native C++ implementation for docstrings and comments.
-    This is just the python implementation, which does not contain documentation! """
+    This is just the python implementation, which does not contain documentation!
+
+    Unlike the C++ implementation, the used slots are additionally tracked in
+    an array of 64 bit words, together with the index of the first word which
+    might contain a free slot. Finding a free slot skips full words at once
+    instead of testing each slot. """
+
+    WORD_BITS = 64
+    FULL_WORD = (1 << WORD_BITS) - 1
 
     def __init__(self, max_size):
         self._data = [None] * max_size
+        self._words = [0] * ((max_size + self.WORD_BITS - 1) // self.WORD_BITS)
+        self._first_free_word = 0
         self._max_index = 0
         self._num_entries = 0
 
+        # Mark the bits past the end as used, so they never get returned
+        num_padding_bits = len(self._words) * self.WORD_BITS - max_size
+        if num_padding_bits > 0:
+            self._words[-1] = self.FULL_WORD ^ ((1 << (self.WORD_BITS - num_padding_bits)) - 1)
+
     def get_max_index(self):
         return self._max_index
 
@@ -44,32 +59,54 @@ class PointerSlotStorage(object):
         return self._num_entries
 
     def find_slot(self):
-        # Notice: returns None in case of no free slot, and the slot otherwise, this
+        # Notice: returns -1 in case of no free slot, and the slot otherwise, this
         # is different to the C++ Module
-        for i, value in enumerate(self._data):
-            if not value:
-                return i
+        for word_index in range(self._first_free_word, len(self._words)):
+            free_bits = ~self._words[word_index] & self.FULL_WORD
+            if free_bits:
+                self._first_free_word = word_index
+                return word_index * self.WORD_BITS + (free_bits & -free_bits).bit_length() - 1
+        self._first_free_word = len(self._words)
         return -1
 
     def find_consecutive_slots(self, num_consecutive):
         if num_consecutive == 1:
             return self.find_slot()
 
-        for i in range(len(self._data)):
-            any_taken = False
-            for k in range(num_consecutive):
-                if self._data[i + k]:
-                    any_taken = True
-                    break
-            if not any_taken:
-                return i
+        run_start, run_length = -1, 0
+        for word_index in range(self._first_free_word, len(self._words)):
+            word = self._words[word_index]
+            if word == self.FULL_WORD:
+                run_length = 0
+                continue
+            if word == 0:
+                if run_length == 0:
+                    run_start = word_index * self.WORD_BITS
+                run_length += self.WORD_BITS
+                if run_length >= num_consecutive:
+                    return run_start
+                continue
+            for bit in range(self.WORD_BITS):
+                if word & (1 << bit):
+                    run_length = 0
+                    continue
+                if run_length == 0:
+                    run_start = word_index * self.WORD_BITS + bit
+                run_length += 1
+                if run_length >= num_consecutive:
+                    return run_start
         return -1
 
     def free_slot(self, slot):
+        if self._data[slot] is None:
+            return
         self._data[slot] = None
+        word_index = slot // self.WORD_BITS
+        self._words[word_index] &= ~(1 << (slot % self.WORD_BITS))
+        self._first_free_word = min(self._first_free_word, word_index)
         self._num_entries -= 1
         if slot == self._max_index:
-            while self._max_index >= 0 and not self._data[self._max_index]:
+            while self._max_index >= 0 and self._data[self._max_index] is None:
                 self._max_index -= 1
 
     def free_consecutive_slots(self, slot, num_consecutive):
@@ -78,13 +115,28 @@ class PointerSlotStorage(object):
 
     def reserve_slot(self, slot, ptr):
         self._max_index = max(self._max_index, slot)
+        if self._data[slot] is None:
+            self._num_entries += 1
         self._data[slot] = ptr
-        self._num_entries += 1
+        self._words[slot // self.WORD_BITS] |= 1 << (slot % self.WORD_BITS)
+
+    def get(self, slot):
+        return self._data[slot]
 
     def begin(self):
-        for i in range(self._max_index + 1):
-            if self._data[i]:
-                yield self._data[i]
+        entries = []
+        last_word = self._max_index // self.WORD_BITS
+        for word_index in range(last_word + 1):
+            word = self._words[word_index]
+            if word_index == last_word:
+                # Skip the padding bits past the end
+                word &= (2 << (self._max_index % self.WORD_BITS)) - 1
+            base_slot = word_index * self.WORD_BITS
+            while word:
+                lowest_bit = word & -word
+                entries.append(self._data[base_slot + lowest_bit.bit_length() - 1])
+                word ^= lowest_bit
+        return entries
 
     def end(self):
         raise NotImplementedError("Use .begin() as iterator when using the python side!")
@@ -81,6 +81,7 @@ class RPLight(object):
         self._near_plane = 0.5
         self._energy = 20
         self._shadow_sources = []
+        self._light_mgr = None
 
     def get_num_shadow_sources(self):
         return len(self._shadow_sources)
@@ -91,8 +92,13 @@ class RPLight(object):
     def clear_shadow_sources(self):
         self._shadow_sources = []
 
+    def set_light_manager(self, light_mgr):
+        self._light_mgr = light_mgr
+
     def set_needs_update(self, flag):
         self._needs_update = flag
+        if flag and self._light_mgr is not None:
+            self._light_mgr.mark_light_dirty(self)
 
     def get_needs_update(self):
         return self._needs_update
@@ -112,6 +118,8 @@ class RPLight(object):
     def invalidate_shadows(self):
         for source in self._shadow_sources:
             source.set_needs_update(True)
+        if self._casts_shadows:
+            self.set_needs_update(True)
 
     def set_pos(self, *args):
         self._position = Vec3(*args)
@@ -140,6 +148,7 @@ class RPLight(object):
 
     def set_energy(self, energy):
         self._energy = energy
+        self.set_needs_update(True)
 
     def get_energy(self):
         return self._energy
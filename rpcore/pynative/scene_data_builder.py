@@ -0,0 +1,121 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from panda3d.core import CS_yup_right, CS_zup_right, Mat4, Vec3, Vec4, invert
+
+
+class SceneDataBuilder(object):
+
+    """ Please refer to the native C++ implementation for docstrings and comments.
+    This is just the python implementation, which does not contain documentation! """
+
+    ZUP_CONVERSION = Mat4.convert_mat(CS_zup_right, CS_yup_right)
+    YUP_CONVERSION = Mat4.convert_mat(CS_yup_right, CS_zup_right)
+
+    def __init__(self):
+        self._view_mat = None
+        self._proj_mat = None
+        self._history_pending = False
+        self._view_mat_z_up = Mat4.ident_mat()
+        self._view_mat_billboard = Mat4.ident_mat()
+        self._proj_mat_z_up = Mat4.ident_mat()
+        self._inv_proj_mat_z_up = Mat4.ident_mat()
+        self._view_proj_mat_no_jitter = Mat4.ident_mat()
+        self._last_view_proj_mat_no_jitter = Mat4.ident_mat()
+        self._last_inv_view_proj_mat_no_jitter = Mat4.ident_mat()
+        self._ws_frustum_directions = Mat4.ident_mat()
+        self._vs_frustum_directions = Mat4.ident_mat()
+
+    def update(self, view_mat, proj_mat):
+        if self._view_mat is not None and view_mat == self._view_mat and \
+                proj_mat == self._proj_mat:
+            if not self._history_pending:
+                return False
+            self._store_history()
+            self._history_pending = False
+            return True
+
+        self._store_history()
+        self._history_pending = True
+        self._view_mat = Mat4(view_mat)
+        self._proj_mat = Mat4(proj_mat)
+
+        self._view_mat_z_up = view_mat * self.ZUP_CONVERSION
+
+        self._view_mat_billboard = Mat4(view_mat)
+        self._view_mat_billboard.set_row(0, Vec3(1, 0, 0))
+        self._view_mat_billboard.set_row(1, Vec3(0, 1, 0))
+        self._view_mat_billboard.set_row(2, Vec3(0, 0, 1))
+
+        self._proj_mat_z_up = self.YUP_CONVERSION * proj_mat
+        self._inv_proj_mat_z_up = invert(self._proj_mat_z_up)
+
+        proj_mat_no_jitter = Mat4(proj_mat)
+        proj_mat_no_jitter.set_cell(1, 0, 0.0)
+        proj_mat_no_jitter.set_cell(1, 1, 0.0)
+        self._view_proj_mat_no_jitter = view_mat * proj_mat_no_jitter
+
+        inv_proj_mat = invert(proj_mat)
+        inv_view_mat = invert(view_mat)
+        self._ws_frustum_directions = Mat4()
+        self._vs_frustum_directions = Mat4()
+        for i, point in enumerate(((-1, -1), (1, -1), (-1, 1), (1, 1))):
+            result = inv_proj_mat.xform(Vec4(point[0], point[1], 1.0, 1.0))
+            vs_dir = (self.ZUP_CONVERSION.xform(result)).xyz.normalized()
+            self._vs_frustum_directions.set_row(i, Vec4(vs_dir, 1))
+            self._ws_frustum_directions.set_row(i, inv_view_mat.xform(Vec4(result.xyz, 0)))
+        return True
+
+    def _store_history(self):
+        self._last_view_proj_mat_no_jitter = Mat4(self._view_proj_mat_no_jitter)
+        self._last_inv_view_proj_mat_no_jitter = invert(self._view_proj_mat_no_jitter)
+
+    def get_view_mat_z_up(self):
+        return self._view_mat_z_up
+
+    def get_view_mat_billboard(self):
+        return self._view_mat_billboard
+
+    def get_proj_mat_z_up(self):
+        return self._proj_mat_z_up
+
+    def get_inv_proj_mat_z_up(self):
+        return self._inv_proj_mat_z_up
+
+    def get_view_proj_mat_no_jitter(self):
+        return self._view_proj_mat_no_jitter
+
+    def get_last_view_proj_mat_no_jitter(self):
+        return self._last_view_proj_mat_no_jitter
+
+    def get_last_inv_view_proj_mat_no_jitter(self):
+        return self._last_inv_view_proj_mat_no_jitter
+
+    def get_ws_frustum_directions(self):
+        return self._ws_frustum_directions
+
+    def get_vs_frustum_directions(self):
+        return self._vs_frustum_directions
@@ -33,7 +33,12 @@ from panda3d.core import LVecBase4i, LVecBase4
 class ShadowAtlas(object):
 
     """ Please refer to the native C++ implementation for docstrings and comments.
-    This is just the python implementation, which does not contain documentation! """
+    This is just the python implementation, which does not contain documentation!
+
+    Unlike the C++ implementation, this uses a quadtree (buddy) allocator with
+    one free list per power of two block size, instead of scanning a grid of
+    tile flags. Requests get rounded up to the next power of two block, so
+    allocating and freeing is O(log n) regardless of the atlas resolution. """
 
     def __init__(self, size, tile_size=32):
         self._size = size
@@ -44,9 +49,25 @@ class ShadowAtlas(object):
     def init_tiles(self):
         self._num_tiles = self._size // self._tile_size
 
-        def row():
-            return [False for i in range(self._num_tiles)]  # pylint: disable=unused-variable
-        self._flags = [row() for j in range(self._num_tiles)]  # pylint: disable=unused-variable
+        self._root_size = 1
+        while self._root_size * 2 <= self._num_tiles:
+            self._root_size *= 2
+
+        self._free_blocks = {}
+        block_size = 1
+        while block_size <= self._root_size:
+            self._free_blocks[block_size] = set()
+            block_size *= 2
+
+        num_roots = self._num_tiles // self._root_size
+        for x in range(num_roots):
+            for y in range(num_roots):
+                self._free_blocks[self._root_size].add(
+                    (x * self._root_size, y * self._root_size))
+
+        self._used_blocks = {}
+        self._num_reserved_tiles = 0
+        self._compaction_possible = False
 
     def get_num_used_tiles(self):
         return self._num_used_tiles
@@ -58,36 +79,214 @@ class ShadowAtlas(object):
 
     coverage = property(get_coverage)
 
-    def reserve_region(self, x, y, w, h):
+    def get_num_free_tiles(self):
+        return sum(size * size * len(blocks) for size, blocks in self._free_blocks.items())
+
+    num_free_tiles = property(get_num_free_tiles)
+
+    def get_largest_free_block(self):
+        for size in sorted(self._free_blocks, reverse=True):
+            if self._free_blocks[size]:
+                return size
+        return 0
+
+    largest_free_block = property(get_largest_free_block)
+
+    def get_num_wasted_tiles(self):
+        return self._num_reserved_tiles - self._num_used_tiles
+
+    num_wasted_tiles = property(get_num_wasted_tiles)
+
+    def get_fragmentation(self):
+        num_free_tiles = self.get_num_free_tiles()
+        if num_free_tiles == 0:
+            return 0.0
+        largest_block = self.get_largest_free_block()
+        return 1.0 - (largest_block * largest_block) / float(num_free_tiles)
+
+    fragmentation = property(get_fragmentation)
+
+    def get_stats(self):
+        return {
+            "num_tiles": self._num_tiles ** 2,
+            "used_tiles": self._num_used_tiles,
+            "wasted_tiles": self.get_num_wasted_tiles(),
+            "free_tiles": self.get_num_free_tiles(),
+            "largest_free_block": self.get_largest_free_block(),
+            "free_blocks": dict((size, len(blocks)) for size, blocks
+                                in self._free_blocks.items() if blocks),
+            "fragmentation": self.get_fragmentation(),
+        }
+
+    def get_block_size(self, tile_width, tile_height):
+        block_size = 1
+        while block_size < max(tile_width, tile_height):
+            block_size *= 2
+        return block_size
+
+    def _split_block(self, x, y, size, target_x, target_y, target_size):
+        while size > target_size:
+            size //= 2
+            for offset_x, offset_y in ((0, 0), (size, 0), (0, size), (size, size)):
+                child = (x + offset_x, y + offset_y)
+                if (child[0] <= target_x < child[0] + size and
+                        child[1] <= target_y < child[1] + size):
+                    next_x, next_y = child
+                else:
+                    self._free_blocks[size].add(child)
+            x, y = next_x, next_y
+        return x, y
+
+    def _mark_reserved(self, x, y, w, h, block_size):
+        self._used_blocks[(x, y)] = (block_size, w * h, w, h)
         self._num_used_tiles += w * h
-        for x_offset in range(w):
-            for y_offset in range(h):
-                self._flags[x + x_offset][y + y_offset] = True
+        self._num_reserved_tiles += block_size * block_size
+        self._compaction_possible = True
+
+    def reserve_region(self, x, y, w, h):
+        block_size = self.get_block_size(w, h)
+        if block_size > self._root_size or x % block_size != 0 or y % block_size != 0:
+            return False
+
+        size = block_size
+        while size <= self._root_size:
+            parent = (x - x % size, y - y % size)
+            if parent in self._free_blocks[size]:
+                self._free_blocks[size].remove(parent)
+                self._split_block(parent[0], parent[1], size, x, y, block_size)
+                self._mark_reserved(x, y, w, h, block_size)
+                return True
+            size *= 2
+        return False
 
     def find_and_reserve_region(self, tile_width, tile_height):
-        for x in range(self._num_tiles - tile_height + 1):
-            for y in range(self._num_tiles - tile_width + 1):
-                if self.region_is_free(x, y, tile_width, tile_height):
-                    self.reserve_region(x, y, tile_width, tile_height)
-                    return LVecBase4i(x, y, tile_width, tile_height)
+        block_size = self.get_block_size(tile_width, tile_height)
+        size = block_size
+        while size <= self._root_size:
+            if self._free_blocks[size]:
+                x, y = self._free_blocks[size].pop()
+                self._split_block(x, y, size, x, y, block_size)
+                self._mark_reserved(x, y, tile_width, tile_height, block_size)
+                return LVecBase4i(x, y, tile_width, tile_height)
+            size *= 2
         print("Failed to find a free region of size", tile_width, "x", tile_height)
         return LVecBase4i(-1)
 
     def free_region(self, region):
-        self._num_used_tiles -= region.z * region.w
-        for x in range(region.z):
-            for y in range(region.w):
-                self._flags[region.x + x][region.y + y] = False
+        x, y = region.x, region.y
+        if (x, y) not in self._used_blocks:
+            print("ShadowAtlas: Region", region, "is not reserved!")
+            return
+
+        size, num_tiles, _, _ = self._used_blocks.pop((x, y))
+        self._num_used_tiles -= num_tiles
+        self._num_reserved_tiles -= size * size
+
+        while size < self._root_size:
+            parent_x, parent_y = x - x % (2 * size), y - y % (2 * size)
+            siblings = [(parent_x + offset_x, parent_y + offset_y) for offset_x, offset_y
+                        in ((0, 0), (size, 0), (0, size), (size, size))]
+            siblings.remove((x, y))
+            free_blocks = self._free_blocks[size]
+            if not all(sibling in free_blocks for sibling in siblings):
+                break
+            for sibling in siblings:
+                free_blocks.remove(sibling)
+            x, y, size = parent_x, parent_y, size * 2
+
+        self._free_blocks[size].add((x, y))
+        self._compaction_possible = True
+
+    def _get_merged_size(self, x, y, size):
+        while size < self._root_size:
+            parent_x, parent_y = x - x % (2 * size), y - y % (2 * size)
+            for offset_x, offset_y in ((0, 0), (size, 0), (0, size), (size, size)):
+                sibling = (parent_x + offset_x, parent_y + offset_y)
+                if sibling != (x, y) and sibling not in self._free_blocks[size]:
+                    return size
+            x, y, size = parent_x, parent_y, size * 2
+        return size
+
+    def _count_free_children(self, x, y, size):
+        return sum(1 for offset_x, offset_y in ((0, 0), (size, 0), (0, size), (size, size))
+                   if (x + offset_x, y + offset_y) in self._free_blocks[size])
+
+    def _find_target_block(self, size, merged_x, merged_y, merged_size):
+        for target_x, target_y in self._free_blocks[size]:
+            if not (merged_x <= target_x < merged_x + merged_size and
+                    merged_y <= target_y < merged_y + merged_size):
+                yield target_x, target_y
+
+    def find_compaction_move(self, movable=None):
+        if not self._compaction_possible:
+            return None
+
+        # Blocks which may not move right now are skipped, but keep the flag set
+        # so they get considered again once they are movable
+        num_skipped = 0
+        best_move, best_score = None, None
+        for (x, y), (block_size, _, w, h) in self._used_blocks.items():
+            if movable is not None and (x, y) not in movable:
+                num_skipped += 1
+                continue
+            merged_size = self._get_merged_size(x, y, block_size)
+            merged_x, merged_y = x - x % merged_size, y - y % merged_size
+
+            # Moving the block into a smaller free block than the one which gets
+            # created by freeing it reduces fragmentation. The free blocks which
+            # get merged are exactly 3 per level, so there must be more than that.
+            size = block_size
+            while size < merged_size and len(self._free_blocks[size]) <= 3:
+                size *= 2
+
+            if size < merged_size:
+                score = (1, merged_size, -size)
+                if best_score is None or score > best_score:
+                    for target_x, target_y in self._find_target_block(
+                            size, merged_x, merged_y, merged_size):
+                        best_score = score
+                        best_move = (LVecBase4i(x, y, w, h), target_x, target_y)
+                        break
+                continue
+
+            # Otherwise, moving the block into an equally sized free block still
+            # helps if it gathers the free blocks of that size in the same parent,
+            # so they can get merged later on.
+            if merged_size >= self._root_size:
+                continue
+            parent_size = 2 * merged_size
+            source_parent = (x - x % parent_size, y - y % parent_size)
+            num_source_free = self._count_free_children(
+                source_parent[0], source_parent[1], merged_size)
+            for target_x, target_y in self._find_target_block(
+                    merged_size, merged_x, merged_y, merged_size):
+                target_parent = (target_x - target_x % parent_size,
+                                 target_y - target_y % parent_size)
+                if target_parent == source_parent:
+                    continue
+                num_target_free = self._count_free_children(
+                    target_parent[0], target_parent[1], merged_size)
+                if num_source_free < num_target_free:
+                    continue
+                score = (0, merged_size, num_source_free - num_target_free)
+                if best_score is None or score > best_score:
+                    best_score = score
+                    best_move = (LVecBase4i(x, y, w, h), target_x, target_y)
+
+        self._compaction_possible = best_move is not None or num_skipped > 0
+        return best_move
 
     def get_tile_size(self):
         return self._tile_size
 
     def region_is_free(self, x, y, w, h):
-        for x_offset in range(w):
-            for y_offset in range(h):
-                if self._flags[x + x_offset][y + y_offset]:
-                    return False
-        return True
+        block_size = self.get_block_size(w, h)
+        size = block_size
+        while size <= self._root_size:
+            if (x - x % size, y - y % size) in self._free_blocks[size]:
+                return x % block_size == 0 and y % block_size == 0
+            size *= 2
+        return False
 
     def get_required_tiles(self, resolution):
         if resolution % self._tile_size != 0:
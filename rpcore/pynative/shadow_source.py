@@ -89,7 +89,7 @@ class ShadowSource(object):
         return self._slot
 
     def get_needs_update(self):
-        return not self.has_region or self._needs_update
+        return not self.has_region() or self._needs_update
 
     def get_resolution(self):
         return self._resolution
@@ -28,11 +28,10 @@ from __future__ import division
 
 import sys
 import math
-import time
 
 from panda3d.core import LVecBase2i, TransformState, RenderState, load_prc_file
 from panda3d.core import PandaSystem, MaterialAttrib, WindowProperties
-from panda3d.core import GeomTristrips, Vec4
+from panda3d.core import GeomTristrips, Vec4, PStatCollector
 
 from direct.showbase.ShowBase import ShowBase
 from direct.stdpy.file import isfile
@@ -43,6 +42,7 @@ from rplibs.six.moves import range  # pylint: disable=import-error
 from rpcore.globals import Globals
 from rpcore.effect import Effect
 from rpcore.rpobject import RPObject
+from rpcore.loader import RPLoader, timed_loading_operation
 from rpcore.common_resources import CommonResources
 from rpcore.native import TagStateManager, PointLight, SpotLight
 from rpcore.render_target import RenderTarget
@@ -50,6 +50,10 @@ from rpcore.pluginbase.manager import PluginManager
 from rpcore.pluginbase.day_manager import DayTimeManager
 
 from rpcore.util.task_scheduler import TaskScheduler
+from rpcore.util.startup_profiler import StartupProfiler
+from rpcore.util.shader_dependencies import ShaderDependencies
+from rpcore.util.shader_cache import ShaderCache
+from rpcore.util.shader_watcher import ShaderWatcher
 from rpcore.util.network_communication import NetworkCommunication
 from rpcore.util.ies_profile_loader import IESProfileLoader
 
@@ -86,6 +90,8 @@ class RenderPipeline(RPObject):
         self._applied_effects = []
         self._pre_showbase_initialized = False
         self._first_frame = None
+        self.startup_profiler = None
+        self.shader_watcher = None
         self.set_loading_screen_image("/$$rp/data/gui/loading_screen_bg.txo")
 
     def load_settings(self, path):
@@ -109,13 +115,87 @@ class RenderPipeline(RPObject):
             self._showbase.graphicsEngine.render_frame()
             self._showbase.graphicsEngine.render_frame()
         self.tag_mgr.cleanup_states()
+        self.shader_deps.invalidate()
         self.stage_mgr.reload_shaders()
         self.light_mgr.reload_shaders()
+        Effect.clear_cache()
         self._set_default_effect()
         self.plugin_mgr.trigger_hook("shader_reload")
         if self.settings["pipeline.display_debugger"]:
             self.debugger.set_reload_hint_visible(False)
         self._apply_custom_shaders()
+        self._prepare_shaders()
+
+    def reload_shaders_using_defines(self, define_names):
+        """ Reloads only the stages and effects whose shaders read one of the
+        given defines. This is used when defines change at runtime, e.g. when
+        a plugin setting changes, and is much faster than reloading all
+        shaders. The shader auto config should have been written before. """
+        deps = self.shader_deps
+        deps.invalidate()
+        stages = [stage for stage in self.stage_mgr.stages
+                  if deps.uses_any(stage.shader_sources, define_names)]
+        for stage in stages:
+            stage.reload_shaders()
+        num_effects = self._reload_effects(
+            lambda effect: deps.uses_any(effect.get_shader_sources(), define_names))
+
+        self._prepare_shaders()
+        self.debug("Reloaded", len(stages), "stages and", num_effects,
+                   "effects using", ", ".join(sorted(define_names)))
+
+    def reload_shaders_using_files(self, filenames):
+        """ Reloads only the stages and effects which use one of the given
+        files, either directly or through an include. The files may also be
+        effect files or shader templates. This is used by the shader watcher
+        when files got modified. """
+        deps = self.shader_deps
+        affected = set()
+        for filename in filenames:
+            deps.invalidate(filename)
+            affected.add(deps.resolve(filename) or filename)
+            affected |= deps.get_dependents(filename)
+
+        def uses_affected(sources):
+            return any(deps.resolve(source) in affected for source in sources)
+
+        stages = [stage for stage in self.stage_mgr.stages if uses_affected(stage.shader_sources)]
+        for stage in stages:
+            stage.reload_shaders()
+
+        templates_changed = uses_affected(Effect.get_template_sources())
+        if templates_changed:
+            Effect.invalidate_templates()
+        num_effects = self._reload_effects(
+            lambda effect: templates_changed or uses_affected(
+                effect.get_shader_sources() + [effect.filename]))
+
+        self._prepare_shaders()
+        self.debug("Reloaded", len(stages), "stages and", num_effects, "effects")
+
+    def _reload_effects(self, predicate):
+        """ Removes all effects for which predicate returns True from the cache,
+        and applies them again to the objects using them. Returns the amount of
+        reloaded effects. """
+        # Collect the affected effects before re-applying them, since the
+        # first re-application loads the effect into the cache again
+        num_effects = Effect.remove_from_cache(predicate)
+        if num_effects:
+            default_effect = ("effects/default.yaml", {})
+            reload_default = not Effect.is_cached(*default_effect)
+            stale_effects = [args for args in self._applied_effects
+                             if not Effect.is_cached(args[1], args[2] or {})]
+            if reload_default:
+                self._set_default_effect()
+            for args in stale_effects:
+                self._internal_set_effect(*args)
+        return num_effects
+
+    def _prepare_shaders(self):
+        """ Enqueues all newly created shaders to be compiled together at the
+        beginning of the next frame, instead of compiling them one by one when
+        they are first used """
+        self.shader_cache.prepare_shaders(self._showbase.win.gsg.prepared_objects)
 
     def _apply_custom_shaders(self):
         """ Re-applies all custom shaders the user applied, to avoid them getting
@@ -155,43 +235,68 @@ class RenderPipeline(RPObject):
         initialized ShowBase object. In this case, you should call
         pre_showbase_init() before initializing the ShowBase"""
 
-        start_time = time.time()
-        self._init_showbase(base)
-
-        if not self._showbase.win.gsg.supports_compute_shaders:
-            self.fatal(
-                "Sorry, your GPU does not support compute shaders! Make sure\n"
-                "you have the latest drivers. If you already have, your gpu might\n"
-                "be too old, or you might be using the open source drivers on linux.")
-
-        self._init_globals()
-        self.loading_screen.create()
-        self._adjust_camera_settings()
-        self._create_managers()
-        self.plugin_mgr.load()
-        self.daytime_mgr.load_settings()
-        self.common_resources.write_config()
-        self._init_debugger()
-
-        self.plugin_mgr.trigger_hook("stage_setup")
-        self.plugin_mgr.trigger_hook("post_stage_setup")
-
-        self._create_common_defines()
-        self._initialize_managers()
-        self._create_default_skybox()
-
-        self.plugin_mgr.trigger_hook("pipeline_created")
-
-        self._listener = NetworkCommunication(self)
-        self._set_default_effect()
-
-        # Measure how long it took to initialize everything, and also store
-        # when we finished, so we can measure how long it took to render the
-        # first frame (where the shaders are actually compiled)
-        init_duration = (time.time() - start_time)
-        self._first_frame = time.clock()
-        self.debug("Finished initialization in {:3.3f} s, first frame: {}".format(
-            init_duration, Globals.clock.get_frame_count()))
+        self.startup_profiler = StartupProfiler()
+        timed_loading_operation.PROFILER = self.startup_profiler
+        profile = self.startup_profiler.phase
+
+        with profile("Initialization"):
+            with profile("Init showbase"):
+                self._init_showbase(base)
+
+            if not self._showbase.win.gsg.supports_compute_shaders:
+                self.fatal(
+                    "Sorry, your GPU does not support compute shaders! Make sure\n"
+                    "you have the latest drivers. If you already have, your gpu might\n"
+                    "be too old, or you might be using the open source drivers on linux.")
+
+            with profile("Init globals"):
+                self._init_globals()
+            with profile("Create loading screen"):
+                self.loading_screen.create()
+            self._adjust_camera_settings()
+            with profile("Create managers"):
+                self._create_managers()
+            self.plugin_mgr.profiler = self.startup_profiler
+            with profile("Load plugins"):
+                self.plugin_mgr.load()
+            with profile("Load daytime settings"):
+                self.daytime_mgr.load_settings()
+            with profile("Write config"):
+                self.common_resources.write_config()
+            with profile("Init debugger"):
+                self._init_debugger()
+
+            with profile("Hook stage_setup"):
+                self.plugin_mgr.trigger_hook("stage_setup")
+            with profile("Hook post_stage_setup"):
+                self.plugin_mgr.trigger_hook("post_stage_setup")
+
+            self._create_common_defines()
+            with profile("Initialize managers"):
+                self._initialize_managers()
+            with profile("Create default skybox"):
+                self._create_default_skybox()
+
+            with profile("Hook pipeline_created"):
+                self.plugin_mgr.trigger_hook("pipeline_created")
+
+            self._listener = NetworkCommunication(self)
+            with profile("Set default effect"):
+                self._set_default_effect()
+            with profile("Wait for asynchronous loads"):
+                RPLoader.wait_for_pending_loads()
+            self._prepare_shaders()
+            if self.settings["pipeline.watch_shader_files"]:
+                self.shader_watcher = ShaderWatcher(self)
+
+        # Measure how long it took to initialize everything, and also measure
+        # how long it takes to render the first frame (where the shaders are
+        # actually compiled)
+        init_phase = self.startup_profiler.get_phases()[0]
+        self.debug("Finished initialization in {:3.3f} s (cpu {:3.3f} s), first frame: {}".format(
+            init_phase["wall"], init_phase["cpu"], Globals.clock.get_frame_count()))
+        self.startup_profiler.begin("First frame")
+        self._first_frame = 0
 
     def set_loading_screen_image(self, image_source):
         """ Tells the pipeline to use the default loading screen, which consists
@@ -370,6 +475,9 @@ class RenderPipeline(RPObject):
         initializes the commonly used render stages, which are always required,
         independently of which plugins are enabled. """
         self.task_scheduler = TaskScheduler(self)
+        self.shader_deps = ShaderDependencies()
+        self.shader_cache = ShaderCache(self.shader_deps)
+        RPLoader.SHADER_CACHE = self.shader_cache
         self.tag_mgr = TagStateManager(Globals.base.cam)
         self.plugin_mgr = PluginManager(self)
         self.stage_mgr = StageManager(self)
@@ -379,6 +487,11 @@ class RenderPipeline(RPObject):
         self.common_resources = CommonResources(self)
         self._init_common_stages()
 
+        # PStats collectors to show the cost of the per-frame manager updates
+        self._manager_collectors = dict((name, PStatCollector("RP_Managers:" + name)) for name in (
+            "TaskScheduler", "NetworkCommunication", "Debugger", "DayTimeManager",
+            "LightManager", "CommonResources", "StageManager"))
+
     def _analyze_system(self):
         """ Prints information about the system used, including information
         about the used Panda3D build. Also checks if the Panda3D build is out
@@ -401,11 +514,16 @@ class RenderPipeline(RPObject):
         created earlier in _create_managers. The creation and initialization
         is seperated due to the fact that plugins and various other subprocesses
         have to get initialized inbetween. """
-        self.stage_mgr.setup()
-        self.stage_mgr.reload_shaders()
-        self.light_mgr.reload_shaders()
+        profile = self.startup_profiler.phase
+        with profile("Setup stages"):
+            self.stage_mgr.setup()
+        with profile("Load stage shaders"):
+            self.stage_mgr.reload_shaders()
+        with profile("Load light shaders"):
+            self.light_mgr.reload_shaders()
         self._init_bindings()
-        self.light_mgr.init_shadows()
+        with profile("Init shadows"):
+            self.light_mgr.init_shadows()
 
     def _init_debugger(self):
         """ Internal method to initialize the GUI-based debugger. In case debugging
@@ -534,11 +652,16 @@ class RenderPipeline(RPObject):
     def _manager_update_task(self, task):
         """ Update task which gets called before the rendering, and updates
         all managers."""
-        self.task_scheduler.step()
-        self._listener.update()
-        self.debugger.update()
-        self.daytime_mgr.update()
-        self.light_mgr.update()
+        collectors = self._manager_collectors
+        for name, update_method in (("TaskScheduler", self.task_scheduler.step),
+                                    ("NetworkCommunication", self._listener.update),
+                                    ("Debugger", self.debugger.update),
+                                    ("DayTimeManager", self.daytime_mgr.update),
+                                    ("LightManager", self.light_mgr.update)):
+            collectors[name].start()
+            update_method()
+            collectors[name].stop()
+        RPLoader.process_finished_loads()
 
         if Globals.clock.get_frame_count() == 10:
             self.debug("Hiding loading screen after 10 pre-rendered frames.")
@@ -550,8 +673,13 @@ class RenderPipeline(RPObject):
         """ Updates the commonly used inputs each frame. This is a seperate
         task to be able view detailed performance information in pstats, since
         a lot of matrix calculations are involved here. """
+        collectors = self._manager_collectors
+        collectors["CommonResources"].start()
         self.common_resources.update()
+        collectors["CommonResources"].stop()
+        collectors["StageManager"].start()
         self.stage_mgr.update()
+        collectors["StageManager"].stop()
         return task.cont
 
     def _plugin_pre_render_update(self, task):
@@ -567,11 +695,28 @@ class RenderPipeline(RPObject):
         update hook. """
         self.plugin_mgr.trigger_hook("post_render_update")
         if self._first_frame is not None:
-            duration = time.clock() - self._first_frame
-            self.debug("Took", round(duration, 3), "s until first frame")
-            self._first_frame = None
+            # This task runs before the frame gets rendered, so wait for the
+            # second invocation to include the first rendered frame
+            if self._first_frame > 0:
+                self._finish_startup_profile()
+                self._first_frame = None
+            else:
+                self._first_frame += 1
         return task.cont
 
+    def _finish_startup_profile(self):
+        """ Finishes the startup profile after the first frame was rendered,
+        and outputs it as configured in the pipeline settings """
+        profiler = self.startup_profiler
+        profiler.end()
+        self.debug("Took", round(profiler.get_phases()[-1]["wall"], 3), "s until first frame")
+        timed_loading_operation.PROFILER = None
+        self.plugin_mgr.profiler = None
+        if self.settings["pipeline.print_startup_profile"]:
+            profiler.print_tree()
+        if self.settings["pipeline.startup_trace_file"]:
+            profiler.write_chrome_trace(self.settings["pipeline.startup_trace_file"])
+
     def _create_common_defines(self):
         """ Creates commonly used defines for the shader configuration. """
         defines = self.stage_mgr.defines
@@ -58,6 +58,7 @@ class RenderStage(RPObject):
         self._pipeline = pipeline
         self._active = True
         self._targets = {}
+        self._shader_sources = set()
 
     def create(self):
         """ This method should setup the stage and create the pipes """
@@ -86,6 +87,16 @@ class RenderStage(RPObject):
         stages to perform custom updates """
         pass
 
+    @property
+    def plugin_id(self):
+        """ Returns the id of the plugin which created this stage """
+        return self._get_plugin_id()
+
+    @property
+    def shader_sources(self):
+        """ Returns the set of all shader files loaded by this stage """
+        return self._shader_sources
+
     @property
     def active(self):
         """ Returns whether *all* targets of the stage are active """
@@ -141,6 +152,7 @@ class RenderStage(RPObject):
         # and use the default vertex shader
         if len(args) == 1:
             path_args = ["/$$rp/shader/default_post_process.vert.glsl"] + path_args
+        self._shader_sources.update(path_args)
         return RPLoader.load_shader(*path_args)
 
     def _get_plugin_id(self):
@@ -27,8 +27,10 @@ THE SOFTWARE.
 from rplibs.six import iteritems
 from rplibs.yaml import load_yaml_file
 
+from panda3d.core import PStatClient, PStatCollector
 from direct.stdpy.file import open
 
+from rpcore.globals import Globals
 from rpcore.rpobject import RPObject
 from rpcore.gui.pipe_viewer import PipeViewer
 from rpcore.image import Image
@@ -54,6 +56,15 @@ class StageManager(RPObject):
         self.pipeline = pipeline
         self.created = False
 
+        # PStats collector and plugin id of each stage, used to account the
+        # cost of the stage updates
+        self._update_collectors = {}
+
+        # When enabled, the runtime of the stage updates gets accumulated into
+        # update_timings, which maps plugin_id -> stage_id -> seconds
+        self.update_timing_enabled = False
+        self.update_timings = {}
+
         self._load_stage_order()
 
         # Register the manager so the pipe viewer can read our data
@@ -80,6 +91,8 @@ class StageManager(RPObject):
             return
 
         self.stages.append(stage)
+        self._update_collectors[stage] = stage.plugin_id, PStatCollector(
+            "RP_Stages:{}:{}".format(stage.plugin_id, stage.stage_id))
 
     def get_stage(self, stage_class):
         """ Returns a handle to an instantiated stage """
@@ -254,9 +267,29 @@ class StageManager(RPObject):
     def update(self):
         """ Calls the update method for each registered stage. Inactive stages
         are skipped. """
+        timed = self.update_timing_enabled
+        if not timed and not PStatClient.is_connected():
+            for stage in self.stages:
+                if stage.active:
+                    stage.update()
+            return
+
+        get_time = Globals.clock.get_real_time
         for stage in self.stages:
             if stage.active:
+                plugin_id, collector = self._update_collectors[stage]
+                collector.start()
+                start = get_time()
                 stage.update()
+                duration = get_time() - start
+                collector.stop()
+                if timed:
+                    timings = self.update_timings.setdefault(plugin_id, {})
+                    timings[stage.stage_id] = timings.get(stage.stage_id, 0.0) + duration
+
+    def reset_update_timings(self):
+        """ Clears the accumulated stage update timings """
+        self.update_timings = {}
 
     def handle_window_resize(self):
         """ Method to get called when the window got resized. Propagates the
@@ -284,3 +317,4 @@ class StageManager(RPObject):
                 handle.write(output)
         except IOError as msg:
             self.error("Error writing shader autoconfig:", msg)
+        self.pipeline.shader_deps.invalidate("/$$rptemp/$$pipeline_shader_config.inc.glsl")
@@ -100,6 +100,7 @@ class UpdatePreviousPipesStage(RenderStage):
         shader_dest = "/$$rptemp/$$update_previous_pipes.frag.glsl"
         with open(shader_dest, "w") as handle:
             handle.write(fragment)
+        self._pipeline.shader_deps.invalidate(shader_dest)
 
         # Load it back again
         self._target.shader = self.load_shader(shader_dest)
@@ -33,6 +33,10 @@ import hashlib
 from panda3d.core import PStatCollector, Mat4, Point4, Vec3
 from rpcore.globals import Globals
 
+# time.clock() was removed in python 3.8, time.time() is only a fallback for
+# python 2
+WALL_CLOCK = getattr(time, "perf_counter", time.time)
+
 
 def rgb_from_string(text, min_brightness=0.6):
     """ Creates a rgb color from a given string """
@@ -90,10 +94,10 @@ class profile_cpu(object):  # noqa # pylint: disable=invalid-name,too-few-public
         self.name = name
 
     def __enter__(self):
-        self.start_time = time.clock()
+        self.start_time = WALL_CLOCK()
 
     def __exit__(self, *args):
-        duration = (time.clock() - self.start_time) * 1000.0
+        duration = (WALL_CLOCK() - self.start_time) * 1000.0
         print(self.name, "took", round(duration, 2), "ms ")
 
 
@@ -0,0 +1,91 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+
+import hashlib
+
+from panda3d.core import Shader
+
+from rpcore.rpobject import RPObject
+
+__all__ = ("ShaderCache",)
+
+
+class ShaderCache(RPObject):
+
+    """ Creates the shaders of the pipeline. Each shader is keyed by a hash
+    over the content of its sources and all their includes, and if that hash
+    did not change since the last load, the previous shader object is
+    returned. Since the compiled program is stored per shader object, reloading
+    the shaders only recompiles the shaders whose sources actually changed.
+
+    Panda3D's own shader table is keyed by filename and checks the file
+    timestamps instead. The pipeline rewrites its generated shader config on
+    every reload, so that table would load every shader again, even if the
+    content stayed the same. Newly created shaders are also collected, so they
+    can be prepared in a batch instead of being compiled one after another
+    while rendering. """
+
+    def __init__(self, dependencies):
+        """ Constructs a new cache, using the given ShaderDependencies to
+        resolve includes """
+        RPObject.__init__(self)
+        self._dependencies = dependencies
+        self._shaders = {}
+        self._unprepared = []
+
+    def get_source_hash(self, filenames):
+        """ Returns a hash of the given files and all files they include """
+        source_hash = hashlib.md5()
+        for filename in filenames:
+            source_hash.update(self._dependencies.get_source_hash(filename).encode("ascii"))
+        return source_hash.hexdigest()
+
+    def load(self, *filenames):
+        """ Loads a shader from the given files, see RPLoader.load_shader.
+        Returns the previously loaded shader if none of the sources and their
+        includes changed. """
+        source_hash = self.get_source_hash(filenames)
+        cached = self._shaders.get(filenames)
+        if cached is not None and cached[0] == source_hash:
+            return cached[1]
+
+        if len(filenames) == 1:
+            shader = Shader.load_compute(Shader.SL_GLSL, filenames[0])
+        else:
+            shader = Shader.load(Shader.SL_GLSL, *filenames)
+        if shader:
+            self._shaders[filenames] = source_hash, shader
+            self._unprepared.append(shader)
+        return shader
+
+    def prepare_shaders(self, prepared_objects):
+        """ Enqueues all shaders created since the last call to be prepared,
+        so they get compiled together at the beginning of the next frame """
+        for shader in self._unprepared:
+            shader.prepare(prepared_objects)
+        self.debug("Enqueued", len(self._unprepared), "new shaders for compilation")
+        self._unprepared = []
@@ -0,0 +1,248 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import re
+import time
+import hashlib
+
+from panda3d.core import Filename, VirtualFileSystem, get_model_path
+from direct.stdpy.file import open
+
+from rpcore.rpobject import RPObject
+
+__all__ = ("ShaderDependencies",)
+
+
+class ShaderDependencies(RPObject):
+
+    """ Tracks which files a shader includes, and which identifiers (like
+    defines) a shader and its includes read. This is used to find the stages
+    and effects which are affected by a changed define or file, so only those
+    have to get reloaded.
+
+    The parse results of each file are cached together with its timestamp,
+    and the file is only read again if the timestamp changed. Files written
+    by the pipeline itself have to be passed to invalidate() after writing.
+    A reverse dependency graph stores which files include a file, so when a
+    file changes, only the cached results of the files depending on it are
+    discarded. """
+
+    _INCLUDE_RE = re.compile(r'^\s*#\s*(?:pragma\s+)?include\s+["<]([^">]+)[">]', re.M)
+    _COMMENT_RE = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+    _DEFINED_NAME_RE = re.compile(r"^\s*#\s*define\s+([A-Za-z_]\w*)", re.M)
+    _IDENTIFIER_RE = re.compile(r"[A-Za-z_]\w*")
+
+    # Macros from render_pipeline_base.inc.glsl which construct the name of
+    # a define by token pasting, mapped to the names they read.
+    _PASTE_MACROS = {
+        "HAVE_PLUGIN": ("HAVE_PLUGIN_{0}",),
+        "GET_SETTING": ("{0}_{1}",),
+        "GET_ENUM_VALUE": ("enum_{0}_{1}_{2}",),
+        "ENUM_V_ACTIVE": ("HAVE_PLUGIN_{0}", "{0}_{1}", "enum_{0}_{1}_{2}"),
+        "MODE_ACTIVE": ("_RM_{0}",),
+        "SPECIAL_MODE_ACTIVE": ("_RM_{0}",),
+    }
+    _MACRO_CALL_RE = re.compile(r"\b(" + "|".join(_PASTE_MACROS) + r")\s*\(([^()]*)\)")
+
+    # Files which were modified less than this amount of seconds ago are always
+    # checked for changes by content, since the timestamps only have a resolution
+    # of one second. This mostly affects the generated shader configuration.
+    MIN_STAMP_AGE = 2.0
+
+    def __init__(self):
+        RPObject.__init__(self)
+        self._files = {}
+        self._included_by = {}
+        self._transitive = {}
+        self._generation = 0
+
+    def invalidate(self, filename=None):
+        """ Invalidates the cached information about a given file, so it gets
+        read again on the next access. If no filename is given, all files get
+        checked for modifications on their next access instead, and only the
+        files which changed are read again. """
+        if filename is None:
+            self._generation += 1
+            return
+        path = self.resolve(filename)
+        if path in self._files:
+            self._files[path]["stamp"] = None
+            self._files[path]["generation"] = -1
+
+    def resolve(self, filename, parent=None):
+        """ Resolves a shader filename to an absolute path on the VFS, the same
+        way the shader preprocessor does: Relative includes are first looked up
+        next to the including file, and then on the model path. Returns None if
+        the file could not be found. """
+        vfs = VirtualFileSystem.get_global_ptr()
+        handle = Filename(filename)
+        if parent is not None and handle.is_local():
+            sibling = Filename(Filename(parent).get_dirname(), filename)
+            if vfs.exists(sibling):
+                return sibling.get_fullpath()
+        if vfs.resolve_filename(handle, get_model_path().get_value()):
+            return handle.get_fullpath()
+        return None
+
+    def _get_stamp(self, path):
+        """ Returns the timestamp and size of a file, or None if the file does
+        not exist or was modified too recently to rely on its timestamp """
+        vfile = VirtualFileSystem.get_global_ptr().get_file(Filename(path), True)
+        if not vfile:
+            return None
+        timestamp = vfile.get_timestamp()
+        if time.time() - timestamp < self.MIN_STAMP_AGE:
+            return None
+        return timestamp, vfile.get_file_size()
+
+    def _get_file_info(self, path):
+        """ Internal method to return the cached information about a file,
+        reading and parsing the file if it changed since the last access """
+        entry = self._files.get(path)
+        if entry is not None and entry["generation"] == self._generation:
+            return entry
+
+        stamp = self._get_stamp(path)
+        if entry is not None and stamp is not None and entry["stamp"] == stamp:
+            entry["generation"] = self._generation
+            return entry
+
+        try:
+            with open(path, "r") as handle:
+                content = handle.read()
+        except IOError as msg:
+            self.warn("Could not read", path, ":", msg)
+            content = ""
+
+        content_hash = hashlib.md5(content.encode("utf-8")).hexdigest()
+        if entry is not None and entry["hash"] == content_hash:
+            entry["stamp"], entry["generation"] = stamp, self._generation
+            return entry
+
+        includes, identifiers = self._parse(path, content)
+        if entry is not None:
+            self._discard_dependents(path)
+            for include in entry["includes"]:
+                self._included_by.get(include, set()).discard(path)
+        for include in includes:
+            self._included_by.setdefault(include, set()).add(path)
+
+        self._files[path] = {
+            "stamp": stamp, "generation": self._generation, "hash": content_hash,
+            "includes": includes, "identifiers": identifiers}
+        return self._files[path]
+
+    def _parse(self, path, content):
+        """ Internal method to extract the direct includes and the identifiers
+        read by a file from its content """
+        content = self._COMMENT_RE.sub("", content)
+        includes = []
+        for include in self._INCLUDE_RE.findall(content):
+            include_path = self.resolve(include, path)
+            if include_path is not None:
+                includes.append(include_path)
+        content = self._INCLUDE_RE.sub("", content)
+
+        # A file defining a name does not read it, otherwise every shader would
+        # depend on every define through the shader config
+        identifiers = set(self._IDENTIFIER_RE.findall(self._DEFINED_NAME_RE.sub("", content)))
+        for macro, args in self._MACRO_CALL_RE.findall(content):
+            args = [arg.strip() for arg in args.split(",")]
+            for template in self._PASTE_MACROS[macro]:
+                try:
+                    identifiers.add(template.format(*args))
+                except IndexError:
+                    pass
+        return includes, identifiers
+
+    def _discard_dependents(self, path):
+        """ Discards the transitive results of a file and all files which
+        include it, called when the file changed """
+        self._transitive.pop(path, None)
+        for dependent in self.get_dependents(path):
+            self._transitive.pop(dependent, None)
+
+    def _get_transitive(self, filename):
+        """ Returns the transitive results of a file, which is a tuple of the
+        combined hash of the file and its includes, and the identifiers read
+        by them. The results are cached until one of the files changes. """
+        path = self.resolve(filename)
+        if path is None:
+            return "", frozenset()
+
+        # Validate all files first, since a changed file discards the
+        # cached results of all files including it
+        visited = set()
+        pending = [path]
+        while pending:
+            current = pending.pop()
+            if current not in visited:
+                visited.add(current)
+                pending.extend(self._get_file_info(current)["includes"])
+
+        if path not in self._transitive:
+            combined_hash = hashlib.md5()
+            identifiers = set()
+            for current in sorted(visited):
+                entry = self._files[current]
+                combined_hash.update((current + entry["hash"]).encode("utf-8"))
+                identifiers |= entry["identifiers"]
+            self._transitive[path] = combined_hash.hexdigest(), frozenset(identifiers)
+        return self._transitive[path]
+
+    def get_source_hash(self, filename):
+        """ Returns a hash of the content of the given file and all files it
+        includes, which changes whenever one of these files changes """
+        return self._get_transitive(filename)[0]
+
+    def get_identifiers(self, filename):
+        """ Returns the set of all identifiers read by the given shader file
+        and all files it includes """
+        return self._get_transitive(filename)[1]
+
+    def get_known_files(self):
+        """ Returns the paths of all files which were accessed so far """
+        return list(self._files)
+
+    def get_dependents(self, filename):
+        """ Returns the set of all files which include the given file, either
+        directly or through other includes. Only files which were accessed
+        through this class before are known. """
+        path = self.resolve(filename) or filename
+        dependents = set()
+        pending = [path]
+        while pending:
+            for dependent in self._included_by.get(pending.pop(), ()):
+                if dependent not in dependents:
+                    dependents.add(dependent)
+                    pending.append(dependent)
+        return dependents
+
+    def uses_any(self, filenames, names):
+        """ Returns whether any of the given shader files reads any of the
+        given names, e.g. defines """
+        names = set(names)
+        return any(not names.isdisjoint(self.get_identifiers(f)) for f in filenames)
@@ -0,0 +1,97 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+
+from panda3d.core import Filename, VirtualFileSystem
+
+from rpcore.globals import Globals
+from rpcore.rpobject import RPObject
+from rpcore.effect import Effect
+
+__all__ = ("ShaderWatcher",)
+
+
+class ShaderWatcher(RPObject):
+
+    """ Polls the timestamps of all shader files used by the pipeline, as
+    well as the files of the loaded effects, and tells the pipeline to reload
+    the stages and effects affected by a modified file. Only files which were
+    loaded before are watched, which are exactly the files which can affect
+    the current shaders. """
+
+    # Interval in seconds between two polls
+    POLL_INTERVAL = 0.5
+
+    # Generated files are written by the pipeline itself, which takes care of
+    # reloading the affected shaders
+    IGNORED_PREFIXES = ("/$$rptemp/", "/$$rpcache/")
+
+    def __init__(self, pipeline):
+        RPObject.__init__(self)
+        self._pipeline = pipeline
+        self._stamps = {}
+        self._poll()
+        Globals.base.doMethodLater(self.POLL_INTERVAL, self._poll_task, "RP_WatchShaderFiles")
+        self.debug("Watching shader files for modifications")
+
+    def _get_watched_files(self):
+        """ Returns the set of paths of all files to watch """
+        deps = self._pipeline.shader_deps
+        files = set(deps.get_known_files())
+        for filename in Effect.get_template_sources():
+            files.add(deps.resolve(filename))
+        for effect in Effect.get_loaded_effects():
+            files.add(deps.resolve(effect.filename))
+        files.discard(None)
+        return [i for i in files if not i.startswith(self.IGNORED_PREFIXES)]
+
+    def _poll(self):
+        """ Checks all watched files for modifications, and returns the list
+        of modified files. Files seen for the first time are not reported. """
+        vfs = VirtualFileSystem.get_global_ptr()
+        modified = []
+
+        # Files which are no longer used are dropped from the stamps
+        stamps = {}
+        for path in self._get_watched_files():
+            vfile = vfs.get_file(Filename(path), True)
+            stamp = (vfile.get_timestamp(), vfile.get_file_size()) if vfile else None
+            if path in self._stamps and self._stamps[path] != stamp:
+                modified.append(path)
+            stamps[path] = stamp
+        self._stamps = stamps
+        return modified
+
+    def _poll_task(self, task):
+        """ Task which polls the watched files and reloads the affected shaders """
+        modified = self._poll()
+        if modified:
+            self.debug("Detected modified files:", ", ".join(modified))
+            self._pipeline.reload_shaders_using_files(modified)
+
+            # Reloading might load new files, make sure they get watched too
+            self._poll()
+        return task.again
@@ -34,8 +34,18 @@ class SmoothConnectedCurve(object):
     """ Interface to a curve which also manages connecting the end of the
     curve with the beginning. """
 
+    # Total amount of curve builds. Each build assigns the next number as
+    # version to the curve, so it is possible to detect whether any curve
+    # changed by just comparing this counter.
+    num_builds = 0
+
+    # Amount of samples the curve gets baked to, see get_baked_value
+    SAMPLES = 1024
+
     def __init__(self):
         self._curve = None
+        self._samples = None
+        self._version = 0
         self._modified = False
         self._border_points = 1
         self._color = (0, 0, 0)
@@ -47,6 +57,11 @@ class SmoothConnectedCurve(object):
         """ Returns whether the curve was modified since the creation """
         return self._modified
 
+    @property
+    def version(self):
+        """ Returns a number which changes whenever the curve is rebuilt """
+        return self._version
+
     @property
     def control_points(self):
         """ Returns a list of all controll points """
@@ -119,10 +134,14 @@ class SmoothConnectedCurve(object):
         fitter.compute_tangents(1.0)
 
         self._curve = fitter.make_hermite()
+        self._samples = None
+        SmoothConnectedCurve.num_builds += 1
+        self._version = SmoothConnectedCurve.num_builds
 
     def set_cv_value(self, index, x_value, y_value):
         """ Updates the cv point at the given index """
         self._cv_points[index] = [x_value, y_value]
+        self._samples = None
         self._modified = True
 
     def get_value(self, offset):
@@ -133,6 +152,49 @@ class SmoothConnectedCurve(object):
         self._curve.evaluate_xyz(offset, point)
         return max(0.0, min(1.0, point.y))
 
+    @staticmethod
+    def get_values(curves, offset):
+        """ Returns the exact values of all given curves at the same offset,
+        see get_value """
+        point = Vec3(0)
+        values = []
+        for curve in curves:
+            curve._curve.evaluate_xyz(offset, point)  # pylint: disable=protected-access
+            values.append(max(0.0, min(1.0, point.y)))
+        return values
+
+    def get_baked_value(self, offset):
+        """ Returns the same value as get_value, but linearly interpolated from
+        a table of samples. The table gets baked the first time a value is
+        queried after the curve or any of its control points changed. The
+        offset gets clamped to the range 0 .. 1. """
+        return self.get_baked_values((self,), offset)[0]
+
+    @staticmethod
+    def get_baked_values(curves, offset):
+        """ Returns the baked values of all given curves at the same offset, see
+        get_baked_value. This is faster than calling get_baked_value on each
+        curve, since the sample position only has to be computed once. """
+        position = max(0.0, min(1.0, offset)) * SmoothConnectedCurve.SAMPLES
+        index = min(int(position), SmoothConnectedCurve.SAMPLES - 1)
+        weight = position - index
+        values = []
+        for curve in curves:
+            samples = curve._samples or curve._bake_samples()  # pylint: disable=protected-access
+            values.append(samples[index] + (samples[index + 1] - samples[index]) * weight)
+        return values
+
+    def _bake_samples(self):
+        """ Internal method to evaluate the curve at equally spaced offsets.
+        The table stores one additional sample for the offset 1.0 """
+        point = Vec3(0)
+        samples = []
+        for i in range(self.SAMPLES + 1):
+            self._curve.evaluate_xyz(i / float(self.SAMPLES), point)
+            samples.append(max(0.0, min(1.0, point.y)))
+        self._samples = samples
+        return samples
+
     def serialize(self):
         """ Returns the value of the curve as yaml list """
         points = ["[{:5.10f},{:5.10f}]".format(float(a), float(b)) for a, b in self._cv_points]
@@ -0,0 +1,142 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from __future__ import print_function, division
+
+import time
+import json
+from contextlib import contextmanager
+
+from direct.stdpy.file import open
+from rpcore.rpobject import RPObject
+
+__all__ = ("StartupProfiler",)
+
+# Use the high resolution clocks if available, the fallbacks are for python 2
+WALL_CLOCK = getattr(time, "perf_counter", time.time)
+CPU_CLOCK = getattr(time, "process_time", None) or time.clock
+
+
+class StartupProfiler(RPObject):
+
+    """ Records the wall and cpu time of the phases of the pipeline startup,
+    like plugin loading, stage setup, the plugin hooks and resource loading.
+    Phases can be nested, and the results can either be printed as tree, or
+    written as trace file which can be viewed in chrome://tracing. """
+
+    def __init__(self):
+        RPObject.__init__(self)
+        self._origin = WALL_CLOCK()
+        self._root = self._make_phase("Startup", 0)
+        self._stack = [self._root]
+
+    def _make_phase(self, name, depth):
+        """ Internal method to construct a new phase """
+        return {"name": name, "depth": depth, "start": WALL_CLOCK() - self._origin,
+                "cpu_start": CPU_CLOCK(), "wall": None, "cpu": None, "children": []}
+
+    @property
+    def is_active(self):
+        """ Returns whether any phase is currently recorded """
+        return len(self._stack) > 1
+
+    def begin(self, name):
+        """ Starts a new phase, which is nested into the current phase """
+        parent = self._stack[-1]
+        phase = self._make_phase(name, parent["depth"] + 1)
+        parent["children"].append(phase)
+        self._stack.append(phase)
+
+    def end(self):
+        """ Finishes the last started phase """
+        if not self.is_active:
+            self.warn("end() called without a matching begin()")
+            return
+        phase = self._stack.pop()
+        phase["wall"] = WALL_CLOCK() - self._origin - phase["start"]
+        phase["cpu"] = CPU_CLOCK() - phase["cpu_start"]
+
+    @contextmanager
+    def phase(self, name):
+        """ Context manager which records the contained code as phase """
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def get_phases(self):
+        """ Returns a flat list of all finished phases in the order they were
+        started. Each entry stores the name, nesting depth, start time and
+        the wall and cpu durations in seconds. """
+        result = []
+
+        def collect(phase):
+            for child in phase["children"]:
+                if child["wall"] is not None:
+                    result.append({k: child[k] for k in ("name", "depth", "start", "wall", "cpu")})
+                    collect(child)
+        collect(self._root)
+        return result
+
+    def format_tree(self, min_duration=0.0):
+        """ Returns the recorded phases as indented text, one phase per line.
+        Phases shorter than min_duration (in seconds) are omitted, including
+        their children. """
+        lines = ["{:>10} {:>10}   {}".format("Wall ms", "CPU ms", "Phase")]
+        skip_depth = None
+        for phase in self.get_phases():
+            if skip_depth is not None and phase["depth"] > skip_depth:
+                continue
+            skip_depth = None
+            if phase["wall"] < min_duration:
+                skip_depth = phase["depth"]
+                continue
+            lines.append("{:10.2f} {:10.2f}   {}{}".format(
+                phase["wall"] * 1000.0, phase["cpu"] * 1000.0,
+                "  " * (phase["depth"] - 1), phase["name"]))
+        return "\n".join(lines)
+
+    def print_tree(self, min_duration=0.001):
+        """ Prints the recorded phases, see format_tree """
+        print(self.format_tree(min_duration))
+
+    def get_chrome_trace(self):
+        """ Returns the recorded phases in the chrome trace event format """
+        events = []
+        for phase in self.get_phases():
+            events.append({
+                "name": phase["name"], "ph": "X", "pid": 0, "tid": 0,
+                "ts": phase["start"] * 1e6, "dur": phase["wall"] * 1e6,
+                "args": {"cpu_ms": phase["cpu"] * 1000.0}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, filename):
+        """ Writes the recorded phases to the given file in the chrome trace
+        event format """
+        with open(filename, "w") as handle:
+            json.dump(self.get_chrome_trace(), handle, indent=1)
+        self.debug("Wrote startup trace to", filename)
@@ -32,46 +32,124 @@ class TaskScheduler(RPObject):
 
     """ This class manages the scheduled tasks and splits them over multiple
     frames. Plugins can query whether their subtasks should be executed
-    or queued for later frames. Also performs analysis on the task configuration
-    to figure if tasks are distributed uniformly. """
+    or queued for later frames.
+
+    Tasks are grouped into chains, whose tasks run in order in consecutive
+    frames. Each frame, the scheduler picks the next task of the chains which
+    waited the longest, as long as the estimated cost of all picked tasks fits
+    into the frame budget. The costs are fixed estimates from the configuration,
+    they are not measured at runtime, since most of the work of a task is
+    rendering, which happens on the GPU after the task was started.
+
+    For compatibility, a fixed list of frame cycles is supported as well,
+    which is simply repeated. """
 
     def __init__(self, pipeline):
         RPObject.__init__(self)
         self._pipeline = pipeline
-        self._tasks = []
+        self._chains = []
+        self._task_chains = {}
+        self._costs = {}
+        self._frame_cycles = None
+        self._frame_budget = 0.0
         self._frame_index = 0
+        self._scheduled = frozenset()
         self._load_config()
+        self._schedule_frame()
 
     def _load_config(self):
         """ Loads the tasks distribution configuration """
-        config = load_yaml_file("/$$rpconfig/task-scheduler.yaml")["frame_cycles"]
-        for frame_name, tasks in config:  # pylint: disable=unused-variable
-            self._tasks.append(tasks)
-
-    def _check_missing_schedule(self, task_name):
-        """ Checks whether the given task is scheduled at some point. This can
-        be used to check whether any task is missing in the task scheduler config. """
-        for tasks in self._tasks:
-            if task_name in tasks:
-                break
-        else:
-            self.error("Task '" + task_name + "' is never scheduled and thus will never run!")
+        config = load_yaml_file("/$$rpconfig/task-scheduler.yaml")
+        if "task_chains" not in config:
+            self._frame_cycles = [frozenset(tasks or []) for _, tasks in config["frame_cycles"]]
+            for tasks in self._frame_cycles:
+                for task_name in tasks:
+                    self._costs[task_name] = 0.0
+            return
+
+        self._frame_budget = float(config["frame_budget"])
+        for chain_name, chain_config in config["task_chains"] or []:
+            chain = {"name": chain_name, "tasks": [], "interval": chain_config["interval"],
+                     "position": 0, "start_frame": 0, "ready_frame": 0}
+            for task_name, cost in chain_config["tasks"]:
+                chain["tasks"].append(task_name)
+                self._task_chains[task_name] = chain
+                self._costs[task_name] = float(cost)
+            self._chains.append(chain)
+
+    def _report_missing_schedule(self, task_name):
+        """ Reports a task which is not part of the configuration. The task is
+        registered afterwards, so it is only reported once. """
+        self.error("Task '" + task_name + "' is never scheduled and thus will never run!")
+        self._costs[task_name] = 0.0
 
     def is_scheduled(self, task_name):
         """ Returns whether a given task is supposed to run this frame """
-        self._check_missing_schedule(task_name)
-        return task_name in self._tasks[self._frame_index]
+        if task_name in self._scheduled:
+            return True
+        if task_name not in self._costs:
+            self._report_missing_schedule(task_name)
+        return False
+
+    def skip_chain(self, task_name):
+        """ Tells the scheduler that the chain containing the given task has
+        nothing to do. The remaining tasks of the chain are skipped, and the
+        chain gets restarted after its interval, so other tasks can use the
+        frame budget in the meantime. """
+        chain = self._task_chains.get(task_name)
+        if chain is not None and chain["position"] != 0:
+            chain["position"] = 0
+            chain["ready_frame"] = chain["start_frame"] + chain["interval"]
 
     def step(self):
         """ Advances one frame """
-        self._frame_index = (self._frame_index + 1) % len(self._tasks)
+        self._frame_index += 1
+        self._schedule_frame()
+
+    def _schedule_frame(self):
+        """ Selects the tasks to run in the current frame """
+        if self._frame_cycles is not None:
+            self._scheduled = self._frame_cycles[self._frame_index % len(self._frame_cycles)]
+            return
+
+        frame = self._frame_index
+        ready_chains = [chain for chain in self._chains if chain["ready_frame"] <= frame]
+        ready_chains.sort(key=lambda chain: chain["ready_frame"])
+
+        scheduled = set()
+        frame_cost = 0.0
+        for chain in ready_chains:
+            task_name = chain["tasks"][chain["position"]]
+            cost = self._costs[task_name]
+
+            # Always run at least one task per frame, even if it exceeds the
+            # budget on its own, otherwise expensive tasks would never run
+            if scheduled and frame_cost + cost > self._frame_budget:
+                continue
+            scheduled.add(task_name)
+            frame_cost += cost
+
+            if chain["position"] == 0:
+                chain["start_frame"] = frame
+            chain["position"] += 1
+            if chain["position"] >= len(chain["tasks"]):
+                chain["position"] = 0
+                chain["ready_frame"] = max(frame + 1, chain["start_frame"] + chain["interval"])
+            else:
+                chain["ready_frame"] = frame + 1
+
+        self._scheduled = frozenset(scheduled)
+
+    def get_task_cost(self, task_name):
+        """ Returns the configured cost estimate of a task in milliseconds """
+        return self._costs.get(task_name, 0.0)
 
     @property
     def num_tasks(self):
         """ Returns the total amount of tasks """
-        return sum((len(i) for i in self._tasks))
+        return len(self._costs)
 
     @property
     def num_scheduled_tasks(self):
         """ Returns the amount of scheduled tasks this frame """
-        return len(self._tasks[self._frame_index])
+        return len(self._scheduled)
@@ -4,32 +4,168 @@ Main PyYAML importer script. Provides functions to load YAML files as dictionari
 
 """
 
-from __future__ import print_function
+from __future__ import print_function, absolute_import
 
+import io
 import sys
+import time
+import pickle
+import hashlib
 import collections
+from panda3d.core import VirtualFileSystem, Filename
 from direct.stdpy.file import open
 from rpcore.rpobject import RPObject
 
-# Import different PyYaml versions depending on the used python version
-if sys.version_info < (3, 0):
-    from .yaml_py2 import load as yaml_load
-    from .yaml_py2 import YAMLError, SafeLoader
-else:
-    from .yaml_py3 import load as yaml_load
-    from .yaml_py3 import YAMLError, SafeLoader
+# Prefer the libyaml based loader of an installed PyYAML, it parses several
+# times faster than the bundled pure python version.
+try:
+    from yaml import load as yaml_load
+    from yaml import YAMLError, CSafeLoader as SafeLoader
+except ImportError:
+    # Import different PyYaml versions depending on the used python version
+    if sys.version_info < (3, 0):
+        from .yaml_py2 import load as yaml_load
+        from .yaml_py2 import YAMLError, SafeLoader
+    else:
+        from .yaml_py3 import load as yaml_load
+        from .yaml_py3 import YAMLError, SafeLoader
+
+__all__ = ["load_yaml_file", "load_yaml_file_flat", "clear_yaml_cache", "set_yaml_cache_dir"]
+
+# Directory where parsed files are stored between runs. This stays None until
+# the MountManager mounted the pipeline cache, so no pickles are ever read from
+# a directory which the pipeline did not set up itself.
+YAML_CACHE_DIR = None
+
+# Files which were modified less than this amount of seconds ago are not
+# cached, since the file timestamps only have a resolution of one second,
+# and a change within that second would not be detected otherwise.
+YAML_CACHE_MIN_AGE = 2.0
+
+# Pickled parse results of the files loaded so far, stored by filename as
+# (timestamp, size, pickled data). The results are kept pickled, so each
+# caller receives its own copy which it can modify.
+_PARSE_CACHE = {}
+
+
+def clear_yaml_cache():
+    """ Clears the in-memory cache of parsed yaml files. The cache files on
+    disk are invalidated automatically when the source file changes. """
+    _PARSE_CACHE.clear()
+
+
+def set_yaml_cache_dir(cache_dir):
+    """ Sets the directory where parse results are stored between runs, or
+    None to only cache them in memory. This is called by the MountManager
+    once it mounted the pipeline cache. """
+    global YAML_CACHE_DIR  # pylint: disable=global-statement
+    YAML_CACHE_DIR = cache_dir
+
+
+class _SafeUnpickler(pickle.Unpickler):
+
+    """ Unpickler which only allows the types which the safe yaml loader can
+    produce, so a modified cache file can not execute code """
+
+    ALLOWED_CLASSES = {
+        ("builtins", "set"), ("builtins", "frozenset"),
+        ("__builtin__", "set"), ("__builtin__", "frozenset"),
+        ("datetime", "date"), ("datetime", "datetime"), ("datetime", "timedelta"),
+    }
+
+    def find_class(self, module, name):
+        if (module, name) not in self.ALLOWED_CLASSES:
+            raise pickle.UnpicklingError("Forbidden class in cache file: {}.{}".format(
+                module, name))
+        return pickle.Unpickler.find_class(self, module, name)
+
+
+def _safe_unpickle(data):
+    """ Unpickles data which was written by _store_cached """
+    return _SafeUnpickler(io.BytesIO(data)).load()
+
+
+def _get_file_stamp(filename):
+    """ Returns the full path, timestamp and size of the given file, or None
+    if the file does not exist or was modified too recently to get cached """
+    vfile = VirtualFileSystem.get_global_ptr().get_file(Filename(filename), True)
+    if not vfile:
+        return None
+    timestamp = vfile.get_timestamp()
+    if time.time() - timestamp < YAML_CACHE_MIN_AGE:
+        return None
+    return vfile.get_filename().get_fullpath(), timestamp, vfile.get_file_size()
+
+
+def _get_cache_file(fullpath):
+    """ Returns the path of the file storing the parse result of the given
+    yaml file on disk, or None if there is no cache directory """
+    if YAML_CACHE_DIR is None or \
+            not VirtualFileSystem.get_global_ptr().is_directory(YAML_CACHE_DIR):
+        return None
+    path_hash = hashlib.md5(fullpath.encode("utf-8")).hexdigest()
+    return "{}/$$yaml-{}-py{}.pickle".format(YAML_CACHE_DIR, path_hash, sys.version_info[0])
+
+
+def _load_cached(stamp):
+    """ Returns the pickled parse result of the file with the given stamp,
+    either from memory or from the disk cache, or None on a cache miss """
+    fullpath, timestamp, size = stamp
+    entry = _PARSE_CACHE.get(fullpath)
+    if entry is not None and entry[:2] == (timestamp, size):
+        return entry[2]
+
+    cache_file = _get_cache_file(fullpath)
+    if cache_file is None:
+        return None
+
+    # The cache file might be truncated, from an older version or otherwise
+    # invalid, in which case the yaml file simply gets parsed again
+    try:
+        with open(cache_file, "rb") as handle:
+            entry = _safe_unpickle(handle.read())
+        cached_timestamp, cached_size, data = entry
+        if (cached_timestamp, cached_size) != (timestamp, size):
+            return None
+        _safe_unpickle(data)
+    except Exception:  # pylint: disable=broad-except
+        return None
+    _PARSE_CACHE[fullpath] = entry
+    return data
+
+
+def _store_cached(stamp, parsed_yaml):
+    """ Stores the parse result of the file with the given stamp in memory
+    and in the disk cache """
+    fullpath, timestamp, size = stamp
+    entry = (timestamp, size, pickle.dumps(parsed_yaml, pickle.HIGHEST_PROTOCOL))
+    _PARSE_CACHE[fullpath] = entry
+
+    cache_file = _get_cache_file(fullpath)
+    if cache_file is None:
+        return
+    try:
+        with open(cache_file, "wb") as handle:
+            handle.write(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+    except IOError as msg:
+        RPObject.global_warn("YAMLLoader", "Failed to write cache file:", msg)
 
-__all__ = ["load_yaml_file", "load_yaml_file_flat"]
 
 def load_yaml_file(filename):
-    """ This method is a wrapper arround yaml_load, and provides error checking """
+    """ This method is a wrapper arround yaml_load, and provides error checking.
+    Parse results are cached based on the file timestamp and size, so
+    unchanged files are only parsed once. """
+    stamp = _get_file_stamp(filename)
+    if stamp is not None:
+        cached = _load_cached(stamp)
+        if cached is not None:
+            return _safe_unpickle(cached)
 
-    import time
-    start = time.clock()
+    start = time.time()
 
     try:
         with open(filename, "r") as handle:
-            parsed_yaml = yaml_load(handle, Loader=SafeLoader)
+            parsed_yaml = yaml_load(handle.read(), Loader=SafeLoader)
     except IOError as msg:
         RPObject.global_error("YAMLLoader", "Could not find or open file:", filename)
         RPObject.global_error("YAMLLoader", msg)
@@ -39,11 +175,14 @@ def load_yaml_file(filename):
         RPObject.global_error("YAMLLoader", msg)
         raise Exception("Failed to load YAML file: Invalid syntax")
 
-    duration = (time.clock() - start) * 1000.0
+    duration = (time.time() - start) * 1000.0
 
     # Optionally print out profiling information
     # print("Took", round(duration, 2), "ms to load", filename)
 
+    if stamp is not None:
+        _store_cached(stamp, parsed_yaml)
+
     return parsed_yaml
 
 def __flatten(d, parent_key=''):
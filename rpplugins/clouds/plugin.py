@@ -50,24 +50,26 @@ class Plugin(BasePlugin):
         self.apply_stage = self.create_stage(ApplyCloudsStage)
 
     def on_pipeline_created(self):
-        # High-res noise
-        noise1 = RPLoader.load_texture(self.get_resource("noise1-data.txo"))
-        noise1.set_wrap_u(SamplerState.WM_repeat)
-        noise1.set_wrap_v(SamplerState.WM_repeat)
-        noise1.set_wrap_w(SamplerState.WM_repeat)
-        noise1.set_minfilter(SamplerState.FT_linear_mipmap_linear)
-        self.apply_stage.set_shader_input("Noise1", noise1)
-
-        # Low-res noise
-        noise2 = RPLoader.load_texture(self.get_resource("noise2-data.txo"))
-        noise2.set_wrap_u(SamplerState.WM_repeat)
-        noise2.set_wrap_v(SamplerState.WM_repeat)
-        noise2.set_wrap_w(SamplerState.WM_repeat)
-        noise2.set_minfilter(SamplerState.FT_linear_mipmap_linear)
-        self.apply_stage.set_shader_input("Noise2", noise2)
+        # High-res and low-res noise
+        RPLoader.load_texture_async(self.get_resource("noise1-data.txo")).add_done_callback(
+            lambda noise: self._set_noise("Noise1", noise))
+        RPLoader.load_texture_async(self.get_resource("noise2-data.txo")).add_done_callback(
+            lambda noise: self._set_noise("Noise2", noise))
 
         # Weather tex
-        weather = RPLoader.load_texture(self.get_resource("weather_tex.png"))
+        RPLoader.load_texture_async(self.get_resource("weather_tex.png")).add_done_callback(
+            self._set_weather)
+
+    def _set_noise(self, name, noise):
+        """ Applies a noise texture once it finished loading """
+        noise.set_wrap_u(SamplerState.WM_repeat)
+        noise.set_wrap_v(SamplerState.WM_repeat)
+        noise.set_wrap_w(SamplerState.WM_repeat)
+        noise.set_minfilter(SamplerState.FT_linear_mipmap_linear)
+        self.apply_stage.set_shader_input(name, noise)
+
+    def _set_weather(self, weather):
+        """ Applies the weather texture once it finished loading """
         weather.set_wrap_u(SamplerState.WM_repeat)
         weather.set_wrap_v(SamplerState.WM_repeat)
         self.apply_stage.set_shader_input("WeatherTex", weather)
@@ -77,8 +77,11 @@ class Plugin(BasePlugin):
 
     def load_grain(self):
         """ Loads the precomputed film grain """
-        grain_tex = RPLoader.load_texture(
-            "/$$rp/data/film_grain/grain.txo")
+        RPLoader.load_texture_async("/$$rp/data/film_grain/grain.txo").add_done_callback(
+            self._set_grain)
+
+    def _set_grain(self, grain_tex):
+        """ Applies the film grain once it finished loading """
         grain_tex.set_minfilter(SamplerState.FT_linear)
         grain_tex.set_magfilter(SamplerState.FT_linear)
         grain_tex.set_wrap_u(SamplerState.WM_repeat)
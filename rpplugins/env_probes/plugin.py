@@ -108,4 +108,6 @@ class Plugin(BasePlugin):
                         probe.bounds.get_center(), probe.bounds.get_radius()
                     )
             else:
+                # Nothing to capture, let other tasks use the frame budget
                 self.capture_stage.active = False
+                self._pipeline.task_scheduler.skip_chain("envprobes_select_and_cull")
@@ -25,11 +25,12 @@ THE SOFTWARE.
 """
 
 import math
+import hashlib
 
 from rplibs.six.moves import range  # pylint: disable=import-error
 from rplibs.six import iteritems, itervalues
 
-from direct.stdpy.file import listdir, isfile, join
+from direct.stdpy.file import listdir, isfile, join, open
 from panda3d.core import SamplerState, ShaderAttrib, NodePath
 
 from rpcore.globals import Globals
@@ -99,6 +100,7 @@ class ScatteringMethodEricBruneton(ScatteringMethod):
         self.sky_w, self.sky_h = 64 * 4, 16 * 4
         self.res_r, self.res_mu, self.res_mu_s, self.res_nu = 32, 128, 32, 8
         self.res_mu_s_nu = self.res_mu_s * self.res_nu
+        self.computed_hash = None
 
         self.create_shaders()
         self.create_textures()
@@ -156,7 +158,82 @@ class ScatteringMethodEricBruneton(ScatteringMethod):
         Globals.base.graphicsEngine.dispatch_compute(
             (ntx, nty, ntz), attr, Globals.base.win.gsg)
 
+    def generate_precompute_hash(self):
+        """ Generates a hash over everything affecting the precomputed textures,
+        that is the texture sizes, the precompute shaders and the shader
+        autoconfig, which contains the scattering settings """
+        hasher = hashlib.md5()
+        hasher.update(repr((self.use_32_bit, self.trans_w, self.trans_h, self.sky_w,
+                            self.sky_h, self.res_r, self.res_mu, self.res_mu_s,
+                            self.res_nu)).encode("utf-8"))
+        resource_path = self.handle.get_shader_resource("eric_bruneton")
+        sources = [join(resource_path, fname) for fname in sorted(listdir(resource_path))]
+        sources.append("/$$rptemp/$$pipeline_shader_config.inc.glsl")
+        for fpath in sources:
+            if isfile(fpath):
+                with open(fpath, "rb") as handle:
+                    hasher.update(handle.read())
+        return hasher.hexdigest()
+
+    def get_cache_path(self, name):
+        """ Returns the path of a cached precomputed texture """
+        return "/$$rpcache/$$scattering-" + name
+
+    def load_from_cache(self, precompute_hash):
+        """ Loads the precomputed textures from the cache, in case they were
+        stored with the same precompute hash. Returns whether the textures
+        could be loaded. """
+        hash_path = self.get_cache_path("hash.txt")
+        if not isfile(hash_path):
+            return False
+        with open(hash_path, "r") as handle:
+            if handle.read().strip() != precompute_hash:
+                return False
+        for name in self.cached_textures:
+            if not self.textures[name].read(self.get_cache_path(name + ".txo")):
+                self.warn("Failed to read cached", name, "texture")
+                return False
+        return True
+
+    def write_to_cache(self, precompute_hash):
+        """ Writes the precomputed textures to the cache. The hash gets written
+        last, so an interrupted write never leaves a valid looking cache """
+        for name in self.cached_textures:
+            tex = self.textures[name]
+            Globals.base.graphicsEngine.extract_texture_data(tex, Globals.base.win.gsg)
+            if not tex.write(self.get_cache_path(name + ".txo")):
+                self.warn("Failed to write", name, "texture to the cache")
+                return
+        with open(self.get_cache_path("hash.txt"), "w") as handle:
+            handle.write(precompute_hash)
+
+    @property
+    def cached_textures(self):
+        """ Returns the names of the textures which are used for rendering, and
+        thus have to be stored in the cache """
+        return ("transmittance", "irradiance", "inscatter")
+
     def compute(self):
+        """ Precomputes the scattering, or loads the precomputed textures from
+        the cache, in case nothing changed since they were computed """
+        precompute_hash = self.generate_precompute_hash()
+        if precompute_hash == self.computed_hash:
+            self.debug("Scattering is still up to date")
+        elif self.load_from_cache(precompute_hash):
+            self.debug("Loaded precomputed scattering from cache")
+        else:
+            self.precompute()
+            self.write_to_cache(precompute_hash)
+        self.computed_hash = precompute_hash
+
+        # Make stages available
+        for stage in [self.handle.display_stage, self.handle.envmap_stage]:
+            stage.set_shader_inputs(
+                InscatterSampler=self.textures["inscatter"],
+                transmittanceSampler=self.textures["transmittance"],
+                IrradianceSampler=self.textures["irradiance"])
+
+    def precompute(self):
         """ Precomputes the scattering """
 
         self.debug("Precomputing ...")
@@ -245,10 +322,3 @@ class ScatteringMethodEricBruneton(ScatteringMethod):
                     "deltaSSampler": self.textures["delta_sr"],
                     "dest": self.textures["inscatter"]
                 }, (self.res_mu_s_nu, self.res_mu, self.res_r), (8, 8, 8))
-
-        # Make stages available
-        for stage in [self.handle.display_stage, self.handle.envmap_stage]:
-            stage.set_shader_inputs(
-                InscatterSampler=self.textures["inscatter"],
-                transmittanceSampler=self.textures["transmittance"],
-                IrradianceSampler=self.textures["irradiance"])
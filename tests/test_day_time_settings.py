@@ -0,0 +1,99 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+from rpcore.pluginbase.day_manager import DayTimeManager
+from rpcore.pluginbase.day_setting_types import ScalarType
+from rpcore.util.smooth_connected_curve import SmoothConnectedCurve
+
+
+class LinearCurve(object):
+
+    """ Curve which returns the clamped offset as value """
+
+    version = 1
+
+    def get_value(self, offset):
+        return max(0.0, min(1.0, offset))
+
+
+class DummySetting(object):
+
+    def __init__(self):
+        self.num_lookups = 0
+
+    def get_baked_value_at(self, offset):
+        self.num_lookups += 1
+        return offset
+
+
+class DummyInputBlock(object):
+
+    def __init__(self):
+        self.updates = []
+
+    def update_input(self, name, value):
+        self.updates.append((name, value))
+
+
+def make_scalar_setting():
+    setting = ScalarType({
+        "type": "scalar", "label": "Test", "description": "Test setting",
+        "range": (0.0, 10.0), "default": 5.0})
+    setting.curves = [LinearCurve()]
+    return setting
+
+
+def test_baked_value_is_clamped():
+    setting = make_scalar_setting()
+    assert setting.get_baked_value_at(0.5) == pytest.approx(5.0)
+    assert setting.get_baked_value_at(1.0) == pytest.approx(10.0)
+    assert setting.get_baked_value_at(1.5) == pytest.approx(10.0)
+    assert setting.get_baked_value_at(-0.5) == pytest.approx(0.0)
+
+
+def test_update_skips_unchanged_values(monkeypatch):
+    # pylint: disable=protected-access
+    mgr = DayTimeManager(None)
+    mgr._input_ubo = DummyInputBlock()
+    setting = DummySetting()
+    mgr._setting_handles = {"plugin.setting": setting}
+
+    mgr.update()
+    mgr.update()
+    assert mgr._input_ubo.updates == [("plugin.setting", 0.5)]
+
+    mgr.time = 0.75
+    mgr.update()
+    mgr.update()
+    assert mgr._input_ubo.updates[-1] == ("plugin.setting", 0.75)
+    assert setting.num_lookups == 2
+
+    # Rebuilding any curve updates the values again
+    monkeypatch.setattr(SmoothConnectedCurve, "num_builds", SmoothConnectedCurve.num_builds + 1)
+    mgr.update()
+    assert setting.num_lookups == 3
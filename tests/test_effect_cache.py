@@ -0,0 +1,100 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+import rpcore.effect
+from rpcore.effect import Effect
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    effect_src = tmp_path / "effect.yaml"
+    effect_src.write_text(u"fragment:\n    main: |\n        int a;\n")
+    template_src = tmp_path / "template.frag.glsl"
+    template_src.write_text(u"void main() {}\n")
+    monkeypatch.setattr(Effect, "get_template_sources",
+                        classmethod(lambda cls: [str(template_src)]))
+    monkeypatch.setattr(Effect, "_TEMPLATE_HASH", None)
+    return str(effect_src), template_src
+
+
+def content_hash(filename, options):
+    # pylint: disable=protected-access
+    effect = Effect()
+    effect.set_options(options)
+    effect.effect_hash = Effect._generate_hash(filename, options)
+    return effect._generate_content_hash(filename)
+
+
+def test_content_hash_is_stable(sources):
+    filename, _ = sources
+    assert content_hash(filename, {}) == content_hash(filename, {})
+    assert content_hash(filename, {}) != content_hash(filename, {"render_gbuffer": False})
+
+
+def test_content_hash_changes_with_sources(sources):
+    filename, template_src = sources
+    initial_hash = content_hash(filename, {})
+
+    with open(filename, "a") as handle:
+        handle.write("\n")
+    effect_hash = content_hash(filename, {})
+    assert effect_hash != initial_hash
+
+    # The template hash is only computed again after invalidating it
+    template_src.write_text(u"void main() { }\n")
+    assert content_hash(filename, {}) == effect_hash
+    Effect.invalidate_templates()
+    assert content_hash(filename, {}) not in (initial_hash, effect_hash)
+
+
+class DummyVFS(object):
+
+    def __init__(self):
+        self.deleted = []
+
+    def delete_file(self, path):
+        self.deleted.append(path)
+
+
+def test_clear_cache_prunes_unused_shaders(monkeypatch):
+    vfs = DummyVFS()
+    monkeypatch.setattr(rpcore.effect.VirtualFileSystem, "get_global_ptr", lambda: vfs)
+    monkeypatch.setattr(rpcore.effect, "listdir", lambda path: [
+        "$$effect-used@vertex-gbuffer@1.glsl",
+        "$$effect-old@vertex-gbuffer@0.glsl",
+        "other-shader.glsl",
+    ])
+
+    effect = Effect()
+    effect._generated_shader_paths = {  # pylint: disable=protected-access
+        "vertex-gbuffer": "/$$rpcache/$$effect-used@vertex-gbuffer@1.glsl"}
+    monkeypatch.setattr(Effect, "_GLOBAL_CACHE", {"used": effect})
+
+    Effect.clear_cache()
+    assert vfs.deleted == ["/$$rpcache/$$effect-old@vertex-gbuffer@0.glsl"]
+    assert Effect.get_loaded_effects() == []
@@ -0,0 +1,97 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from array import array
+
+from panda3d.core import Vec3
+
+from rpcore.pynative.gpu_command import GPUCommand, GPU_COMMAND_ENTRIES
+from rpcore.pynative.gpu_command_list import GPUCommandList
+
+
+def make_command(slot, value):
+    cmd = GPUCommand(GPUCommand.CMD_store_light)
+    cmd.push_int(slot)
+    cmd.push_vec3(Vec3(value, value + 1, value + 2))
+    return cmd
+
+
+def read_floats(data, num_floats):
+    values = array("f")
+    values.frombytes(bytes(data[:num_floats * 4]))
+    return list(values)
+
+
+def test_command_packing():
+    cmd = make_command(3, 0.5)
+    buffer = array("f", [-1.0]) * (2 * GPU_COMMAND_ENTRIES)
+    cmd.write_to_buffer(buffer, 1)
+
+    assert list(buffer[:GPU_COMMAND_ENTRIES]) == [-1.0] * GPU_COMMAND_ENTRIES
+    entries = list(buffer[GPU_COMMAND_ENTRIES:])
+    assert entries[:5] == [GPUCommand.CMD_store_light, 3.0, 0.5, 1.5, 2.5]
+    assert entries[5:] == [0.0] * (GPU_COMMAND_ENTRIES - 5)
+
+
+def test_command_overflow_is_ignored():
+    cmd = GPUCommand(GPUCommand.CMD_invalid)
+    for i in range(GPU_COMMAND_ENTRIES + 4):
+        cmd.push_float(i)
+    buffer = array("f", [0.0]) * GPU_COMMAND_ENTRIES
+    cmd.write_to_buffer(buffer, 0)
+    assert list(buffer) == [0.0] + [float(i) for i in range(GPU_COMMAND_ENTRIES - 1)]
+
+
+def test_write_commands_to_buffer():
+    cmd_list = GPUCommandList()
+    for i in range(3):
+        cmd_list.add_command(make_command(i, 10.0 * i))
+
+    dest = bytearray(4 * 4 * GPU_COMMAND_ENTRIES)
+    assert cmd_list.write_commands_to(dest, 4) == 3
+    values = read_floats(dest, 3 * GPU_COMMAND_ENTRIES)
+    for i in range(3):
+        offset = i * GPU_COMMAND_ENTRIES
+        assert values[offset:offset + 3] == [GPUCommand.CMD_store_light, i, 10.0 * i]
+
+
+class SubdataTarget(object):
+
+    """ Destination without buffer protocol, like a PTA on some Panda3D builds """
+
+    def __init__(self, size):
+        self.data = bytearray(size)
+
+    def set_subdata(self, offset, size, data):
+        self.data[offset:offset + size] = data
+
+
+def test_write_commands_with_set_subdata():
+    cmd_list = GPUCommandList()
+    cmd_list.add_command(make_command(7, 1.0))
+    dest = SubdataTarget(4 * GPU_COMMAND_ENTRIES)
+    assert cmd_list.write_commands_to(dest, 1) == 1
+    assert read_floats(dest.data, 5) == [GPUCommand.CMD_store_light, 7.0, 1.0, 2.0, 3.0]
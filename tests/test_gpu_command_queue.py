@@ -0,0 +1,109 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+from rpcore.globals import Globals
+from rpcore.gpu_command_queue import GPUCommandQueue
+from rpcore.pynative.gpu_command import GPUCommand
+from rpcore.pynative.gpu_command_list import GPUCommandList
+
+
+class DummyClock(object):
+
+    def __init__(self, dt):
+        self.dt = dt
+
+    def get_dt(self):
+        return self.dt
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = DummyClock(0.01)
+    monkeypatch.setattr(Globals, "clock", clock, raising=False)
+    return clock
+
+
+def make_queue(num_commands, commands_per_frame=8, max_commands_per_frame=32):
+    # Only the budget logic is tested, so skip creating the GPU resources
+    queue = GPUCommandQueue.__new__(GPUCommandQueue)
+    queue._commands_per_frame = commands_per_frame  # pylint: disable=protected-access
+    queue._max_commands_per_frame = max_commands_per_frame  # pylint: disable=protected-access
+    queue._target_frame_time = 0.02  # pylint: disable=protected-access
+    queue._command_budget = commands_per_frame  # pylint: disable=protected-access
+    queue._command_list = GPUCommandList()  # pylint: disable=protected-access
+    for i in range(num_commands):
+        cmd = GPUCommand(GPUCommand.CMD_remove_light)
+        cmd.push_int(i)
+        queue.command_list.add_command(cmd)
+    return queue
+
+
+def process(queue):
+    queue._update_command_budget()  # pylint: disable=protected-access
+    dest = bytearray(queue.command_budget * 32 * 4)
+    return queue.command_list.write_commands_to(dest, queue.command_budget)
+
+
+def test_commands_are_processed_in_order():
+    cmd_list = GPUCommandList()
+    for i in range(5):
+        cmd = GPUCommand(GPUCommand.CMD_remove_light)
+        cmd.push_int(i)
+        cmd_list.add_command(cmd)
+
+    dest = bytearray(3 * 32 * 4)
+    assert cmd_list.write_commands_to(dest, 3) == 3
+    assert cmd_list.num_commands == 2
+    assert cmd_list.write_commands_to(dest, 3) == 2
+    assert cmd_list.num_commands == 0
+    assert cmd_list.write_commands_to(dest, 3) == 0
+
+
+def test_budget_grows_with_backlog(clock):
+    queue = make_queue(100)
+    assert [process(queue) for _ in range(4)] == [16, 32, 32, 20]
+    assert queue.command_list.num_commands == 0
+
+    # Backlog processed, fall back to the configured budget
+    process(queue)
+    assert queue.command_budget == 8
+
+
+def test_budget_resets_on_slow_frames(clock):
+    queue = make_queue(100)
+    process(queue)
+    process(queue)
+    assert queue.command_budget == 32
+
+    clock.dt = 0.03
+    assert process(queue) == 8
+
+
+def test_fixed_budget(clock):
+    queue = make_queue(100, max_commands_per_frame=8)
+    assert [process(queue) for _ in range(3)] == [8, 8, 8]
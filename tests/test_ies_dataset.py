@@ -0,0 +1,65 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+from rpcore.pynative.ies_dataset import IESDataset
+
+
+@pytest.fixture
+def dataset():
+    dataset = IESDataset()
+    dataset.set_vertical_angles([0.0, 45.0, 90.0, 180.0])
+    dataset.set_horizontal_angles([0.0, 90.0])
+
+    # Candela values are stored per horizontal angle
+    dataset.set_candela_values([
+        1.0, 0.5, 0.2, 0.0,
+        0.8, 0.4, 0.0, 0.0])
+    return dataset
+
+
+def test_vertical_interpolation(dataset):
+    assert dataset.get_vertical_candela_value(0, 0.0) == pytest.approx(1.0)
+    assert dataset.get_vertical_candela_value(0, 22.5) == pytest.approx(0.75)
+    assert dataset.get_vertical_candela_value(0, 67.5) == pytest.approx(0.35)
+    assert dataset.get_vertical_candela_value(1, 45.0) == pytest.approx(0.4)
+    assert dataset.get_vertical_candela_value(0, -1.0) == 0.0
+    assert dataset.get_vertical_candela_value(0, 181.0) == 0.0
+
+
+def test_horizontal_interpolation(dataset):
+    assert dataset.get_candela_value(0.0, 0.0) == pytest.approx(1.0)
+    assert dataset.get_candela_value(0.0, 45.0) == pytest.approx(0.9)
+    assert dataset.get_candela_value(22.5, 90.0) == pytest.approx(0.6)
+
+
+def test_horizontal_angles_are_mirrored(dataset):
+    for angle in (10.0, 45.0, 80.0):
+        assert dataset.get_candela_value(22.5, 180.0 - angle) == pytest.approx(
+            dataset.get_candela_value(22.5, angle))
+        assert dataset.get_candela_value(22.5, 180.0 + angle) == pytest.approx(
+            dataset.get_candela_value(22.5, angle))
@@ -0,0 +1,118 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from rpcore.pynative.internal_light_manager import InternalLightManager
+
+
+class DummyLight(object):
+
+    """ Minimal light which only provides what the light manager needs """
+
+    def __init__(self):
+        self._slot = -1
+        self._light_mgr = None
+
+    def has_slot(self):
+        return self._slot >= 0
+
+    def get_slot(self):
+        return self._slot
+
+    def assign_slot(self, slot):
+        self._slot = slot
+
+    def remove_slot(self):
+        self._slot = -1
+
+    def set_light_manager(self, light_mgr):
+        self._light_mgr = light_mgr
+
+    def set_needs_update(self, flag):
+        if flag and self._light_mgr is not None:
+            self._light_mgr.mark_light_dirty(self)
+
+    def get_casts_shadows(self):
+        return False
+
+    def write_to_command(self, cmd):
+        pass
+
+
+class DummyCommandList(object):
+
+    def __init__(self):
+        self.commands = []
+
+    def add_command(self, cmd):
+        self.commands.append(cmd)
+
+
+def make_manager(max_light_updates, num_lights):
+    mgr = InternalLightManager()
+    mgr.set_command_list(DummyCommandList())
+    mgr.set_max_light_updates(max_light_updates)
+    lights = [DummyLight() for _ in range(num_lights)]
+    for light in lights:
+        mgr.add_light(light)
+    mgr._cmd_list.commands = []  # pylint: disable=protected-access
+    return mgr, lights
+
+
+def test_light_is_queued_once():
+    mgr, lights = make_manager(0, 2)
+    lights[0].set_needs_update(True)
+    lights[0].set_needs_update(True)
+    assert mgr.num_dirty_lights == 1
+
+    mgr.update_lights()
+    assert mgr.num_dirty_lights == 0
+    assert len(mgr._cmd_list.commands) == 1  # pylint: disable=protected-access
+
+
+def test_update_budget_carries_over():
+    mgr, lights = make_manager(2, 5)
+    for light in lights:
+        light.set_needs_update(True)
+
+    mgr.update_lights()
+    assert mgr.num_dirty_lights == 3
+    mgr.update_lights()
+    assert mgr.num_dirty_lights == 1
+    mgr.update_lights()
+    assert mgr.num_dirty_lights == 0
+    assert len(mgr._cmd_list.commands) == 5  # pylint: disable=protected-access
+
+
+def test_remove_light_drops_dirty_entry():
+    mgr, lights = make_manager(0, 3)
+    lights[1].set_needs_update(True)
+    mgr.remove_light(lights[1])
+    assert mgr.num_dirty_lights == 0
+    assert mgr.num_lights == 2
+
+    mgr._cmd_list.commands = []  # pylint: disable=protected-access
+    mgr.update_lights()
+    assert mgr._cmd_list.commands == []  # pylint: disable=protected-access
@@ -0,0 +1,125 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import os
+
+import pytest
+
+from rpcore.loader import RPLoader
+
+
+def cache_file(fname, *dimensions):
+    # pylint: disable=protected-access
+    return RPLoader._get_sliced_3d_cache_file(fname, *dimensions)
+
+
+def test_cache_file_key(tmp_path):
+    source = tmp_path / "lut.png"
+    source.write_bytes(b"lut")
+    fname = str(source)
+
+    cache_path = cache_file(fname, 64, 64, 64)
+    assert cache_path.startswith("/$$rpcache/$$sliced3d-")
+    assert cache_path.endswith(".txo")
+    assert cache_file(fname, 64, 64, 64) == cache_path
+    assert cache_file(fname, 32, 32, 32) != cache_path
+    assert cache_file(fname, 64, 64, 32) != cache_path
+
+    other = tmp_path / "other.png"
+    other.write_bytes(b"lut")
+    assert cache_file(str(other), 64, 64, 64) != cache_path
+
+
+def test_cache_file_changes_with_timestamp(tmp_path):
+    source = tmp_path / "lut.png"
+    source.write_bytes(b"lut")
+    os.utime(str(source), (1000000, 1000000))
+    cache_path = cache_file(str(source), 64, 64, 64)
+
+    os.utime(str(source), (2000000, 2000000))
+    assert cache_file(str(source), 64, 64, 64) != cache_path
+
+
+def test_no_cache_file_for_missing_source(tmp_path):
+    assert cache_file(str(tmp_path / "missing.png"), 64, 64, 64) is None
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    monkeypatch.setattr(RPLoader, "_pending_futures", [])
+    return RPLoader
+
+
+def submit(loader, load_method, *args):
+    return loader._submit("resource", load_method, *args)  # pylint: disable=protected-access
+
+
+def failing_load():
+    raise ValueError("broken file")
+
+
+def test_async_result(loader):
+    results = []
+    future = submit(loader, lambda value: value * 2, 21)
+    future.add_done_callback(results.append)
+    assert future.result() == 42
+    assert future.done()
+
+    # Callbacks only run on the main thread
+    assert results == []
+    loader.wait_for_pending_loads()
+    assert results == [42]
+
+    future.add_done_callback(results.append)
+    assert results == [42, 42]
+
+
+def test_async_errors(loader):
+    results = []
+    future = submit(loader, failing_load)
+    future.add_done_callback(results.append)
+    with pytest.raises(ValueError):
+        future.result()
+
+    with pytest.raises(IOError):
+        submit(loader, lambda: None).result()
+
+    loader.wait_for_pending_loads()
+    assert results == []
+
+
+def test_wait_for_loads_started_by_callbacks(loader):
+    results = []
+
+    def load_next(value):
+        results.append(value)
+        if value < 3:
+            submit(loader, lambda: value + 1).add_done_callback(load_next)
+
+    submit(loader, lambda: 1).add_done_callback(load_next)
+    loader.wait_for_pending_loads()
+    assert results == [1, 2, 3]
+    assert loader._pending_futures == []  # pylint: disable=protected-access
@@ -0,0 +1,100 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from rpcore.pluginbase.manager import PluginManager
+
+
+class DummyPlugin(object):
+
+    """ Plugin which records the hooks it received """
+
+    def __init__(self, plugin_id, calls):
+        self.plugin_id = plugin_id
+        self.required_plugins = ()
+        self._calls = calls
+
+    def on_pre_render_update(self):
+        self._calls.append(self.plugin_id)
+
+
+class DummyPluginWithoutHooks(object):
+
+    plugin_id = "nohooks"
+    required_plugins = ()
+
+
+def make_manager(calls):
+    mgr = PluginManager(None)
+    mgr.instances = {
+        "first": DummyPlugin("first", calls),
+        "second": DummyPlugin("second", calls),
+        "nohooks": DummyPluginWithoutHooks(),
+    }
+    mgr.enabled_plugins = set(mgr.instances)
+    return mgr
+
+
+def test_hooks_reach_enabled_plugins():
+    calls = []
+    mgr = make_manager(calls)
+    mgr.trigger_hook("pre_render_update")
+    mgr.trigger_hook("unknown_hook")
+    assert sorted(calls) == ["first", "second"]
+
+
+def test_disable_plugin_updates_handlers():
+    calls = []
+    mgr = make_manager(calls)
+    mgr.trigger_hook("pre_render_update")
+    mgr.disable_plugin("first")
+
+    del calls[:]
+    mgr.trigger_hook("pre_render_update")
+    assert calls == ["second"]
+
+
+def test_set_plugin_enabled_updates_handlers():
+    calls = []
+    mgr = make_manager(calls)
+    mgr.set_plugin_enabled("second", False)
+    mgr.trigger_hook("pre_render_update")
+    assert calls == ["first"]
+
+    mgr.set_plugin_enabled("second")
+    del calls[:]
+    mgr.trigger_hook("pre_render_update")
+    assert sorted(calls) == ["first", "second"]
+
+
+def test_unload_clears_handlers():
+    calls = []
+    mgr = make_manager(calls)
+    mgr.trigger_hook("pre_render_update")
+    mgr.unload()
+
+    del calls[:]
+    mgr.trigger_hook("pre_render_update")
+    assert calls == []
@@ -0,0 +1,96 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from rpcore.pynative.pointer_slot_storage import PointerSlotStorage
+
+
+def fill(storage, slots):
+    entries = {}
+    for slot in slots:
+        entries[slot] = "entry-{}".format(slot)
+        storage.reserve_slot(slot, entries[slot])
+    return entries
+
+
+def test_find_slot_returns_lowest_free_slot():
+    storage = PointerSlotStorage(200)
+    fill(storage, range(130))
+    assert storage.find_slot() == 130
+    storage.free_slot(70)
+    assert storage.find_slot() == 70
+
+
+def test_find_slot_when_full():
+    storage = PointerSlotStorage(70)
+    fill(storage, range(70))
+    assert storage.find_slot() == -1
+    assert storage.find_consecutive_slots(2) == -1
+
+
+def test_find_consecutive_slots():
+    storage = PointerSlotStorage(200)
+    fill(storage, [0, 3, 63, 66])
+    assert storage.find_consecutive_slots(2) == 1
+    assert storage.find_consecutive_slots(3) == 4
+    assert storage.find_consecutive_slots(59) == 4
+    assert storage.find_consecutive_slots(60) == 67
+    assert storage.find_consecutive_slots(64) == 67
+    assert storage.find_consecutive_slots(134) == -1
+
+
+def test_begin_iterates_in_slot_order():
+    storage = PointerSlotStorage(200)
+    entries = fill(storage, [150, 3, 64, 0])
+    assert storage.begin() == [entries[slot] for slot in (0, 3, 64, 150)]
+    assert storage.get_max_index() == 150
+    assert storage.get_num_entries() == 4
+
+
+def test_free_slot():
+    storage = PointerSlotStorage(200)
+    fill(storage, [3, 150])
+    storage.free_slot(150)
+    assert storage.get_max_index() == 3
+    assert storage.get_num_entries() == 1
+
+    # Freeing an unused slot does nothing
+    storage.free_slot(150)
+    storage.free_slot(10)
+    assert storage.get_num_entries() == 1
+    assert storage.get(3) == "entry-3"
+
+
+def test_begin_skips_padding_and_free_slots():
+    storage = PointerSlotStorage(70)
+    entries = fill(storage, range(70))
+    assert storage.begin() == [entries[slot] for slot in range(70)]
+
+    for slot in range(1, 70, 2):
+        storage.free_slot(slot)
+    assert storage.begin() == [entries[slot] for slot in range(0, 70, 2)]
+
+    storage.free_consecutive_slots(0, 70)
+    assert storage.begin() == []
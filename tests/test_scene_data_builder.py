@@ -0,0 +1,76 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from panda3d.core import Mat4
+
+from rpcore.pynative.scene_data_builder import SceneDataBuilder
+
+
+def make_proj_mat():
+    proj_mat = Mat4.ident_mat()
+    proj_mat.set_cell(2, 3, 1.0)
+    proj_mat.set_cell(3, 2, -0.2)
+    proj_mat.set_cell(3, 3, 0.0)
+    return proj_mat
+
+
+def make_view_mat(offset):
+    view_mat = Mat4.ident_mat()
+    view_mat.set_cell(3, 0, offset)
+    return view_mat
+
+
+def test_update_reports_changes():
+    builder = SceneDataBuilder()
+    proj_mat = make_proj_mat()
+    assert builder.update(make_view_mat(0.0), proj_mat)
+
+    # The history still has to be stored once, afterwards nothing changes
+    assert builder.update(make_view_mat(0.0), proj_mat)
+    assert not builder.update(make_view_mat(0.0), proj_mat)
+    assert not builder.update(make_view_mat(0.0), Mat4(proj_mat))
+
+    assert builder.update(make_view_mat(1.0), proj_mat)
+    proj_mat.set_cell(0, 0, 2.0)
+    assert builder.update(make_view_mat(1.0), proj_mat)
+
+
+def test_history_lags_one_update():
+    builder = SceneDataBuilder()
+    proj_mat = make_proj_mat()
+    builder.update(make_view_mat(0.0), proj_mat)
+    builder.update(make_view_mat(0.0), proj_mat)
+    first_view_proj = Mat4(builder.get_view_proj_mat_no_jitter())
+    assert builder.get_last_view_proj_mat_no_jitter() == first_view_proj
+
+    builder.update(make_view_mat(1.0), proj_mat)
+    assert builder.get_view_proj_mat_no_jitter() != first_view_proj
+    assert builder.get_last_view_proj_mat_no_jitter() == first_view_proj
+
+    # Once the camera stops, the history catches up with the current matrix
+    builder.update(make_view_mat(1.0), proj_mat)
+    assert builder.get_last_view_proj_mat_no_jitter() == \
+        builder.get_view_proj_mat_no_jitter()
@@ -0,0 +1,94 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+from panda3d.core import Filename
+
+from rpcore.util.shader_dependencies import ShaderDependencies
+
+
+@pytest.fixture
+def deps(monkeypatch):
+    # Always trust the timestamps, the files are written within the same second
+    monkeypatch.setattr(ShaderDependencies, "MIN_STAMP_AGE", float("-inf"))
+    return ShaderDependencies()
+
+
+@pytest.fixture
+def shader_dir(tmp_path):
+    def write(name, content):
+        with open(str(tmp_path / name), "w") as handle:
+            handle.write(content)
+        return Filename.from_os_specific(str(tmp_path / name)).get_fullpath()
+
+    write.main = write("main.frag.glsl", '#pragma include "common.inc.glsl"\nvoid main() { A; }\n')
+    write.other = write("other.frag.glsl", "void main() { B; }\n")
+    write.common = write("common.inc.glsl", '#pragma include "config.inc.glsl"\nfloat C;\n')
+    write.config = write("config.inc.glsl", "#define A 1\n")
+    return write
+
+
+def test_identifiers_include_includes(deps, shader_dir):
+    identifiers = deps.get_identifiers(shader_dir.main)
+    assert "A" in identifiers and "C" in identifiers
+    assert deps.uses_any([shader_dir.main], ["C"])
+    assert not deps.uses_any([shader_dir.other], ["A", "C"])
+
+
+def test_dependents(deps, shader_dir):
+    deps.get_source_hash(shader_dir.main)
+    deps.get_source_hash(shader_dir.other)
+    assert deps.get_dependents(shader_dir.config) == set([shader_dir.main, shader_dir.common])
+    assert deps.get_dependents(shader_dir.other) == set()
+
+
+def test_invalidate_file(deps, shader_dir):
+    main_hash = deps.get_source_hash(shader_dir.main)
+    other_hash = deps.get_source_hash(shader_dir.other)
+
+    # Files are only checked again after they were invalidated
+    shader_dir("config.inc.glsl", "#define A 2\n")
+    assert deps.get_source_hash(shader_dir.main) == main_hash
+    deps.invalidate(shader_dir.config)
+    assert deps.get_source_hash(shader_dir.main) != main_hash
+    assert deps.get_source_hash(shader_dir.other) == other_hash
+
+
+def test_rewrite_with_same_content(deps, shader_dir):
+    main_hash = deps.get_source_hash(shader_dir.main)
+    shader_dir("config.inc.glsl", "#define A 1\n")
+    deps.invalidate()
+    assert deps.get_source_hash(shader_dir.main) == main_hash
+
+
+def test_changed_include(deps, shader_dir):
+    deps.get_source_hash(shader_dir.main)
+    shader_dir("common.inc.glsl", "float C;\n")
+    deps.invalidate(shader_dir.common)
+    assert "C" in deps.get_identifiers(shader_dir.main)
+    assert deps.get_dependents(shader_dir.config) == set()
+    assert deps.get_dependents(shader_dir.common) == set([shader_dir.main])
@@ -0,0 +1,117 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import os
+
+from rpcore.effect import Effect
+from rpcore.util.shader_watcher import ShaderWatcher
+
+
+class DummyDependencies(object):
+
+    def __init__(self):
+        self.known_files = []
+
+    def get_known_files(self):
+        return self.known_files
+
+    def resolve(self, filename):
+        return filename
+
+
+class DummyPipeline(object):
+
+    def __init__(self):
+        self.shader_deps = DummyDependencies()
+
+
+def make_watcher(monkeypatch):
+    monkeypatch.setattr(Effect, "get_template_sources", classmethod(lambda cls: []))
+    monkeypatch.setattr(Effect, "get_loaded_effects", classmethod(lambda cls: []))
+
+    # Skip the constructor, which starts the polling task
+    watcher = ShaderWatcher.__new__(ShaderWatcher)
+    watcher._pipeline = DummyPipeline()  # pylint: disable=protected-access
+    watcher._stamps = {}  # pylint: disable=protected-access
+    return watcher
+
+
+def make_file(tmp_path, name):
+    path = tmp_path / name
+    path.write_text(u"void main() {}\n")
+    os.utime(str(path), (1000000, 1000000))
+    return str(path)
+
+
+def poll(watcher):
+    return watcher._poll()  # pylint: disable=protected-access
+
+
+def get_watched_files(watcher):
+    return sorted(watcher._stamps)  # pylint: disable=protected-access
+
+
+def get_deps(watcher):
+    return watcher._pipeline.shader_deps  # pylint: disable=protected-access
+
+
+def test_modified_files_are_reported(tmp_path, monkeypatch):
+    watcher = make_watcher(monkeypatch)
+    first, second = make_file(tmp_path, "first.glsl"), make_file(tmp_path, "second.glsl")
+    get_deps(watcher).known_files = [first, second]
+
+    # Files seen for the first time are not reported
+    assert poll(watcher) == []
+    assert poll(watcher) == []
+
+    os.utime(second, (2000000, 2000000))
+    assert poll(watcher) == [second]
+    assert poll(watcher) == []
+
+
+def test_unused_files_are_dropped(tmp_path, monkeypatch):
+    watcher = make_watcher(monkeypatch)
+    deps = get_deps(watcher)
+    first, second = make_file(tmp_path, "first.glsl"), make_file(tmp_path, "second.glsl")
+    deps.known_files = [first, second]
+    poll(watcher)
+
+    deps.known_files = [first]
+    poll(watcher)
+    assert get_watched_files(watcher) == [first]
+
+    # A file which is watched again counts as new
+    os.utime(second, (2000000, 2000000))
+    deps.known_files = [first, second]
+    assert poll(watcher) == []
+
+
+def test_generated_files_are_ignored(tmp_path, monkeypatch):
+    watcher = make_watcher(monkeypatch)
+    shader = make_file(tmp_path, "shader.glsl")
+    get_deps(watcher).known_files = ["/$$rptemp/$$pipeline_shader_config.inc.glsl", shader]
+    poll(watcher)
+    assert get_watched_files(watcher) == [shader]
@@ -0,0 +1,103 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from rpcore.pynative.shadow_atlas import ShadowAtlas
+
+
+def make_atlas():
+    # 16 x 16 tiles
+    return ShadowAtlas(512, 32)
+
+
+def test_allocation_is_rounded_to_blocks():
+    atlas = make_atlas()
+    region = atlas.find_and_reserve_region(3, 3)
+    assert (region.z, region.w) == (3, 3)
+    assert region.x % 4 == 0 and region.y % 4 == 0
+    assert atlas.num_used_tiles == 9
+    assert atlas.num_wasted_tiles == 16 - 9
+    assert atlas.num_free_tiles == 256 - 16
+
+
+def test_free_merges_buddies():
+    atlas = make_atlas()
+    regions = [atlas.find_and_reserve_region(4, 4) for _ in range(16)]
+    assert atlas.num_free_tiles == 0
+    assert atlas.find_and_reserve_region(1, 1).x < 0
+
+    for region in regions:
+        atlas.free_region(region)
+    assert atlas.num_used_tiles == 0
+    assert atlas.largest_free_block == 16
+    assert atlas.fragmentation == 0.0
+
+
+def test_reserve_region_at_position():
+    atlas = make_atlas()
+    assert atlas.reserve_region(8, 4, 4, 4)
+    assert not atlas.region_is_free(8, 4, 4, 4)
+    assert not atlas.reserve_region(8, 4, 4, 4)
+    assert not atlas.reserve_region(2, 0, 4, 4)
+    assert atlas.region_is_free(0, 0, 4, 4)
+
+
+def fragment(atlas):
+    """ Fills the atlas with 2x2 blocks and frees every second one """
+    regions = [atlas.find_and_reserve_region(2, 2) for _ in range(64)]
+    for region in regions[::2]:
+        atlas.free_region(region)
+    return regions[1::2]
+
+
+def test_compaction_reduces_fragmentation():
+    atlas = make_atlas()
+    used = fragment(atlas)
+    fragmentation = atlas.fragmentation
+
+    for _ in range(len(used)):
+        move = atlas.find_compaction_move()
+        if move is None:
+            break
+        region, target_x, target_y = move
+        atlas.free_region(region)
+        assert atlas.reserve_region(target_x, target_y, region.z, region.w)
+
+    assert atlas.num_used_tiles == len(used) * 4
+    assert atlas.fragmentation < fragmentation
+
+
+def test_compaction_skips_blocks_which_may_not_move():
+    atlas = make_atlas()
+    used = fragment(atlas)
+    pinned = used[0]
+
+    movable = set((region.x, region.y) for region in used[1:])
+    region, _, _ = atlas.find_compaction_move(movable)
+    assert (region.x, region.y) in movable
+
+    # Nothing may move, but the blocks might become movable later on
+    assert atlas.find_compaction_move(set()) is None
+    assert atlas.find_compaction_move(set([(pinned.x, pinned.y)])) is not None
@@ -0,0 +1,206 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from panda3d.core import Vec3
+
+from rpcore.pynative.internal_light_manager import InternalLightManager
+from rpcore.pynative.shadow_atlas import ShadowAtlas
+
+
+class DummyBounds(object):
+
+    def __init__(self, center, radius):
+        self.center = center
+        self.radius = radius
+
+    def get_center(self):
+        return self.center
+
+    def get_radius(self):
+        return self.radius
+
+
+class DummySource(object):
+
+    """ Minimal shadow source which only provides what the light manager needs """
+
+    def __init__(self, center, radius):
+        self._bounds = DummyBounds(center, radius)
+        self._slot = -1
+        self._needs_update = True
+
+    def get_bounds(self):
+        return self._bounds
+
+    def get_resolution(self):
+        return 512
+
+    def set_slot(self, slot):
+        self._slot = slot
+
+    def has_slot(self):
+        return self._slot >= 0
+
+    def get_slot(self):
+        return self._slot
+
+    def set_needs_update(self, flag):
+        self._needs_update = flag
+
+    def get_needs_update(self):
+        return self._needs_update
+
+    def has_region(self):
+        return False
+
+
+class DummyShadowLight(object):
+
+    """ Light with a single shadow source """
+
+    def __init__(self, center, radius=1.0):
+        self.source = DummySource(center, radius)
+        self._slot = -1
+
+    def has_slot(self):
+        return self._slot >= 0
+
+    def get_slot(self):
+        return self._slot
+
+    def assign_slot(self, slot):
+        self._slot = slot
+
+    def set_light_manager(self, light_mgr):
+        self._light_mgr = light_mgr  # pylint: disable=attribute-defined-outside-init
+
+    def set_needs_update(self, flag):
+        if flag:
+            self._light_mgr.mark_light_dirty(self)
+
+    def get_casts_shadows(self):
+        return True
+
+    def init_shadow_sources(self):
+        pass
+
+    def update_shadow_sources(self):
+        pass
+
+    def get_num_shadow_sources(self):
+        return 1
+
+    def get_shadow_source(self, index):
+        return self.source
+
+    def write_to_command(self, cmd):
+        pass
+
+
+class DummyShadowManager(object):
+
+    """ Shadow manager without update slots, so only the ranking runs """
+
+    def __init__(self):
+        self._atlas = ShadowAtlas(512, 32)
+
+    def get_atlas(self):
+        return self._atlas
+
+    def get_num_update_slots_left(self):
+        return 0
+
+
+class DummyCommandList(object):
+
+    def add_command(self, cmd):
+        pass
+
+
+def make_manager(centers):
+    mgr = InternalLightManager()
+    mgr.set_command_list(DummyCommandList())
+    mgr.set_shadow_manager(DummyShadowManager())
+    mgr.set_shadow_update_distance(100.0)
+    mgr.set_shadow_rerank_distance(1.0)
+    lights = [DummyShadowLight(*center) for center in centers]
+    for light in lights:
+        mgr.add_light(light)
+    return mgr, lights
+
+
+def ranked_sources(mgr):
+    return mgr._ranked_sources  # pylint: disable=protected-access
+
+
+def test_sources_are_ranked_by_distance():
+    mgr, lights = make_manager([
+        (Vec3(10, 0, 0), 1.0),
+        (Vec3(5, 0, 0), 0.5),
+        (Vec3(20, 0, 0), 18.0),
+        (Vec3(200, 0, 0), 1.0),
+    ])
+    mgr.update_shadow_sources()
+
+    # The large source is closest to its bounds, the last one is out of range
+    assert ranked_sources(mgr) == [lights[i].source for i in (2, 1, 0)]
+
+
+def test_camera_rerank_threshold():
+    mgr, lights = make_manager([(Vec3(10, 0, 0), 1.0), (Vec3(12, 0, 0), 1.0)])
+    mgr.set_camera_pos(Vec3(10.8, 0, 0))
+    mgr.update_shadow_sources()
+    assert ranked_sources(mgr) == [lights[0].source, lights[1].source]
+
+    # Small camera movements keep the old ranking, even if it is slightly off
+    mgr.set_camera_pos(Vec3(11.3, 0, 0))
+    mgr.update_shadow_sources()
+    assert ranked_sources(mgr) == [lights[0].source, lights[1].source]
+
+    mgr.set_camera_pos(Vec3(12, 0, 0))
+    mgr.update_shadow_sources()
+    assert ranked_sources(mgr) == [lights[1].source, lights[0].source]
+
+
+def test_light_rerank_threshold():
+    mgr, lights = make_manager([(Vec3(10, 0, 0), 1.0), (Vec3(10.6, 0, 0), 1.0)])
+    mgr.update_shadow_sources()
+
+    lights[1].source.get_bounds().center = Vec3(9.8, 0, 0)
+    lights[1].set_needs_update(True)
+    mgr.update()
+    assert ranked_sources(mgr) == [lights[0].source, lights[1].source]
+
+    lights[1].source.get_bounds().center = Vec3(3, 0, 0)
+    lights[1].set_needs_update(True)
+    mgr.update()
+    assert ranked_sources(mgr) == [lights[1].source, lights[0].source]
+
+
+def test_source_resolution_lod():
+    mgr, lights = make_manager([(Vec3(0), 1.0)])
+    tiles = [mgr.get_source_tiles(lights[0].source, dist) for dist in (10, 30, 60, 99, 1000)]
+    assert tiles == [16, 8, 4, 4, 1]
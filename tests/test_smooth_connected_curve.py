@@ -0,0 +1,79 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+from rpcore.util.smooth_connected_curve import SmoothConnectedCurve
+
+
+def make_curve():
+    curve = SmoothConnectedCurve()
+    curve.control_points = [[0.2, 0.3], [0.5, 0.8], [0.8, 0.1]]
+    return curve
+
+
+def offsets(num_offsets=1000):
+    return [i / float(num_offsets) for i in range(num_offsets + 1)]
+
+
+def test_get_value_passes_control_points():
+    curve = make_curve()
+    assert curve.get_value(0.5) == pytest.approx(0.8, abs=1e-4)
+    assert curve.get_values([curve], 0.2) == [curve.get_value(0.2)]
+
+
+def test_baked_values_match_exact_values():
+    curve = make_curve()
+    for offset in offsets():
+        assert curve.get_baked_value(offset) == pytest.approx(curve.get_value(offset), abs=1e-3)
+
+    assert curve.get_baked_value(1.5) == curve.get_baked_value(1.0)
+    assert curve.get_baked_value(-0.5) == curve.get_baked_value(0.0)
+
+
+def test_baked_values_of_several_curves():
+    curves = [make_curve(), SmoothConnectedCurve()]
+    curves[1].set_single_value(0.25)
+    for offset in offsets(100):
+        expected = [curve.get_baked_value(offset) for curve in curves]
+        assert SmoothConnectedCurve.get_baked_values(curves, offset) == expected
+
+
+def test_baked_values_follow_changes():
+    curve = make_curve()
+    assert curve.get_baked_value(0.5) == pytest.approx(0.8, abs=1e-3)
+
+    # Moving a control point and rebuilding, like the day time editor does
+    curve.set_cv_value(1, 0.5, 0.4)
+    curve.build_curve()
+    assert curve.get_baked_value(0.5) == pytest.approx(0.4, abs=1e-3)
+
+    curve.control_points = [[0.5, 0.6]]
+    for offset in offsets(100):
+        assert curve.get_baked_value(offset) == pytest.approx(curve.get_value(offset), abs=1e-3)
+
+    curve.append_cv(0.25, 0.9)
+    assert curve.get_baked_value(0.25) == pytest.approx(0.9, abs=1e-3)
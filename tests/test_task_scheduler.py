@@ -0,0 +1,100 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import pytest
+
+import rpcore.util.task_scheduler as task_scheduler
+from rpcore.util.task_scheduler import TaskScheduler
+
+
+def make_scheduler(monkeypatch, config):
+    monkeypatch.setattr(task_scheduler, "load_yaml_file", lambda filename: config)
+    return TaskScheduler(None)
+
+
+def run_frames(scheduler, num_frames, tasks):
+    frames = []
+    for _ in range(num_frames):
+        frames.append(set(task for task in tasks if scheduler.is_scheduled(task)))
+        scheduler.step()
+    return frames
+
+
+@pytest.fixture
+def config():
+    return {
+        "frame_budget": 1.0,
+        "task_chains": [
+            ("probes", {"interval": 4, "tasks": [["probe_a", 0.5], ["probe_b", 0.5]]}),
+            ("shadows", {"interval": 2, "tasks": [["shadows", 0.8]]}),
+        ],
+    }
+
+
+def test_chains_run_in_order(monkeypatch, config):
+    config["frame_budget"] = 10.0
+    scheduler = make_scheduler(monkeypatch, config)
+    frames = run_frames(scheduler, 8, ["probe_a", "probe_b", "shadows"])
+    assert frames[0] == set(["probe_a", "shadows"])
+    assert frames[1] == set(["probe_b"])
+    assert frames[2] == set(["shadows"])
+    assert frames[4] == set(["probe_a", "shadows"])
+
+
+def test_budget_delays_tasks(monkeypatch, config):
+    scheduler = make_scheduler(monkeypatch, config)
+    frames = run_frames(scheduler, 40, ["probe_a", "probe_b", "shadows"])
+    for frame in frames:
+        if len(frame) > 1:
+            assert sum(scheduler.get_task_cost(task) for task in frame) <= 1.0
+    assert sum("shadows" in frame for frame in frames) >= 10
+    assert sum("probe_b" in frame for frame in frames) >= 5
+
+
+def test_expensive_task_still_runs(monkeypatch, config):
+    config["frame_budget"] = 0.1
+    scheduler = make_scheduler(monkeypatch, config)
+    frames = run_frames(scheduler, 10, ["probe_a", "probe_b", "shadows"])
+    assert all(len(frame) <= 1 for frame in frames)
+    assert any("shadows" in frame for frame in frames)
+
+
+def test_skip_chain(monkeypatch, config):
+    config["frame_budget"] = 10.0
+    scheduler = make_scheduler(monkeypatch, config)
+    assert scheduler.is_scheduled("probe_a")
+    scheduler.skip_chain("probe_a")
+    frames = run_frames(scheduler, 5, ["probe_a", "probe_b"])
+    assert frames[1:4] == [set(), set(), set()]
+    assert frames[4] == set(["probe_a"])
+
+
+def test_legacy_frame_cycles(monkeypatch):
+    scheduler = make_scheduler(monkeypatch, {
+        "frame_cycles": [("frame0", ["a"]), ("frame1", ["b", "c"]), ("frame2", None)]})
+    frames = run_frames(scheduler, 4, ["a", "b", "c"])
+    assert frames == [set(["a"]), set(["b", "c"]), set(), set(["a"])]
+    assert scheduler.num_tasks == 3
@@ -0,0 +1,84 @@
+"""
+
+RenderPipeline
+
+Copyright (c) 2014-2016 tobspr <tobias.springer1@gmail.com>
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import os
+import pickle
+
+import pytest
+
+from panda3d.core import Filename
+
+import rplibs.yaml as rpyaml
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(rpyaml, "YAML_CACHE_DIR", None)
+    monkeypatch.setattr(rpyaml, "YAML_CACHE_MIN_AGE", float("-inf"))
+    rpyaml.set_yaml_cache_dir(Filename.from_os_specific(str(cache_dir)).get_fullpath())
+    rpyaml.clear_yaml_cache()
+    yield cache_dir
+    rpyaml.clear_yaml_cache()
+
+
+@pytest.fixture
+def yaml_file(tmp_path):
+    path = tmp_path / "settings.yaml"
+    path.write_text(u"settings:\n    value: 1\n    names: [a, b]\n")
+    return Filename.from_os_specific(str(path)).get_fullpath()
+
+
+def test_cache_key(cache_dir, yaml_file):
+    cache_file = rpyaml._get_cache_file(yaml_file)  # pylint: disable=protected-access
+    assert cache_file.startswith(rpyaml.YAML_CACHE_DIR + "/$$yaml-")
+    assert cache_file.endswith(".pickle")
+    assert cache_file == rpyaml._get_cache_file(yaml_file)  # pylint: disable=protected-access
+    assert cache_file != rpyaml._get_cache_file(yaml_file + "x")  # pylint: disable=protected-access
+
+
+def test_no_disk_cache_without_cache_dir(yaml_file, monkeypatch):
+    monkeypatch.setattr(rpyaml, "YAML_CACHE_DIR", None)
+    assert rpyaml._get_cache_file(yaml_file) is None  # pylint: disable=protected-access
+
+
+def test_results_are_copies(cache_dir, yaml_file):
+    first = rpyaml.load_yaml_file(yaml_file)
+    first["settings"]["value"] = 2
+    assert rpyaml.load_yaml_file(yaml_file)["settings"]["value"] == 1
+    assert len(os.listdir(str(cache_dir))) == 1
+
+
+@pytest.mark.parametrize("content", [
+    b"", b"\x80\x04garbage", pickle.dumps((1, 2)), pickle.dumps(os.system)])
+def test_invalid_cache_file_is_ignored(cache_dir, yaml_file, content):
+    rpyaml.load_yaml_file(yaml_file)
+    rpyaml.clear_yaml_cache()
+    for entry in os.listdir(str(cache_dir)):
+        with open(str(cache_dir / entry), "wb") as handle:
+            handle.write(content)
+    assert rpyaml.load_yaml_file(yaml_file) == {"settings": {"value": 1, "names": ["a", "b"]}}
@@ -0,0 +1,330 @@
+"""
+
+Headless benchmark of the CPU side of the pipeline update loop.
+
+Boots the pipeline into an offscreen buffer, spawns a procedural scene with
+a configurable amount of lights, environment probes and effects, steps the
+task manager for a fixed amount of frames and writes the per-subsystem
+timings as JSON. See README.md for the available options.
+
+"""
+
+from __future__ import print_function, division
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+
+from panda3d.core import load_prc_file_data, PandaSystem, CardMaker, Vec3
+from direct.showbase.ShowBase import ShowBase
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+sys.path.insert(0, BASE_DIR)
+
+from rpcore import RenderPipeline, PointLight, SpotLight  # noqa
+from rpcore.native import NATIVE_CXX_LOADED  # noqa
+
+# Prefer a monotonic high resolution clock, time.time() is only a fallback
+# for python 2
+WALL_CLOCK = getattr(time, "perf_counter", time.time)
+CPU_CLOCK = getattr(time, "process_time", time.time)
+
+
+class SubsystemTimer(object):
+
+    """ Accumulates the time spent in wrapped methods during one frame, and
+    stores the per-frame totals of every subsystem """
+
+    def __init__(self):
+        self.samples = {}
+        self._current = {}
+
+    def wrap(self, name, obj, method_name):
+        """ Replaces the given method of obj with a version which adds its
+        runtime to the subsystem called name. Objects which do not allow
+        overriding attributes (e.g. C++ classes) are skipped. """
+        method = getattr(obj, method_name)
+        self.samples.setdefault(name, [])
+
+        def timed_method(*args, **kwargs):
+            start = WALL_CLOCK()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(name, WALL_CLOCK() - start)
+
+        try:
+            setattr(obj, method_name, timed_method)
+        except (AttributeError, TypeError):
+            print("Cannot time", name, "- skipping")
+            del self.samples[name]
+
+    def wrap_hooks(self, plugin_mgr):
+        """ Wraps the hook trigger of the plugin manager so each hook gets
+        its own subsystem """
+        trigger_hook = plugin_mgr.trigger_hook
+
+        def timed_trigger_hook(hook_name, *args, **kwargs):
+            start = WALL_CLOCK()
+            try:
+                return trigger_hook(hook_name, *args, **kwargs)
+            finally:
+                self.add("plugin_hooks." + hook_name, WALL_CLOCK() - start)
+
+        plugin_mgr.trigger_hook = timed_trigger_hook
+
+    def add(self, name, duration):
+        """ Adds a duration in seconds to the given subsystem """
+        self._current[name] = self._current.get(name, 0.0) + duration
+
+    def begin_frame(self):
+        """ Clears the accumulated durations of the last frame """
+        self._current = {}
+
+    def end_frame(self):
+        """ Stores the accumulated durations of the current frame. Subsystems
+        which did not run this frame get a sample of zero, so all subsystems
+        have the same amount of samples. """
+        for name in set(self.samples) | set(self._current):
+            self.samples.setdefault(name, []).append(self._current.get(name, 0.0))
+
+
+def summarize(samples):
+    """ Computes the statistics of a list of durations in seconds, the
+    results are in milliseconds """
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def percentile(fraction):
+        return ordered[min(count - 1, int(fraction * count))] * 1000.0
+
+    mean = sum(ordered) / count
+    variance = sum((i - mean) ** 2 for i in ordered) / count
+    return {
+        "mean_ms": mean * 1000.0,
+        "median_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "min_ms": ordered[0] * 1000.0,
+        "max_ms": ordered[-1] * 1000.0,
+        "stddev_ms": variance ** 0.5 * 1000.0,
+        "total_ms": sum(ordered) * 1000.0,
+    }
+
+
+def get_git_revision():
+    """ Returns the current git revision of the pipeline, or None if it can
+    not be determined """
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=BASE_DIR, stderr=subprocess.STDOUT)
+        return output.decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Benchmark(ShowBase):
+
+    """ Creates the pipeline with the given options, spawns the scene and
+    collects the frame timings """
+
+    def __init__(self, args):
+        self.args = args
+        self.timer = SubsystemTimer()
+        random.seed(args.seed)
+
+        load_prc_file_data("", "win-size {} {}".format(args.width, args.height))
+        load_prc_file_data("", "window-type offscreen")
+        load_prc_file_data("", "sync-video #f")
+        load_prc_file_data("", "print-pipe-types #f")
+        load_prc_file_data("", "notify-level-glgsg error")
+        if args.display:
+            load_prc_file_data("", "load-display " + args.display)
+
+        self.render_pipeline = RenderPipeline()
+        if args.config_dir:
+            self.render_pipeline.mount_mgr.config_dir = args.config_dir
+        self.render_pipeline.mount_mgr.mount()
+        self.render_pipeline.load_settings("/$$rpconfig/pipeline.yaml")
+        self.render_pipeline.settings["pipeline.display_debugger"] = args.debugger
+
+        start = WALL_CLOCK()
+        self.render_pipeline.create(self)
+        self.startup_duration = WALL_CLOCK() - start
+
+        self.disableMouse()
+        self.camera.set_pos(0, -args.extent, args.extent * 0.25)
+        self.camera.look_at(0, 0, 0)
+
+        self.lights = []
+        self.spawn_lights()
+        self.spawn_probes()
+        self.spawn_effects()
+        self.install_timers()
+
+        if args.animate:
+            self.add_task(self.animate_scene, "Benchmark_AnimateScene", sort=5)
+
+    def random_pos(self):
+        """ Returns a random position within the benchmark scene """
+        extent = self.args.extent
+        return Vec3(random.uniform(-extent, extent), random.uniform(-extent, extent),
+                    random.uniform(0, extent * 0.25))
+
+    def spawn_lights(self):
+        """ Spawns the requested amount of point and spot lights """
+        for i in range(self.args.lights):
+            pos = self.random_pos()
+            if i % 4 == 3:
+                light = SpotLight()
+                light.fov = random.uniform(30, 90)
+                light.direction = self.random_pos() - pos
+            else:
+                light = PointLight()
+                light.inner_radius = 0.1
+            light.pos = pos
+            light.radius = random.uniform(5, 30)
+            light.energy = random.uniform(10, 100)
+            light.set_color_from_temperature(random.uniform(2000, 9000))
+            light.casts_shadows = random.random() < self.args.shadow_fraction
+            light.shadow_map_resolution = 256
+            self.render_pipeline.add_light(light)
+            self.lights.append(light)
+
+    def spawn_probes(self):
+        """ Spawns the requested amount of environment probes """
+        for _ in range(self.args.probes):
+            probe = self.render_pipeline.add_environment_probe()
+            probe.set_pos(self.random_pos())
+            probe.set_scale(random.uniform(2, 10))
+
+    def spawn_effects(self):
+        """ Spawns cards with a set of different effect options, so the
+        effect cache sees several permutations """
+        maker = CardMaker("BenchmarkCard")
+        maker.set_frame(-1, 1, -1, 1)
+        option_names = ["render_shadow", "alpha_testing", "normal_mapping",
+                        "parallax_mapping", "render_envmap"]
+        for i in range(self.args.effects):
+            card = self.render.attach_new_node(maker.generate())
+            card.set_pos(self.random_pos())
+            options = {name: bool(i & (1 << bit)) for bit, name in enumerate(option_names)}
+            self.render_pipeline.set_effect(card, "effects/default.yaml", options)
+
+    def install_timers(self):
+        """ Wraps the update methods of all subsystems with timers """
+        pipeline = self.render_pipeline
+        timer = self.timer
+        timer.wrap("task_scheduler", pipeline.task_scheduler, "step")
+        timer.wrap("debugger", pipeline.debugger, "update")
+        timer.wrap("daytime_manager", pipeline.daytime_mgr, "update")
+        timer.wrap("light_manager", pipeline.light_mgr, "update")
+        timer.wrap("light_manager.command_queue", pipeline.light_mgr.cmd_queue, "process_queue")
+        timer.wrap("common_resources", pipeline.common_resources, "update")
+        timer.wrap("stage_manager", pipeline.stage_mgr, "update")
+        timer.wrap_hooks(pipeline.plugin_mgr)
+
+    def animate_scene(self, task):
+        """ Moves a fraction of the lights and advances the time of day, to
+        keep the update paths busy """
+        start = WALL_CLOCK()
+        count = int(len(self.lights) * self.args.animate)
+        for light in random.sample(self.lights, count):
+            light.pos = self.random_pos()
+        daytime_mgr = self.render_pipeline.daytime_mgr
+        daytime_mgr.time = (daytime_mgr.time + 0.001) % 1.0
+        self.timer.add("benchmark.animate", WALL_CLOCK() - start)
+        return task.cont
+
+    def run_frames(self):
+        """ Steps the task manager for the warmup and benchmark frames and
+        returns the collected frame durations """
+        for _ in range(self.args.warmup):
+            self.taskMgr.step()
+
+        frame_wall, frame_cpu = [], []
+        for _ in range(self.args.frames):
+            self.timer.begin_frame()
+            wall_start, cpu_start = WALL_CLOCK(), CPU_CLOCK()
+            self.taskMgr.step()
+            frame_wall.append(WALL_CLOCK() - wall_start)
+            frame_cpu.append(CPU_CLOCK() - cpu_start)
+            self.timer.end_frame()
+        return frame_wall, frame_cpu
+
+    def generate_report(self, frame_wall, frame_cpu):
+        """ Generates the JSON serializable benchmark report """
+        gsg = self.win.gsg
+        return {
+            "revision": get_git_revision(),
+            "system": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "panda3d": PandaSystem.get_version_string(),
+                "driver_renderer": gsg.driver_renderer,
+                "native_cxx": NATIVE_CXX_LOADED,
+            },
+            "config": vars(self.args),
+            "startup_s": self.startup_duration,
+            "frame": summarize(frame_wall),
+            "frame_cpu": summarize(frame_cpu),
+            "subsystems": {name: summarize(samples)
+                           for name, samples in self.timer.samples.items()},
+        }
+
+
+def parse_args(argv=None):
+    """ Parses the command line arguments """
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("--frames", type=int, default=500,
+                        help="Amount of measured frames")
+    parser.add_argument("--warmup", type=int, default=30,
+                        help="Frames to render before measuring")
+    parser.add_argument("--lights", type=int, default=256,
+                        help="Amount of lights to spawn")
+    parser.add_argument("--shadow-fraction", type=float, default=0.1,
+                        help="Fraction of the lights which cast shadows")
+    parser.add_argument("--probes", type=int, default=16,
+                        help="Amount of environment probes to spawn")
+    parser.add_argument("--effects", type=int, default=32,
+                        help="Amount of objects with custom effects to spawn")
+    parser.add_argument("--animate", type=float, default=0.05,
+                        help="Fraction of lights to move each frame, 0 disables "
+                        "all animation")
+    parser.add_argument("--extent", type=float, default=100.0,
+                        help="Size of the procedural scene")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=180)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--debugger", action="store_true",
+                        help="Enable the onscreen debugger")
+    parser.add_argument("--display", default=None,
+                        help="Graphics pipe to load, e.g. p3headlessgl")
+    parser.add_argument("--config-dir", default=None,
+                        help="Custom pipeline config directory")
+    parser.add_argument("--output", default=None,
+                        help="File to write the JSON report to, defaults to stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    benchmark = Benchmark(args)
+    report = benchmark.generate_report(*benchmark.run_frames())
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output)
+        print("Wrote benchmark report to", args.output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
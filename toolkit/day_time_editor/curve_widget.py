@@ -245,7 +245,7 @@ class CurveWidget(QWidget):
             last_value = 0
             for i in range(canvas_width):
                 rel_offset = i / (canvas_width - 1.0)
-                curve_height = self._get_y_value_for(curve.get_value(rel_offset))
+                curve_height = self._get_y_value_for(curve.get_baked_value(rel_offset))
 
                 if i == 0:
                     last_value = curve_height
@@ -295,12 +295,12 @@ class CurveWidget(QWidget):
             relv = float(i) / float(canvas_width)
 
             if len(self._curves) == 1:
-                val = max(0, min(255, int(bar_curve.get_value(relv) * 255.0)))
+                val = max(0, min(255, int(bar_curve.get_baked_value(relv) * 255.0)))
                 painter.setPen(QColor(val, val, val))
             else:
-                r = max(0, min(255, int(bar_curve[0].get_value(relv) * 255.0)))
-                g = max(0, min(255, int(bar_curve[1].get_value(relv) * 255.0)))
-                b = max(0, min(255, int(bar_curve[2].get_value(relv) * 255.0)))
+                r = max(0, min(255, int(bar_curve[0].get_baked_value(relv) * 255.0)))
+                g = max(0, min(255, int(bar_curve[1].get_baked_value(relv) * 255.0)))
+                b = max(0, min(255, int(bar_curve[2].get_baked_value(relv) * 255.0)))
                 painter.setPen(QColor(r, g, b))
             painter.drawLine(xpos, bar_top_pos, xpos, bar_top_pos + 2 * bar_half_height)
 